@@ -0,0 +1,79 @@
+"""Compare the temp-file OCR round trip against the in-memory engines.
+
+Run from the src directory:
+    python -m benchmarks.ocr_io [crop_dir] [--repeat N] [--tesseract PATH]
+"""
+
+import argparse
+import os
+import time
+
+from benchmarks.samples import load_sample_crops
+from utils import patched_pytesseract as pytesseract
+from utils.ocr import DIN_ALTERNATE, TESSDATA_PATH
+from utils.ocr_engine import PooledApiEngine, SubprocessEngine, tesserocr_installed
+
+WHITELIST = "ABCDEFGHIJKLMNOPQRSTUVWXYZ abcdefghijklmnopqrstuvwxyz0123456789+/.%'"
+PSM = 7
+
+
+def _time(fn, crops: list, repeat: int) -> float:
+    """Time a recognition function over every crop
+
+    :param fn: The function taking a crop
+    :param crops: The crops
+    :param repeat: The number of passes over the crops
+    :return: The mean milliseconds per crop
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for crop in crops:
+            fn(crop)
+    return (time.perf_counter() - start) * 1000 / (repeat * len(crops))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("crop_dir", nargs="?", default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tesseract", default=None)
+    args = parser.parse_args()
+
+    if args.tesseract:
+        pytesseract.tesseract_cmd = args.tesseract
+
+    crops = load_sample_crops(args.crop_dir)
+    config = f'-c tessedit_char_whitelist="{WHITELIST}" --psm {PSM}'
+
+    results = {
+        "run_and_get_output (temp files)": _time(
+            lambda crop: pytesseract.run_and_get_output(
+                crop, "txt", DIN_ALTERNATE, config
+            ),
+            crops,
+            args.repeat,
+        ),
+        "SubprocessEngine (stdin/stdout)": _time(
+            lambda crop: SubprocessEngine(DIN_ALTERNATE).recognize(
+                crop, WHITELIST, PSM
+            ),
+            crops,
+            args.repeat,
+        ),
+    }
+
+    if tesserocr_installed:
+        engine = PooledApiEngine(DIN_ALTERNATE, TESSDATA_PATH, os.cpu_count() or 1)
+        engine.warm_up()
+        results["PooledApiEngine (pixel buffers)"] = _time(
+            lambda crop: engine.recognize(crop, WHITELIST, PSM), crops, args.repeat
+        )
+        engine.close()
+
+    print(f"{len(crops)} crops x {args.repeat} passes")
+    for name, ms in results.items():
+        print(f"{name:<36} {ms:8.2f} ms/crop")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Time each preprocess_* function over a set of sample crops.
+
+Run from the src directory:
+    python -m benchmarks.preprocess [crop_dir] [--repeat N]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.samples import load_sample_crops
+from utils import ocr
+
+PREPROCESS_FUNCS = [
+    ocr.preprocess_img,
+    ocr.preprocess_char_count_img,
+    ocr.preprocess_lc_level_img,
+    ocr.preprocess_trace_img,
+    ocr.preprocess_equipped_img,
+    ocr.preprocess_main_stat_img,
+    ocr.preprocess_sub_stat_img,
+    ocr.preprocess_superimposition_img,
+    ocr.preprocess_uid_img,
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("crop_dir", nargs="?", default=None)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    # the scanner hands the parsers array views, so time against arrays as well
+    crops = [np.asarray(crop) for crop in load_sample_crops(args.crop_dir)]
+
+    print(f"{len(crops)} crops x {args.repeat} passes")
+    for fn in PREPROCESS_FUNCS:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for crop in crops:
+                fn(crop)
+        us = (time.perf_counter() - start) * 1e6 / (args.repeat * len(crops))
+        print(f"{fn.__name__:<32} {us:8.1f} us/crop")
+
+
+if __name__ == "__main__":
+    main()
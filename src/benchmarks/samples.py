@@ -0,0 +1,45 @@
+import os
+
+from PIL import Image as PILImage
+from PIL import ImageDraw
+from PIL.Image import Image
+
+SYNTHETIC_TEXTS = [
+    "+15",
+    "80/80",
+    "Equipped",
+    "CRIT DMG",
+    "Musketeer's Wild Wheat Felt Hat",
+    "12.9%",
+    "1234/2000",
+    "10/10",
+]
+
+
+def load_sample_crops(crop_dir: str | None = None, limit: int = 50) -> list[Image]:
+    """Load sample crops to benchmark with
+
+    Any folder of PNG crops works, e.g. a debug folder saved by a scan in debug
+    mode. Without a folder, light-on-dark text crops are rendered instead.
+
+    :param crop_dir: The folder containing the crops, defaults to None
+    :param limit: The maximum number of crops to load, defaults to 50
+    :return: The crops
+    """
+    if crop_dir:
+        crops = []
+        for file_name in sorted(os.listdir(crop_dir)):
+            if not file_name.lower().endswith(".png"):
+                continue
+            with PILImage.open(os.path.join(crop_dir, file_name)) as img:
+                crops.append(img.convert("RGB"))
+            if len(crops) >= limit:
+                break
+        return crops
+
+    crops = []
+    for text in SYNTHETIC_TEXTS:
+        img = PILImage.new("RGB", (12 * len(text) + 20, 40), (30, 30, 40))
+        ImageDraw.Draw(img).text((10, 12), text, fill=(255, 255, 255))
+        crops.append(img.resize((img.width * 2, img.height * 2)))
+    return crops
@@ -28,6 +28,13 @@ EQUIPPED_AVATAR = "equipped_avatar"
 EQUIPPED_AVATAR_OFFSET = "equipped_avatar_trailblazer"
 EQUIPPED = "equipped"
 LOCK = "lock"
+RELIC_ICON = "relic_icon"
+GRID = "grid"
+GRID_AREA = "area"
+GRID_SHAPE = "shape"
+GRID_RARITY = "rarity"
+GRID_LEVEL = "level"
+GRID_LOCK = "lock"
 
 # Paths
 HUNT = "hunt"
@@ -11,6 +11,12 @@ from config.const import (
     EQUIPPED_AVATAR,
     EQUIPPED_AVATAR_OFFSET,
     ERUDITION,
+    GRID,
+    GRID_AREA,
+    GRID_LEVEL,
+    GRID_LOCK,
+    GRID_RARITY,
+    GRID_SHAPE,
     HARMONY,
     HUNT,
     LIGHT_CONE,
@@ -19,6 +25,7 @@ from config.const import (
     PRESERVATION,
     QUANTITY,
     RELIC,
+    RELIC_ICON,
     REMEMBRANCE,
     SORT,
     STATS,
@@ -126,6 +133,18 @@ SCREENSHOT_COORDS = {
                 }
             },
         },
+        # inventory grid, split evenly into cells. These have not been measured
+        # in game, so the grid is only read when CONFIG_READ_GRID is set
+        GRID: {
+            # (x, y, w, h) of the fully visible rows in % of the window
+            GRID_AREA: (0.0625, 0.13, 0.6355, 0.735),
+            # rows and columns of cells
+            GRID_SHAPE: (5, 9),
+            # (x0, y0, x1, y1) in % of a cell
+            GRID_RARITY: (0.08, 0.06, 0.3, 0.22),
+            GRID_LOCK: (0.66, 0.04, 0.9, 0.2),
+            GRID_LEVEL: (0.06, 0.78, 0.9, 0.95),
+        },
         # stats screenshot of selected item in inventory screen
         STATS: (0.72, 0.09, 0.25, 0.78),
         # (x0, y0, x1, y1) in % of the stats screenshot
@@ -150,6 +169,8 @@ SCREENSHOT_COORDS = {
             RELIC_MAINSTAT: (0.11, 0.358, 0.7, 0.4),
             RELIC_SUBSTAT_NAMES: (0.11, 0.4, 0.5, 0.6),
             RELIC_SUBSTAT_VALUES: (0.775, 0.4, 0.975, 0.6),
+            # artwork of the relic piece, used to identify it without OCR
+            RELIC_ICON: (0.5, 0.1, 0.82, 0.34),
         },
     }
 }
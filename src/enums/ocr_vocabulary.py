@@ -0,0 +1,13 @@
+from enum import Enum
+
+
+class OcrVocabulary(Enum):
+    """OcrVocabulary enum for the text fields recognized against a closed vocabulary"""
+
+    RELIC_NAME = "relic_name"
+    LIGHT_CONE_NAME = "light_cone_name"
+    MAIN_STAT = "main_stat"
+    SUB_STAT = "sub_stat"
+    CHARACTER = "character"
+    # every word on the relic stats panel, for the batched OCR pass
+    RELIC_STATS = "relic_stats"
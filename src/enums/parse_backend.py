@@ -0,0 +1,9 @@
+from enum import Enum
+
+
+class ParseBackend(Enum):
+    """ParseBackend enum for where scanned items are parsed"""
+
+    THREAD = "thread"
+    PROCESS = "process"
+    INLINE = "inline"
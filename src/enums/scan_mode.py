@@ -6,3 +6,4 @@ class ScanMode(Enum):
 
     NORMAL = 0
     RECENT_RELICS = 1
+    INCREMENTAL = 2
@@ -1,16 +1,19 @@
 import asyncio
 import datetime
+import multiprocessing
 import sys
 import traceback
 from typing import Optional
 import winsound
 
+import requests
 from pynput.keyboard import Key, KeyCode, Listener
 from PyQt6 import QtGui, QtWidgets
 from PyQt6.QtCore import QSettings, QThread, QUrl, pyqtSignal
 
 from enums.increment_type import IncrementType
 from enums.log_level import LogLevel
+from enums.parse_backend import ParseBackend
 from enums.scan_mode import ScanMode
 from models.const import (
     CHAR_FILTERS,
@@ -26,8 +29,12 @@ from models.const import (
     CONFIG_MIN_RELIC_LEVEL,
     CONFIG_MIN_RELIC_RARITY,
     CONFIG_NAV_DELAY,
+    CONFIG_OFFLINE,
     CONFIG_OUTPUT_LOCATION,
+    CONFIG_PARSE_BACKEND,
+    CONFIG_PARSE_WORKERS,
     CONFIG_PLAY_SOUND,
+    CONFIG_READ_GRID,
     CONFIG_RECENT_RELICS_FIVE_STAR,
     CONFIG_RECENT_RELICS_NUM,
     CONFIG_SCAN_CHARACTERS,
@@ -43,7 +50,7 @@ from models.const import (
     MIN_RARITY,
     RELIC_FILTERS,
 )
-from models.game_data import GameData
+from models.game_data import GAME_DATA_CACHE, GAME_DATA_URL, GameData
 from services.scanner.scanner import HSRScanner, InterruptedScanException
 from ui.hsr_scanner import Ui_MainWindow
 from utils.conversion import convert_to_sro
@@ -72,6 +79,10 @@ class HSRScannerUI(QtWidgets.QMainWindow, Ui_MainWindow):
         # fetch game data
         self._fetch_game_data_thread = FetchGameDataThread()
         self._fetch_game_data_thread.result_signal.connect(self.handle_game_data)
+        self._fetch_game_data_thread.refresh_signal.connect(
+            self.handle_game_data_refresh
+        )
+        self._fetch_game_data_thread.log_signal.connect(self.log)
         self._fetch_game_data_thread.error_signal.connect(self.handle_game_data_error)
         self._fetch_game_data_thread.start()
 
@@ -86,6 +97,7 @@ class HSRScannerUI(QtWidgets.QMainWindow, Ui_MainWindow):
         try:
             self.pushButtonStartScan.clicked.disconnect()
             self.pushButtonStartScanRecentRelics.clicked.disconnect()
+            self.pushButtonStartScanIncremental.clicked.disconnect()
         except Exception:
             pass
 
@@ -99,7 +111,22 @@ class HSRScannerUI(QtWidgets.QMainWindow, Ui_MainWindow):
         self.pushButtonStartScanRecentRelics.setEnabled(True)
         self.pushButtonStartScanRecentRelics.setText("Scan")
 
-        self._fetch_game_data_thread.deleteLater()
+        self.pushButtonStartScanIncremental.clicked.connect(self.start_scan_incremental)
+        self.pushButtonStartScanIncremental.setEnabled(True)
+        self.pushButtonStartScanIncremental.setText("Scan")
+
+        # the thread may still be refreshing a cached copy in the background
+        self._fetch_game_data_thread.finished.connect(
+            self._fetch_game_data_thread.deleteLater
+        )
+
+    def handle_game_data_refresh(self, game_data: GameData) -> None:
+        """Handle on a newer version of the game data downloaded after the cached copy was loaded
+
+        :param game_data: The game data
+        """
+        self.game_data = game_data
+        self.log("Updated database version: " + self.game_data.version)
 
     def handle_game_data_error(self, e: Exception) -> None:
         """Handle on game data error
@@ -116,6 +143,7 @@ class HSRScannerUI(QtWidgets.QMainWindow, Ui_MainWindow):
         try:
             self.pushButtonStartScan.clicked.disconnect()
             self.pushButtonStartScanRecentRelics.clicked.disconnect()
+            self.pushButtonStartScanIncremental.clicked.disconnect()
         except Exception:
             pass
 
@@ -129,6 +157,12 @@ class HSRScannerUI(QtWidgets.QMainWindow, Ui_MainWindow):
         self.pushButtonStartScanRecentRelics.setEnabled(True)
         self.pushButtonStartScanRecentRelics.setText("Retry")
 
+        self.pushButtonStartScanIncremental.clicked.connect(
+            self._fetch_game_data_thread.start
+        )
+        self.pushButtonStartScanIncremental.setEnabled(True)
+        self.pushButtonStartScanIncremental.setText("Retry")
+
     def setup_ui(self, MainWindow: QtWidgets.QMainWindow) -> None:
         """Sets up the UI for the application
 
@@ -218,6 +252,22 @@ class HSRScannerUI(QtWidgets.QMainWindow, Ui_MainWindow):
             self._settings.value(CONFIG_PLAY_SOUND, True) == "true"
         )
 
+        # hand-edited or outdated values fall back to the defaults
+        try:
+            parse_backend = ParseBackend(
+                self._settings.value(CONFIG_PARSE_BACKEND, ParseBackend.THREAD.value)
+            )
+        except ValueError:
+            parse_backend = ParseBackend.THREAD
+        self.comboBoxParseBackend.setCurrentIndex(
+            list(ParseBackend).index(parse_backend)
+        )
+        try:
+            parse_workers = int(self._settings.value(CONFIG_PARSE_WORKERS, 0))
+        except (TypeError, ValueError):
+            parse_workers = 0
+        self.spinBoxParseWorkers.setValue(parse_workers)
+
     def save_settings(self) -> None:
         """Saves the settings for the scan"""
         self._settings.setValue(
@@ -260,6 +310,11 @@ class HSRScannerUI(QtWidgets.QMainWindow, Ui_MainWindow):
         )
         self._settings.setValue(CONFIG_INCLUDE_UID, self.checkBoxIncludeUid.isChecked())
         self._settings.setValue(CONFIG_PLAY_SOUND, self.checkBoxPlaySound.isChecked())
+        self._settings.setValue(
+            CONFIG_PARSE_BACKEND,
+            list(ParseBackend)[self.comboBoxParseBackend.currentIndex()].value,
+        )
+        self._settings.setValue(CONFIG_PARSE_WORKERS, self.spinBoxParseWorkers.value())
 
     def reset_settings(self) -> None:
         """Resets the settings for the scan"""
@@ -282,6 +337,8 @@ class HSRScannerUI(QtWidgets.QMainWindow, Ui_MainWindow):
         self._settings.setValue(CONFIG_DEBUG_MODE, False)
         self._settings.setValue(CONFIG_INCLUDE_UID, False)
         self._settings.setValue(CONFIG_PLAY_SOUND, True)
+        self._settings.setValue(CONFIG_PARSE_BACKEND, ParseBackend.THREAD.value)
+        self._settings.setValue(CONFIG_PARSE_WORKERS, 0)
         self.load_settings()
 
     def reset_fields(self) -> None:
@@ -365,6 +422,36 @@ class HSRScannerUI(QtWidgets.QMainWindow, Ui_MainWindow):
             config[CONFIG_DEBUG_OUTPUT_LOCATION] if config[CONFIG_DEBUG] else None,
         )
 
+    def start_scan_incremental(self) -> None:
+        """Starts the scan for items obtained since the last incremental scan"""
+        if self._is_running:
+            return
+        self.save_settings()
+        self.reset_fields()
+        self.tabWidget.setCurrentIndex(0)
+
+        config = self.get_config()
+        config[CONFIG_SCAN_CHARACTERS] = False
+
+        # initialize scanner
+        try:
+            if not config[CONFIG_SCAN_LC] and not config[CONFIG_SCAN_RELICS]:
+                raise Exception(
+                    "Light cones or relics must be selected for an incremental scan."
+                )
+            scanner = HSRScanner(
+                config, self.game_data, scan_mode=ScanMode.INCREMENTAL.value
+            )
+        except Exception as e:
+            self.log((e, LogLevel.ERROR))
+            return
+
+        self.log("Starting incremental scan...")
+        self.to_scanner_thread(
+            scanner,
+            config[CONFIG_DEBUG_OUTPUT_LOCATION] if config[CONFIG_DEBUG] else None,
+        )
+
     def to_scanner_thread(
         self, scanner: HSRScanner, debug_output_location: Optional[str] = None
     ) -> None:
@@ -451,6 +538,17 @@ class HSRScannerUI(QtWidgets.QMainWindow, Ui_MainWindow):
         config[CONFIG_NAV_DELAY] = self.spinBoxNavDelay.value() / 1000
         config[CONFIG_SCAN_DELAY] = self.spinBoxScanDelay.value() / 1000
 
+        # parsing
+        config[CONFIG_PARSE_BACKEND] = list(ParseBackend)[
+            self.comboBoxParseBackend.currentIndex()
+        ].value
+        config[CONFIG_PARSE_WORKERS] = self.spinBoxParseWorkers.value()
+
+        # reading the inventory grid is experimental and only set in the settings file
+        config[CONFIG_READ_GRID] = (
+            self._settings.value(CONFIG_READ_GRID, False) == "true"
+        )
+
         # debug mode
         config[CONFIG_DEBUG] = self.checkBoxDebugMode.isChecked()
         config[CONFIG_DEBUG_OUTPUT_LOCATION] = None
@@ -566,6 +664,9 @@ class HSRScannerUI(QtWidgets.QMainWindow, Ui_MainWindow):
         self.pushButtonStartScanRecentRelics.setText("Processing...")
         self.pushButtonStartScanRecentRelics.setEnabled(False)
 
+        self.pushButtonStartScanIncremental.setText("Processing...")
+        self.pushButtonStartScanIncremental.setEnabled(False)
+
     def enable_start_scan_button(self) -> None:
         """Enables the start scan button and sets the text to Start Scan"""
         self._is_running = False
@@ -576,6 +677,9 @@ class HSRScannerUI(QtWidgets.QMainWindow, Ui_MainWindow):
         self.pushButtonStartScanRecentRelics.setText("Scan")
         self.pushButtonStartScanRecentRelics.setEnabled(True)
 
+        self.pushButtonStartScanIncremental.setText("Scan")
+        self.pushButtonStartScanIncremental.setEnabled(True)
+
     def log(self, log: tuple[str | Exception, LogLevel] | str) -> None:
         """Logs a message to the log box
 
@@ -599,6 +703,8 @@ class FetchGameDataThread(QThread):
     """FetchGameDataThread class handles fetching the game data in a separate thread"""
 
     result_signal = pyqtSignal(object)
+    refresh_signal = pyqtSignal(object)
+    log_signal = pyqtSignal(object)
     error_signal = pyqtSignal(object)
 
     def __init__(self) -> None:
@@ -606,11 +712,68 @@ class FetchGameDataThread(QThread):
         super().__init__()
 
     def run(self) -> None:
-        """Runs the fetch game data"""
+        """Runs the fetch game data
+
+        A cached copy is handed over straight away and then revalidated with the
+        server, in which case a newer version is handed over once downloaded.
+        """
+        offline = QSettings(KEL_Z, HSR_SCANNER).value(CONFIG_OFFLINE, False) == "true"
+        loaded = False
         try:
-            self.result_signal.emit(GameData())
-            self.quit()
+            cached = GAME_DATA_CACHE.load()
+            if cached is not None:
+                try:
+                    game_data = GameData(cached, offline)
+                except Exception as e:
+                    # a corrupt or outdated copy is downloaded again instead
+                    GAME_DATA_CACHE.discard()
+                    cached = None
+                    self.log_signal.emit(
+                        (
+                            f"Discarded the cached game data, it could not be loaded: {e}",
+                            LogLevel.WARNING,
+                        )
+                    )
+                else:
+                    self.result_signal.emit(game_data)
+                    loaded = True
+            if offline:
+                if cached is None:
+                    raise Exception("Offline mode is on but no game data is cached.")
+                return
+
+            try:
+                data, changed = GAME_DATA_CACHE.fetch()
+            except requests.exceptions.RequestException as e:
+                if cached is None:
+                    raise Exception("Failed to fetch game data from " + GAME_DATA_URL)
+                self.log_signal.emit(
+                    (
+                        f"Failed to check for game data updates, using the cached copy: {e}",
+                        LogLevel.WARNING,
+                    )
+                )
+                return
+
+            if cached is None:
+                self.result_signal.emit(GameData(data, offline))
+            elif changed:
+                try:
+                    self.refresh_signal.emit(GameData(data, offline))
+                except Exception as e:
+                    self.log_signal.emit(
+                        (f"Failed to load updated game data: {e}", LogLevel.WARNING)
+                    )
         except Exception as e:
+            # the UI already runs on the cached copy, so a failed refresh is not fatal
+            if loaded:
+                self.log_signal.emit(
+                    (
+                        f"Failed to check for game data updates, using the cached copy: {e}",
+                        LogLevel.WARNING,
+                    )
+                )
+                return
             self.error_signal.emit(e)
 
 
@@ -693,4 +856,5 @@ def main():
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
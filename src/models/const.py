@@ -71,6 +71,7 @@ RELIC_SUBSTAT_NAMES = "substat_names"
 RELIC_SUBSTAT_VALUES = "substat_vals"
 RELIC_SUBSTAT_NAME = "key"
 RELIC_SUBSTAT_VALUE = "value"
+RELIC_SUBSTAT_ROLLS = "rolls"
 
 # Filter keys
 FILTERS = "filters"
@@ -117,6 +118,11 @@ CONFIG_RECENT_RELICS_FIVE_STAR = "recent_relics_five_star"
 CONFIG_INCLUDE_UID = "include_uid"
 CONFIG_PLAY_SOUND = "play_sound"
 
+CONFIG_PARSE_BACKEND = "parse_backend"
+CONFIG_PARSE_WORKERS = "parse_workers"
+CONFIG_OFFLINE = "offline"
+CONFIG_READ_GRID = "read_grid"
+
 CONFIG_DEBUG = "debug"
 CONFIG_DEBUG_OUTPUT_LOCATION = "debug_output_location"
 
@@ -1,22 +1,28 @@
-import base64
+import os
 from functools import cached_property
-from io import BytesIO
 
 import cv2
-import Levenshtein
 import numpy as np
 import requests
-from PIL import Image as PILImage
 from PIL.Image import Image
 from PyQt6.QtCore import QSettings
 
+from enums.ocr_vocabulary import OcrVocabulary
 from models.const import HSR_SCANNER, IS_STELLE, KEL_Z
+from utils.data import cache_path
+from utils.fuzzy_matcher import FuzzyMatcher
+from utils.http_cache import CachedJson
+from utils.icon_atlas import AvatarMatcher, IconAtlas
 
 GAME_DATA_URL = "https://raw.githubusercontent.com/kel-z/HSR-Data/v6/output/min/game_data_with_icons.json"
+OCR_VOCABULARY_FILE = "ocr_words_{name}_{version}.txt"
 SRO_MAPPINGS_URL = (
     "https://raw.githubusercontent.com/kel-z/HSR-Data/v6/output/min/sro_key_map.json"
 )
 
+GAME_DATA_CACHE = CachedJson(GAME_DATA_URL, "game_data_with_icons.json")
+SRO_MAPPINGS_CACHE = CachedJson(SRO_MAPPINGS_URL, "sro_key_map.json")
+
 RELIC_MAIN_STATS = {
     "SPD",
     "HP",
@@ -66,27 +72,28 @@ class GameData:
 
     sro_mappings = None
 
-    def __init__(self) -> None:
-        try:
-            response = requests.get(GAME_DATA_URL)
-            data = response.json()
-        except requests.exceptions.RequestException:
-            raise Exception("Failed to fetch game data from " + GAME_DATA_URL)
+    def __init__(self, data: dict | None = None, offline: bool = False) -> None:
+        """Constructor
+
+        :param data: The game data, defaults to fetching it or loading the cached copy
+        :param offline: The flag to never download game data or SRO mappings, defaults to False
+        :raises Exception: Thrown if the game data could not be fetched or loaded
+        """
+        if data is None:
+            try:
+                data = GAME_DATA_CACHE.get(offline)
+            except requests.exceptions.RequestException:
+                raise Exception("Failed to fetch game data from " + GAME_DATA_URL)
 
         self.settings = QSettings(KEL_Z, HSR_SCANNER)
+        self.offline = offline
 
         self.version = data["version"]
         self.RELIC_META_DATA = data["relics"]
         self.LIGHT_CONE_META_DATA = data["light_cones"]
         self.CHARACTER_META_DATA = data["characters"]
-        self.CHARACTER_IDS = data["mini_icons"].keys()
-
-        self.EQUIPPED_ICONS = {}
-        for char_id, base64_string in data["mini_icons"].items():
-            decoded_image = base64.b64decode(base64_string)
-            img = PILImage.open(BytesIO(decoded_image))
-            img = cv2.GaussianBlur(np.array(img), (5, 5), 0)  # type: ignore
-            self.EQUIPPED_ICONS[char_id] = img
+        self.EQUIPPED_ICONS = IconAtlas.load(self.version, data["mini_icons"])
+        self.CHARACTER_IDS = self.EQUIPPED_ICONS.ids
 
         # where i + 1 is the rarity
         self.COLOURS = np.array(
@@ -99,6 +106,25 @@ class GameData:
             ]
         )
 
+    def __getstate__(self) -> dict:
+        """Get the state to pickle when sending the game data to a worker process
+
+        :return: The state, without the QSettings handle
+        """
+        state = self.__dict__.copy()
+        del state["settings"]
+        # rebuilt on first use from the atlas, which is mapped again
+        state.pop("_avatar_matcher", None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """Restore the game data in a worker process
+
+        :param state: The pickled state
+        """
+        self.__dict__.update(state)
+        self.settings = QSettings(KEL_Z, HSR_SCANNER)
+
     def get_sro_mappings(self) -> dict:
         """Get SRO mappings
 
@@ -106,13 +132,47 @@ class GameData:
         """
         if self.sro_mappings is None:
             try:
-                response = requests.get(SRO_MAPPINGS_URL)
-                self.sro_mappings = response.json()
+                self.sro_mappings = SRO_MAPPINGS_CACHE.get(self.offline)
             except requests.exceptions.RequestException:
                 raise Exception("Failed to fetch SRO mappings from " + SRO_MAPPINGS_URL)
 
         return self.sro_mappings
 
+    def write_ocr_vocabularies(self) -> dict[OcrVocabulary, str]:
+        """Write a Tesseract user-words file for each closed-vocabulary text field
+
+        Files are written once per game data version and reused afterwards.
+
+        :return: The user-words file of each vocabulary
+        """
+        phrases = {
+            OcrVocabulary.RELIC_NAME: self.RELIC_META_DATA,
+            OcrVocabulary.LIGHT_CONE_NAME: self.LIGHT_CONE_META_DATA,
+            OcrVocabulary.MAIN_STAT: RELIC_MAIN_STATS,
+            OcrVocabulary.SUB_STAT: RELIC_SUB_STATS,
+            OcrVocabulary.CHARACTER: [*PATHS, *self._get_character_keys, "Trailblazer"],
+        }
+        phrases[OcrVocabulary.RELIC_STATS] = [
+            *phrases[OcrVocabulary.RELIC_NAME],
+            *RELIC_MAIN_STATS,
+            *RELIC_SUB_STATS,
+        ]
+
+        paths = {}
+        for vocabulary, targets in phrases.items():
+            path = cache_path(
+                OCR_VOCABULARY_FILE.format(name=vocabulary.value, version=self.version)
+            )
+            if not os.path.exists(path):
+                words = {w for t in targets for w in t.split("#")[-1].split()}
+                tmp_path = path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write("\n".join(sorted(words)) + "\n")
+                os.replace(tmp_path, path)
+            paths[vocabulary] = path
+
+        return paths
+
     def get_relic_meta_data(self, name: str) -> dict:
         """Get relic meta data from name
 
@@ -170,22 +230,8 @@ class GameData:
             to_compare_img, to_compare_img, mask=mask
         )
 
-        max_conf = 0
-        res = ""
-
-        # Get character id with highest confidence
-        for char_id in self.CHARACTER_IDS:
-            # Get confidence
-            conf = cv2.matchTemplate(  # type: ignore
-                to_compare_img,
-                self.EQUIPPED_ICONS[char_id],
-                cv2.TM_CCOEFF_NORMED,  # type: ignore
-            ).max()
-            if conf > max_conf:
-                max_conf = conf
-                res, outfit_id = (
-                    char_id.split("#", 1) if "#" in char_id else (char_id, None)
-                )
+        char_id, _ = self._avatar_matcher.match(to_compare_img)
+        res, outfit_id = char_id.split("#", 1) if "#" in char_id else (char_id, None)
 
         if res.startswith("8"):
             self.settings.setValue(IS_STELLE, int(res[-1]) % 2 == 0)
@@ -197,7 +243,16 @@ class GameData:
         :param name: The name of the relic
         :return: The closest relic name and distance
         """
-        return self._get_closest_match(name, self.RELIC_META_DATA)
+        return self._matchers["relic_name"].match(name)
+
+    def get_relic_name_distance(self, name: str, target: str) -> int:
+        """Get distance from name to a relic name
+
+        :param name: The name of the relic
+        :param target: The relic name to compare with
+        :return: The distance
+        """
+        return self._matchers["relic_name"].distance(name, target)
 
     def get_closest_light_cone_name(self, name: str) -> tuple[str, int]:
         """Get closest light cone name from name
@@ -205,7 +260,7 @@ class GameData:
         :param name: The name of the light cone
         :return: The closest light cone name and distance
         """
-        return self._get_closest_match(name, self.LIGHT_CONE_META_DATA)
+        return self._matchers["light_cone_name"].match(name)
 
     def get_closest_relic_sub_stat(self, name: str) -> tuple[str, int]:
         """Get closest relic sub stat from name
@@ -213,7 +268,7 @@ class GameData:
         :param name: The name of the relic sub stat
         :return: The closest relic sub stat and distance
         """
-        return self._get_closest_match(name, RELIC_SUB_STATS)
+        return self._matchers["sub_stat"].match(name)
 
     def get_closest_relic_main_stat(self, name: str) -> tuple[str, int]:
         """Get closest relic main stat from name
@@ -221,7 +276,7 @@ class GameData:
         :param name: The name of the relic main stat
         :return: The closest relic main stat and distance
         """
-        return self._get_closest_match(name, RELIC_MAIN_STATS)
+        return self._matchers["main_stat"].match(name)
 
     def get_closest_character_name(self, name: str) -> tuple[str, int]:
         """Get closest character name from name
@@ -229,7 +284,7 @@ class GameData:
         :param name: The name of the character
         :return: The closest character name and distance
         """
-        return self._get_closest_match(name, self._get_character_keys)
+        return self._matchers["character_name"].match(name)
 
     def get_closest_path_name(self, name: str) -> tuple[str, int]:
         """Get closest path name from name
@@ -237,7 +292,7 @@ class GameData:
         :param name: The name of the path
         :return: The closest path name and distance
         """
-        return self._get_closest_match(name, PATHS)
+        return self._matchers["path"].match(name)
 
     def get_closest_rarity(self, pixel: list) -> int:
         """Get closest rarity from pixel
@@ -249,35 +304,37 @@ class GameData:
 
         return int(np.argmin(distances)) + 1
 
-    def _get_closest_match(
-        self, name: str, targets: set[str] | dict[str, dict] | list[str]
-    ) -> tuple[str, int]:
-        """Get closest match from name
+    def get_fuzzy_match_stats(self) -> dict[str, dict]:
+        """Get the lookup counters of the name matchers used so far
+
+        :return: The counters of each matcher
+        """
+        if "_matchers" not in self.__dict__:
+            return {}
+        return {key: matcher.stats() for key, matcher in self._matchers.items()}
+
+    @cached_property
+    def _avatar_matcher(self) -> AvatarMatcher:
+        """Get the equipped avatar matcher, built once from the icon atlas
+
+        :return: The avatar matcher
+        """
+        return AvatarMatcher(self.EQUIPPED_ICONS)
+
+    @cached_property
+    def _matchers(self) -> dict[str, FuzzyMatcher]:
+        """Get the name matchers, built once per target set
 
-        :param name: The name to get the closest match from
-        :param targets: The targets to compare against
-        :return: The closest match
+        :return: The matchers, keyed by the kind of name they match
         """
-        name = name.strip()
-
-        if not name:
-            return name, 100
-
-        if name in targets:
-            return name, 0
-
-        min_dist = 100
-        min_name = ""
-        for t in targets:
-            to_compare = t
-            if "#" in t:
-                to_compare = t.split("#")[1]
-            dist = Levenshtein.distance(name, to_compare, weights=(1, 1, 2))
-            if dist < min_dist:
-                min_dist = dist
-                min_name = t
-
-        return min_name, min_dist
+        return {
+            "relic_name": FuzzyMatcher(self.RELIC_META_DATA),
+            "light_cone_name": FuzzyMatcher(self.LIGHT_CONE_META_DATA),
+            "sub_stat": FuzzyMatcher(RELIC_SUB_STATS),
+            "main_stat": FuzzyMatcher(RELIC_MAIN_STATS),
+            "character_name": FuzzyMatcher(self._get_character_keys),
+            "path": FuzzyMatcher(PATHS),
+        }
 
     @cached_property
     def _get_character_keys(self) -> list:
@@ -0,0 +1,224 @@
+import os
+import threading
+from asyncio import Event
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable
+
+from PyQt6.QtCore import pyqtBoundSignal
+
+from enums.parse_backend import ParseBackend
+from models.game_data import GameData
+from utils.digits import forward_digit_templates, get_digit_reader
+from utils.ocr import set_ocr_vocabularies, warm_up_ocr
+from utils.ocr_engine import set_engine_size
+from utils.relic_icons import forward_relic_icons, get_relic_icon_index
+
+# maximum number of captured items waiting for or undergoing parsing at once
+DEFAULT_MAX_PENDING = 64
+
+
+class ParsePipeline:
+    """ParsePipeline class for parsing scanned items while the scan is still navigating
+
+    Items are handed to a pool of workers as soon as they are captured. At most
+    `max_pending` items can be queued or in progress at once; submitting more
+    blocks the scan until a worker frees a slot, so the screenshots held in memory
+    stay bounded regardless of the inventory size.
+
+    With the process backend, each worker process receives the game data once at
+    startup and builds its own parsers. Signals emitted by a worker-side parser
+    are recorded and replayed on the scanner's signals once the item is parsed.
+    Digit templates and relic icons are only learned and saved in this process,
+    from what the workers send back, so the workers never write the cache files.
+    """
+
+    def __init__(
+        self,
+        game_data: GameData,
+        log_signal: pyqtBoundSignal,
+        update_signal: pyqtBoundSignal,
+        backend: ParseBackend = ParseBackend.THREAD,
+        workers: int | None = None,
+        debug: bool = False,
+        max_pending: int = DEFAULT_MAX_PENDING,
+    ) -> None:
+        """Constructor
+
+        :param game_data: The GameData class instance
+        :param log_signal: The log signal
+        :param update_signal: The update signal
+        :param backend: Where items are parsed, defaults to a thread pool
+        :param workers: The number of workers, defaults to the CPU count
+        :param debug: Debug flag for worker-side parsers, defaults to False
+        :param max_pending: The maximum number of queued or running items
+        """
+        self._signals = {"log": log_signal, "update": update_signal}
+        self._version = game_data.version
+        self._backend = backend
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))
+
+        workers = workers or os.cpu_count()
+        match backend:
+            case ParseBackend.PROCESS:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=_init_worker,
+                    initargs=(game_data, debug),
+                )
+            case ParseBackend.THREAD:
+                self._executor = ThreadPoolExecutor(max_workers=workers)
+            case _:
+                self._executor = None
+
+    def submit(self, parser, *args) -> Future:
+        """Queue an item for parsing, blocking while the pipeline is full
+
+        :param parser: The parse strategy or character parser to parse with
+        :param args: The arguments to the parser's parse method
+        :return: The future holding the parse result
+        """
+        if self._executor is None:
+            return _run_inline(parser.parse, *args)
+
+        self._slots.acquire()
+        try:
+            if self._backend == ParseBackend.PROCESS:
+                future = self._executor.submit(_parse_in_worker, type(parser), *args)
+            else:
+                future = self._executor.submit(parser.parse, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+        if self._backend == ParseBackend.PROCESS:
+            return self._replay_signals(future)
+        return future
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the workers
+
+        :param wait: Whether to wait for queued items, otherwise they are cancelled
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _replay_signals(self, future: Future) -> Future:
+        """Unwrap a worker result, emitting its recorded signals on the scanner's signals
+
+        What the worker learned from the item is learned here as well.
+
+        :param future: The future holding the result and the recorded signals
+        :return: The future holding the parse result
+        """
+        res = Future()
+
+        def on_done(f: Future) -> None:
+            if f.cancelled():
+                res.cancel()
+                return
+            if f.exception() is not None:
+                res.set_exception(f.exception())
+                return
+            parsed, events, digits, icons = f.result()
+            for name, args in events:
+                self._signals[name].emit(*args)
+            for img, text, glyph_set in digits:
+                get_digit_reader().learn(img, text, glyph_set)
+            for icon, name in icons:
+                get_relic_icon_index(self._version).learn(icon, name)
+            res.set_result(parsed)
+
+        future.add_done_callback(on_done)
+        return res
+
+
+class _SignalRecorder:
+    """_SignalRecorder class standing in for a pyqtBoundSignal inside a worker process"""
+
+    def __init__(self, name: str, events: list) -> None:
+        """Constructor
+
+        :param name: The name of the signal being recorded
+        :param events: The list to record emitted signals to
+        """
+        self._name = name
+        self._events = events
+
+    def emit(self, *args) -> None:
+        """Record an emitted signal
+
+        :param args: The signal arguments
+        """
+        self._events.append((self._name, args))
+
+
+_worker_game_data = None
+_worker_debug = False
+_worker_parsers = {}
+_worker_events = []
+
+
+def _init_worker(game_data: GameData, debug: bool) -> None:
+    """Initialize a worker process
+
+    :param game_data: The GameData class instance
+    :param debug: Debug flag for the parsers
+    """
+    global _worker_game_data, _worker_debug
+    _worker_game_data = game_data
+    _worker_debug = debug
+
+    # every worker process is one of several, so one Tesseract handle per
+    # vocabulary is enough. Each vocabulary keeps its own handle, so switching
+    # between the fields of an item never reloads the traineddata
+    set_engine_size(1)
+    forward_digit_templates()
+    forward_relic_icons()
+    set_ocr_vocabularies(game_data.write_ocr_vocabularies())
+    warm_up_ocr()
+
+
+def _parse_in_worker(parser_cls: type, *args) -> tuple:
+    """Parse an item inside a worker process
+
+    :param parser_cls: The parse strategy or character parser class
+    :param args: The arguments to the parser's parse method
+    :return: The parse result, the signals emitted while parsing, and the digit
+        fields and relic icons to learn from
+    """
+    parser = _worker_parsers.get(parser_cls)
+    if parser is None:
+        parser = parser_cls(
+            _worker_game_data,
+            _SignalRecorder("log", _worker_events),
+            _SignalRecorder("update", _worker_events),
+            Event(),
+            _worker_debug,
+        )
+        _worker_parsers[parser_cls] = parser
+
+    try:
+        return (
+            parser.parse(*args),
+            list(_worker_events),
+            get_digit_reader().take_forwarded(),
+            get_relic_icon_index(_worker_game_data.version).take_forwarded(),
+        )
+    finally:
+        _worker_events.clear()
+
+
+def _run_inline(fn: Callable, *args) -> Future:
+    """Run a parse function on the calling thread
+
+    :param fn: The parse function
+    :param args: The arguments to the parse function
+    :return: The completed future holding the parse result
+    """
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
@@ -35,7 +35,23 @@ from models.const import (
 )
 from models.game_data import GameData
 from utils.data import resource_path
-from utils.ocr import image_to_string, preprocess_trace_img
+from utils.ocr import (
+    OcrAttempt,
+    preprocess_img,
+    preprocess_trace_img,
+    read_numeric,
+)
+
+TRACE_DIGITS = ("trace_level", r"\d{1,2}/\d{1,2}")
+TRACE_ATTEMPTS = [
+    OcrAttempt(6, preprocess_trace_img),
+    OcrAttempt(6),
+    OcrAttempt(7, preprocess_trace_img),
+    OcrAttempt(7),
+]
+
+LEVEL_DIGITS = ("character_level", r"\d{1,2}")
+LEVEL_ATTEMPTS = [OcrAttempt(7, preprocess_img), OcrAttempt(6, preprocess_img)]
 
 
 class CharacterParser:
@@ -133,35 +149,19 @@ class CharacterParser:
             traces_dict = stats_dict[CHAR_TRACES]
             for k, v in traces_dict[TRACES_LEVELS].items():
                 try:
-                    res = image_to_string(
-                        v, "0123456789/", 6, True, preprocess_trace_img
+                    res = read_numeric(
+                        v,
+                        "0123456789/",
+                        *TRACE_DIGITS,
+                        TRACE_ATTEMPTS,
+                        preprocess_trace_img,
+                        parallel=True,
                     )
-
-                    # If the first OCR attempt failed, try again with different parameters
                     if not res or "/" not in res:
                         self._log(
-                            f"{character[CHAR_NAME]}: Failed to parse '{k}' level. Trying again with PSM 6 and no force preprocess.",
+                            f"{character[CHAR_NAME]}: No OCR attempt produced a valid '{k}' level.",
                             LogLevel.DEBUG,
                         )
-                        res = image_to_string(
-                            v, "0123456789/", 6, False, preprocess_trace_img
-                        )
-                    if not res or "/" not in res:
-                        self._log(
-                            f"{character[CHAR_NAME]}: Failed to parse '{k}' level. Trying again with PSM 7 and force preprocess.",
-                            LogLevel.DEBUG,
-                        )
-                        res = image_to_string(
-                            v, "0123456789/", 7, True, preprocess_trace_img
-                        )
-                    if not res or "/" not in res:
-                        self._log(
-                            f"{character[CHAR_NAME]}: Failed to parse '{k}' level. Trying again with PSM 7 and no force preprocess.",
-                            LogLevel.DEBUG,
-                        )
-                        res = image_to_string(
-                            v, "0123456789/", 7, False, preprocess_trace_img
-                        )
 
                     if k.startswith(CHAR_MEMOSPRITE):
                         key = k.split("_")[1]
@@ -206,10 +206,9 @@ class CharacterParser:
         if isinstance(level, int):
             return level
 
+        res = level
         if isinstance(level, Image):
-            res = image_to_string(level, "0123456789", 7, True)
-            if not res or not res.isdigit():
-                res = image_to_string(level, "0123456789", 6, True)
+            res = read_numeric(level, "0123456789", *LEVEL_DIGITS, LEVEL_ATTEMPTS)
 
         if not res.isdigit():
             self._log(
@@ -17,16 +17,19 @@ from models.const import (
 )
 from type_defs.stats_dict import LightConeDict
 
-from PIL.Image import Image
+import numpy as np
+from PIL import Image as PILImage
 from pyautogui import locate, ImageNotFoundException
 
 from config.light_cone_scan import LIGHT_CONE_NAV_DATA
 from enums.increment_type import IncrementType
 from enums.log_level import LogLevel
+from enums.ocr_vocabulary import OcrVocabulary
 from services.scanner.parsers.parse_strategy import BaseParseStrategy
 from utils.data import filter_images_from_dict
 from utils.ocr import (
     image_to_string,
+    numeric_image_to_string,
     preprocess_equipped_img,
     preprocess_lc_level_img,
     preprocess_superimposition_img,
@@ -38,6 +41,7 @@ class LightConeStrategy(BaseParseStrategy):
 
     SCAN_TYPE = IncrementType.LIGHT_CONE_ADD
     NAV_DATA = LIGHT_CONE_NAV_DATA
+    FILTERS_KEY = LC_FILTERS
 
     def get_optimal_sort_method(self, filters: dict) -> str:
         """Gets the optimal sort method based on the filters
@@ -70,7 +74,7 @@ class LightConeStrategy(BaseParseStrategy):
 
             val = stats_dict[filter_key] if filter_key in stats_dict else None
 
-            if not val or isinstance(val, Image):
+            if isinstance(val, np.ndarray) or not val:
                 if key == MIN_RARITY:
                     # Trivial case
                     if filters[key] <= 3:
@@ -123,14 +127,14 @@ class LightConeStrategy(BaseParseStrategy):
 
         return (filter_results, stats_dict)
 
-    def extract_stats_data(self, key: str, data: str | Image) -> str | Image:
+    def extract_stats_data(self, key: str, data: str | np.ndarray) -> str | np.ndarray:
         """Extracts the stats data from the image
 
         :param key: The key
         :param data: The data
         :return: The extracted data, or the image if the key is not recognized
         """
-        if not isinstance(data, Image):
+        if not isinstance(data, np.ndarray):
             return data
 
         if key == LC_NAME:
@@ -139,16 +143,29 @@ class LightConeStrategy(BaseParseStrategy):
                     data,
                     "ABCDEFGHIJKLMNOPQRSTUVWXYZ \\'abcedfghijklmnopqrstuvwxyz-",
                     6,
+                    vocabulary=OcrVocabulary.LIGHT_CONE_NAME,
                 )
             )
             return name
         elif key == LC_LEVEL:
-            return image_to_string(
-                data, "0123456789S/", 7, True, preprocess_lc_level_img
+            return numeric_image_to_string(
+                data,
+                "0123456789S/",
+                7,
+                "lc_level",
+                r"\d{1,2}/\d{2}",
+                True,
+                preprocess_lc_level_img,
             ).replace("S", "5")
         elif key == LC_SUPERIMPOSITION:
-            return image_to_string(
-                data, "12345S", 10, True, preprocess_superimposition_img
+            return numeric_image_to_string(
+                data,
+                "12345S",
+                10,
+                "superimposition",
+                r"[1-5]",
+                True,
+                preprocess_superimposition_img,
             ).replace("S", "5")
         elif key == EQUIPPED:
             return image_to_string(data, "Equipped", 7, True, preprocess_equipped_img)
@@ -217,12 +234,14 @@ class LightConeStrategy(BaseParseStrategy):
                 )
                 superimposition = 1
 
-            min_dim = min(lock.size)
+            min_dim = min(lock.shape[:2])
             try:
                 locked = self._lock_icon.resize((min_dim, min_dim))
 
                 # Check if locked by image matching
-                lock = locate(locked, lock, confidence=0.1) is not None
+                lock = (
+                    locate(locked, PILImage.fromarray(lock), confidence=0.1) is not None
+                )
             except ImageNotFoundException:
                 lock = False
             except Exception:  # https://github.com/kel-z/HSR-Scanner/issues/41
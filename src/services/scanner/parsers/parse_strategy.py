@@ -1,14 +1,15 @@
 from abc import ABC, abstractmethod
 from asyncio import Event
 
+import numpy as np
 from PIL import Image as PILImage
-from PIL.Image import Image
 from PyQt6.QtCore import pyqtBoundSignal
 
 from enums.increment_type import IncrementType
-from models.const import LOCK_ICON_PATH
+from models.const import FILTER_MAX, FILTER_MIN, LEVEL, LOCK_ICON_PATH, RARITY
 from models.game_data import GameData
 from utils.data import resource_path
+from utils.grid_reader import GridCell
 
 
 class BaseParseStrategy(ABC):
@@ -16,6 +17,7 @@ class BaseParseStrategy(ABC):
 
     SCAN_TYPE: IncrementType
     NAV_DATA: dict
+    FILTERS_KEY: str
 
     def __init__(
         self,
@@ -64,8 +66,40 @@ class BaseParseStrategy(ABC):
         """
         pass
 
+    def check_grid_filters(self, cell: GridCell, filters: dict) -> dict | None:
+        """Check if an item passes the filters from what the inventory grid shows
+
+        :param cell: The item as shown in the grid
+        :param filters: The filters
+        :return: The filter results, or None if the grid does not show everything the filters need
+        """
+        filter_results = {}
+        for key, threshold in filters[self.FILTERS_KEY].items():
+            filter_type, filter_key = key.split("_")
+
+            if filter_key == RARITY:
+                val = cell.rarity
+            elif filter_key == LEVEL:
+                val = cell.level
+            else:
+                return None
+
+            if val is None:
+                # Trivial case
+                if filter_type == FILTER_MIN and threshold <= 0:
+                    filter_results[key] = True
+                    continue
+                return None
+
+            if filter_type == FILTER_MIN:
+                filter_results[key] = val >= threshold
+            elif filter_type == FILTER_MAX:
+                filter_results[key] = val <= threshold
+
+        return filter_results
+
     @abstractmethod
-    def extract_stats_data(self, key: str, data: str | Image) -> str | Image:
+    def extract_stats_data(self, key: str, data: str | np.ndarray) -> str | np.ndarray:
         """Extract the stats data from the string
 
         :param key: The key
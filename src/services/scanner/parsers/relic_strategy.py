@@ -1,11 +1,19 @@
+from concurrent.futures import Future
+
 import numpy as np
 from PIL import Image as PILImage
-from PIL.Image import Image
 from pyautogui import locate, ImageNotFoundException
 
-from config.const import EQUIPPED, EQUIPPED_AVATAR, EQUIPPED_AVATAR_OFFSET, LOCK
+from config.const import (
+    EQUIPPED,
+    EQUIPPED_AVATAR,
+    EQUIPPED_AVATAR_OFFSET,
+    LOCK,
+    RELIC_ICON,
+)
 from config.relic_scan import RELIC_NAV_DATA
 from enums.increment_type import IncrementType
+from enums.ocr_vocabulary import OcrVocabulary
 from enums.log_level import LogLevel
 from models.const import (
     FILTER_MAX,
@@ -23,6 +31,7 @@ from models.const import (
     RELIC_SET_ID,
     RELIC_SLOT,
     RELIC_SUBSTAT_NAME,
+    RELIC_SUBSTAT_ROLLS,
     RELIC_SUBSTAT_VALUE,
     RELIC_SUBSTAT_VALUES,
     RELIC_SUBSTATS,
@@ -30,16 +39,51 @@ from models.const import (
     SORT_LV,
     SORT_RARITY,
 )
-from models.substat_vals import SUBSTAT_ROLL_VALS
 from services.scanner.parsers.parse_strategy import BaseParseStrategy
 from type_defs.stats_dict import RelicDict
 from utils.data import filter_images_from_dict, resource_path
 from utils.ocr import (
+    MIN_CONFIDENCE,
+    BatchField,
+    batch_image_to_data,
+    crop_rows,
     image_to_string,
+    learn_digits,
+    numeric_image_to_string,
     preprocess_equipped_img,
+    preprocess_img,
     preprocess_main_stat_img,
     preprocess_sub_stat_img,
+    read_digits,
+    segment_rows,
+    submit_rows_to_strings,
 )
+from utils.relic_icons import get_relic_icon_index
+from utils.substat_rolls import SUBSTAT_ROLLS, resolve_roll_counts
+
+NAME_WHITELIST = "ABCDEFGHIJKLMNOPQRSTUVWXYZ \\'abcedfghijklmnopqrstuvwxyz-"
+LEVEL_WHITELIST = "0123456789S"
+# glyph set and pattern for reading the level by template matching
+LEVEL_DIGITS = ("relic_level", r"\d{1,2}")
+MAINSTAT_WHITELIST = "ABCDEFGHIJKLMNOPQRSTUVWXYZ abcedfghijklmnopqrstuvwxyz"
+EQUIPPED_WHITELIST = "Equiped"
+SUBSTAT_NAMES_WHITELIST = " ABCDEFGHIKMPRSTacefikrt"
+SUBSTAT_VALUES_WHITELIST = "0123456789S.%,"
+
+# furthest the name read off the panel can be from the piece shown by the icon,
+# beyond its distance to the closest name, for the icon to decide between them
+ICON_NAME_MARGIN = 4
+
+# furthest a substat value can be from a legal roll value, relative to it, to snap to it
+SUBSTAT_SNAP_TOLERANCE = 0.1
+
+# text fields recognized together in one OCR pass: (whitelist, preprocess, multiline)
+BATCH_FIELDS = {
+    RELIC_NAME: (NAME_WHITELIST, None, False),
+    RELIC_LEVEL: (LEVEL_WHITELIST, preprocess_img, False),
+    RELIC_MAINSTAT: (MAINSTAT_WHITELIST, preprocess_main_stat_img, False),
+    EQUIPPED: (EQUIPPED_WHITELIST, preprocess_equipped_img, False),
+}
 
 
 class RelicStrategy(BaseParseStrategy):
@@ -47,6 +91,7 @@ class RelicStrategy(BaseParseStrategy):
 
     SCAN_TYPE = IncrementType.RELIC_ADD
     NAV_DATA = RELIC_NAV_DATA
+    FILTERS_KEY = RELIC_FILTERS
 
     def __init__(self, *args, **kwargs) -> None:
         """Constructor"""
@@ -83,7 +128,7 @@ class RelicStrategy(BaseParseStrategy):
 
             val = stats_dict[filter_key] if filter_key in stats_dict else None
 
-            if not val or isinstance(val, Image):
+            if isinstance(val, np.ndarray) or not val:
                 if key == MIN_RARITY:
                     # Trivial case
                     if filters[key] <= 2:
@@ -100,7 +145,7 @@ class RelicStrategy(BaseParseStrategy):
                     level = self.extract_stats_data(
                         RELIC_LEVEL, stats_dict[RELIC_LEVEL]
                     )
-                    if not level or isinstance(level, Image):
+                    if isinstance(level, np.ndarray) or not level:
                         self._log(
                             f"Relic UID {uid}: Failed to parse level. Setting to 0.",
                             LogLevel.ERROR,
@@ -121,61 +166,196 @@ class RelicStrategy(BaseParseStrategy):
         return (filter_results, stats_dict)
 
     def extract_stats_data(
-        self, key: str, data: str | int | Image
-    ) -> str | int | Image:
+        self, key: str, data: str | int | np.ndarray
+    ) -> str | int | np.ndarray:
         """Extracts the stats data from the image
 
         :param key: The key
         :param data: The data
         :return: The extracted data, or the image if the key is not relevant
         """
-        if not isinstance(data, Image):
+        if not isinstance(data, np.ndarray):
             return data
 
         if key == RELIC_NAME:
             return image_to_string(
-                data, "ABCDEFGHIJKLMNOPQRSTUVWXYZ \\'abcedfghijklmnopqrstuvwxyz-", 6
+                data, NAME_WHITELIST, 6, vocabulary=OcrVocabulary.RELIC_NAME
             )
         elif key == RELIC_LEVEL:
-            return image_to_string(data, "0123456789S", 7, True).replace("S", "5")
+            return self._clean_text(
+                key,
+                numeric_image_to_string(
+                    data, LEVEL_WHITELIST, 7, *LEVEL_DIGITS, True, preprocess_img, "+"
+                ),
+            )
         elif key == RELIC_MAINSTAT:
             return image_to_string(
                 data,
-                "ABCDEFGHIJKLMNOPQRSTUVWXYZ abcedfghijklmnopqrstuvwxyz",
+                MAINSTAT_WHITELIST,
                 7,
                 True,
                 preprocess_main_stat_img,
+                vocabulary=OcrVocabulary.MAIN_STAT,
             )
         elif key == EQUIPPED:
-            return image_to_string(data, "Equiped", 7, True, preprocess_equipped_img)
+            return image_to_string(
+                data, EQUIPPED_WHITELIST, 7, True, preprocess_equipped_img
+            )
         elif key == RELIC_RARITY:
             # Get rarity by color matching
-            rarity_sample = np.array(data)
-            rarity_sample = rarity_sample[int(rarity_sample.shape[0] / 2)][
-                int(rarity_sample.shape[1] / 2)
-            ]
+            rarity_sample = data[int(data.shape[0] / 2)][int(data.shape[1] / 2)]
             return self._game_data.get_closest_rarity(rarity_sample)
         elif key == RELIC_SUBSTAT_NAMES:
             return image_to_string(
                 data,
-                " ABCDEFGHIKMPRSTacefikrt",
+                SUBSTAT_NAMES_WHITELIST,
                 6,
                 True,
                 preprocess_sub_stat_img,
                 False,
+                OcrVocabulary.SUB_STAT,
             )
         elif key == RELIC_SUBSTAT_VALUES:
-            return (
+            return self._clean_text(
+                key,
                 image_to_string(
-                    data, "0123456789S.%,", 6, True, preprocess_sub_stat_img, False
-                )
-                .replace("S", "5")
-                .replace(",", ".")
-                .replace("..", ".")
+                    data,
+                    SUBSTAT_VALUES_WHITELIST,
+                    6,
+                    True,
+                    preprocess_sub_stat_img,
+                    False,
+                ),
             )
         else:
             return data
 
+    def _batch_extract_stats_data(self, stats_dict: RelicDict) -> None:
+        """Extracts the text fields that are still images with a single OCR pass
+
+        Fields that come back empty are left as images so that extract_stats_data
+        can retry them one at a time. The equipped label is the exception, since
+        an empty result there just means the relic is not equipped.
+
+        :param stats_dict: The stats dict
+        """
+        level_img = stats_dict[RELIC_LEVEL]
+        if isinstance(level_img, np.ndarray):
+            level = read_digits(level_img, *LEVEL_DIGITS, preprocess_img, "+")
+            if level is not None:
+                stats_dict[RELIC_LEVEL] = level
+
+        fields = {
+            key: BatchField(stats_dict[key], *args)
+            for key, args in BATCH_FIELDS.items()
+            if isinstance(stats_dict[key], np.ndarray)
+        }
+        if len(fields) < 2:
+            return
+
+        results = batch_image_to_data(fields, vocabulary=OcrVocabulary.RELIC_STATS)
+        for key, res in results.items():
+            if res.text or key == EQUIPPED:
+                stats_dict[key] = self._clean_text(key, res.text)
+
+        # the cleaned text is not what Tesseract read, so only the raw text is learned
+        level = results.get(RELIC_LEVEL)
+        if level and level.confidence >= MIN_CONFIDENCE:
+            learn_digits(
+                fields[RELIC_LEVEL].img,
+                level.text,
+                *LEVEL_DIGITS,
+                preprocess_img,
+                "+",
+            )
+
+    def _submit_substat_rows(self, stats_dict: RelicDict) -> dict[str, Future]:
+        """Starts recognizing the substat names and values row by row
+
+        The rows are found once for both columns, so each name stays paired with
+        the value on its row even if either one is misread or missing. The rows of
+        each column are recognized together in a single OCR pass.
+
+        :param stats_dict: The stats dict
+        :return: The futures holding the text of each row, keyed by field
+        """
+        names_img = stats_dict[RELIC_SUBSTAT_NAMES]
+        vals_img = stats_dict[RELIC_SUBSTAT_VALUES]
+        if not isinstance(names_img, np.ndarray) or not isinstance(
+            vals_img, np.ndarray
+        ):
+            return {}
+
+        names_img = preprocess_sub_stat_img(names_img)
+        vals_img = preprocess_sub_stat_img(vals_img)
+        rows = segment_rows([names_img, vals_img])
+
+        return {
+            RELIC_SUBSTAT_NAMES: submit_rows_to_strings(
+                crop_rows(names_img, rows),
+                SUBSTAT_NAMES_WHITELIST,
+                OcrVocabulary.SUB_STAT,
+            ),
+            RELIC_SUBSTAT_VALUES: submit_rows_to_strings(
+                crop_rows(vals_img, rows), SUBSTAT_VALUES_WHITELIST
+            ),
+        }
+
+    def _resolve_name(self, text: str, icon: np.ndarray | None, uid: int) -> str:
+        """Resolves the relic name from the OCR text, using the artwork to break close calls
+
+        Only used when the artwork alone was not a confident match. The OCR text
+        decides on its own when it reads a name exactly or the artwork is not
+        recognized. Otherwise the piece shown by the artwork is only taken if
+        the text is nearly as close to it as to the closest name, and any
+        disagreement is logged.
+
+        :param text: The OCR text of the name
+        :param icon: The RGB crop of the artwork, if any
+        :param uid: The relic UID
+        :return: The relic name
+        """
+        name, name_dist = self._game_data.get_closest_relic_name(text)
+        if not isinstance(icon, np.ndarray):
+            return name
+
+        index = get_relic_icon_index(self._game_data.version)
+        if name_dist == 0:
+            index.learn(icon, name)
+            return name
+
+        icon_name = index.lookup(icon)
+        if icon_name is None or icon_name == name:
+            return name
+
+        icon_dist = self._game_data.get_relic_name_distance(text, icon_name)
+        if icon_dist <= name_dist + ICON_NAME_MARGIN:
+            self._log(
+                f'Relic UID {uid}: Read "{text}", closest to "{name}". Using "{icon_name}" from the artwork.',
+                LogLevel.DEBUG,
+            )
+            return icon_name
+
+        self._log(
+            f'Relic UID {uid}: Read "{text}" as "{name}", but the artwork looks like "{icon_name}".',
+            LogLevel.WARNING,
+        )
+        return name
+
+    def _clean_text(self, key: str, text: str) -> str:
+        """Fixes common OCR errors in the text of a field
+
+        :param key: The key
+        :param text: The OCR text
+        :return: The cleaned text
+        """
+        if key == RELIC_LEVEL:
+            return text.replace("S", "5")
+        elif key == RELIC_SUBSTAT_VALUES:
+            return text.replace("S", "5").replace(",", ".").replace("..", ".")
+        else:
+            return text
+
     def parse(self, stats_dict: RelicDict, uid: int) -> dict:
         """Parses the relic data
 
@@ -187,6 +367,21 @@ class RelicStrategy(BaseParseStrategy):
             return {}
 
         try:
+            # a piece the artwork clearly shows needs no name OCR
+            icon = stats_dict.get(RELIC_ICON)
+            icon_name = None
+            if isinstance(icon, np.ndarray):
+                icon_name = get_relic_icon_index(self._game_data.version).lookup(
+                    icon, confident=True
+                )
+                if icon_name:
+                    stats_dict[RELIC_NAME] = icon_name
+            substat_rows = self._submit_substat_rows(stats_dict)
+            self._batch_extract_stats_data(stats_dict)
+            for key, future in substat_rows.items():
+                stats_dict[key] = [
+                    self._clean_text(key, text) for text in future.result()
+                ]
             for key in stats_dict:
                 stats_dict[key] = self.extract_stats_data(key, stats_dict[key])
 
@@ -210,9 +405,10 @@ class RelicStrategy(BaseParseStrategy):
             substat_vals = stats_dict[RELIC_SUBSTAT_VALUES]
 
             # Fix OCR errors
-            name, _ = self._game_data.get_closest_relic_name(name)  # type: ignore
+            if not icon_name:
+                name = self._resolve_name(name, icon, uid)  # type: ignore
             main_stat_key, _ = self._game_data.get_closest_relic_main_stat(main_stat_key)  # type: ignore
-            if not level or isinstance(level, Image):
+            if isinstance(level, np.ndarray) or not level:
                 self._log(
                     f"Relic UID {uid}: Failed to extract level. Setting to 0.",
                     LogLevel.ERROR,
@@ -227,14 +423,12 @@ class RelicStrategy(BaseParseStrategy):
                 name = "Musketeer's Wild Wheat Felt Hat"
 
             # Substats
-            while "\n\n" in substat_names:  # type: ignore
-                substat_names = substat_names.replace("\n\n", "\n")  # type: ignore
-            while "\n\n" in substat_vals:  # type: ignore
-                substat_vals = substat_vals.replace("\n\n", "\n")  # type: ignore
-            substat_names = substat_names.split("\n")  # type: ignore
-            substat_vals = substat_vals.split("\n")  # type: ignore
-
-            substats_res = self._parse_substats(substat_names, substat_vals, uid)
+            if isinstance(substat_names, str):
+                substat_names = [n for n in substat_names.split("\n") if n]
+            if isinstance(substat_vals, str):
+                substat_vals = [v for v in substat_vals.split("\n") if v]
+
+            substats_res = self._parse_substats(substat_names, substat_vals, rarity, uid)  # type: ignore
             self._validate_substats(substats_res, rarity, level, uid)  # type: ignore
             self._sort_substats(substats_res, uid)
 
@@ -255,10 +449,13 @@ class RelicStrategy(BaseParseStrategy):
                 main_stat_key = "ATK"
 
             # Check if locked/discarded by image matching
-            min_dim = min(lock.size)
+            min_dim = min(lock.shape[:2])
             try:
                 lock_img = self._lock_icon.resize((min_dim, min_dim))
-                lock = locate(lock_img, lock, confidence=0.3) is not None
+                lock = (
+                    locate(lock_img, PILImage.fromarray(lock), confidence=0.3)
+                    is not None
+                )
             except ImageNotFoundException:
                 lock = False
             except Exception:  # https://github.com/kel-z/HSR-Scanner/issues/41
@@ -267,10 +464,13 @@ class RelicStrategy(BaseParseStrategy):
                     LogLevel.ERROR,
                 )
                 lock = False
-            min_dim = min(discard.size)
+            min_dim = min(discard.shape[:2])
             try:
                 discard_img = self._discard_icon.resize((min_dim, min_dim))
-                discard = locate(discard_img, discard, confidence=0.3) is not None
+                discard = (
+                    locate(discard_img, PILImage.fromarray(discard), confidence=0.3)
+                    is not None
+                )
             except ImageNotFoundException:
                 discard = False
             except Exception:
@@ -326,12 +526,13 @@ class RelicStrategy(BaseParseStrategy):
             return {}
 
     def _parse_substats(
-        self, names: list[str], vals: list[str], uid: int
+        self, names: list[str], vals: list[str], rarity: int, uid: int
     ) -> list[dict[str, int | float]]:
         """Parses the substats
 
-        :param names: The substat names
-        :param vals: The substat values
+        :param names: The substat names, one per row
+        :param vals: The substat values, one per row
+        :param rarity: The rarity of the relic
         :param uid: The relic UID
         :return: The parsed substats
         """
@@ -344,7 +545,7 @@ class RelicStrategy(BaseParseStrategy):
         for i in range(len(names)):
             name = names[i]
             if not name:
-                break
+                continue
 
             name, dist = self._game_data.get_closest_relic_sub_stat(name)
             if dist > 3:
@@ -354,32 +555,85 @@ class RelicStrategy(BaseParseStrategy):
                 )
                 break
 
-            if i >= len(vals):
+            if i >= len(vals) or not vals[i]:
                 self._log(
                     f"Relic UID {uid}: Failed to get value for substat: {name}.",
                     LogLevel.ERROR,
                 )
-                break
-            val = vals[i]
+                continue
 
-            try:
-                if "%" in val:
-                    val = float(val[: val.index("%")])
-                    name += "_"
-                else:
-                    val = int(val)
-            except ValueError:
+            substat = self._snap_substat(name, vals[i], rarity)
+            if substat is None:
                 if dist == 0:
                     self._log(
-                        f"Relic UID {uid}: Failed to get value for substat: {name}. Error parsing substat value: {val}.",
+                        f"Relic UID {uid}: Failed to get value for substat: {name}. Error parsing substat value: {vals[i]}.",
                         LogLevel.ERROR,
                     )
                 continue
 
-            substats.append({"key": name, "value": val})
+            if str(substat[RELIC_SUBSTAT_VALUE]) != vals[i].rstrip("%"):
+                self._log(
+                    f'Relic UID {uid}: Read "{vals[i]}" for substat {substat[RELIC_SUBSTAT_NAME]}, snapped to {substat[RELIC_SUBSTAT_VALUE]}.',
+                    LogLevel.DEBUG,
+                )
+            substats.append(substat)
 
         return substats
 
+    def _snap_substat(
+        self, name: str, text: str, rarity: int
+    ) -> dict[str, int | float] | None:
+        """Parses a substat value, snapping it to the nearest legal roll value
+
+        A value with a decimal point, or of a stat that only exists as a
+        percentage, is taken as a percentage even if the "%" was not read. A
+        percentage whose decimal point was not read is compared against the legal
+        values both as read and with the point put back.
+
+        :param name: The substat name
+        :param text: The substat value as read
+        :param rarity: The rarity of the relic
+        :return: The substat, or None if the value is not a number
+        """
+        number = text.split("%")[0].strip()
+        has_percent = SUBSTAT_ROLLS.has_stat(rarity, name + "_")
+        is_percent = "%" in text or (
+            has_percent and ("." in number or not SUBSTAT_ROLLS.has_stat(rarity, name))
+        )
+        key = name + "_" if is_percent else name
+
+        readings = [number]
+        if is_percent and "." not in number and len(number) >= 2:
+            readings.append(number[:-1] + "." + number[-1])
+
+        values = []
+        for reading in readings:
+            try:
+                values.append(float(reading))
+            except ValueError:
+                pass
+        if not values:
+            return None
+
+        value = values[0]
+        if SUBSTAT_ROLLS.has_stat(rarity, key):
+            best_error = None
+            for reading in values:
+                candidate = SUBSTAT_ROLLS.nearest(rarity, key, reading)
+                error = abs(reading - candidate) / candidate  # type: ignore
+                if error > SUBSTAT_SNAP_TOLERANCE:
+                    continue
+                if best_error is None or error < best_error:
+                    best_error = error
+                    value = candidate
+
+        if not is_percent:
+            if value != int(value):
+                return None
+            value = int(value)
+
+        return {RELIC_SUBSTAT_NAME: key, RELIC_SUBSTAT_VALUE: value}
+
     def _validate_substat(self, substat: dict[str, int | float], rarity: int) -> bool:
         """Validates the substat
 
@@ -390,14 +644,10 @@ class RelicStrategy(BaseParseStrategy):
         try:
             name = substat[RELIC_SUBSTAT_NAME]
             val = substat[RELIC_SUBSTAT_VALUE]
-            if name not in SUBSTAT_ROLL_VALS[str(rarity)]:
-                return False
-            if str(val) not in SUBSTAT_ROLL_VALS[str(rarity)][name]:
-                return False
         except KeyError:
             return False
 
-        return True
+        return SUBSTAT_ROLLS.index(rarity, str(name), val) is not None
 
     def _validate_substats(
         self,
@@ -408,6 +658,9 @@ class RelicStrategy(BaseParseStrategy):
     ) -> None:
         """Rudimentary substat validation on number of substats based on rarity and level
 
+        If the substats are valid and their values leave only one way to share
+        out the relic's rolls between them, each substat is given its roll count.
+
         :param substats: The substats
         :param rarity: The rarity of the relic
         :param level: The level of the relic
@@ -443,13 +696,10 @@ class RelicStrategy(BaseParseStrategy):
                 )
                 return
 
-            roll_value = SUBSTAT_ROLL_VALS[str(rarity)][
-                str(substat[RELIC_SUBSTAT_NAME])
-            ][str(substat[RELIC_SUBSTAT_VALUE])]
-            if isinstance(roll_value, list):
-                # assume minimum
-                roll_value = roll_value[0]
-            total += roll_value
+            # assume minimum
+            total += SUBSTAT_ROLLS.roll_values(
+                rarity, str(substat[RELIC_SUBSTAT_NAME]), substat[RELIC_SUBSTAT_VALUE]
+            )[0]
 
         total = round(total, 1)
         if total < min_roll_value:
@@ -457,15 +707,44 @@ class RelicStrategy(BaseParseStrategy):
                 f"Relic UID {uid} has a roll value of {total}, but the minimum for rarity {rarity} and level {level} is {min_roll_value}.",
                 LogLevel.ERROR,
             )
+            return
         elif total > max_roll_value:
             self._log(
                 f"Relic UID {uid} has a roll value of {total}, but the maximum for rarity {rarity} and level {level} is {max_roll_value}.",
                 LogLevel.ERROR,
             )
+            return
+
+        # every upgrade adds one roll, and adds a new substat until there are four
+        if substats_len < 4:
+            total_rolls = {substats_len}
+        else:
+            total_rolls = {rarity - 2 + int(level / 3), rarity - 1 + int(level / 3)}
+        roll_counts = resolve_roll_counts(
+            [
+                SUBSTAT_ROLLS.roll_counts(
+                    rarity,
+                    str(substat[RELIC_SUBSTAT_NAME]),
+                    substat[RELIC_SUBSTAT_VALUE],
+                )
+                for substat in substats
+            ],
+            total_rolls,
+        )
+        if roll_counts is None:
+            self._log(
+                f"Relic UID {uid}: Could not determine the roll count of each substat.",
+                LogLevel.DEBUG,
+            )
+            return
+        for substat, rolls in zip(substats, roll_counts):
+            substat[RELIC_SUBSTAT_ROLLS] = rolls
 
     def _sort_substats(self, substats: list[dict[str, int | float]], uid: int) -> None:
         """Sorts the substats
 
+        Substats with an unknown key are kept after the known ones.
+
         :param substats: The substats
         :param uid: The relic UID
         """
@@ -484,7 +763,13 @@ class RelicStrategy(BaseParseStrategy):
             "Break Effect_",
         ]
         original = substats.copy()
-        substats.sort(key=lambda x: SORT_ORDER.index(str(x[RELIC_SUBSTAT_NAME])))
+        substats.sort(
+            key=lambda x: (
+                SORT_ORDER.index(str(x[RELIC_SUBSTAT_NAME]))
+                if x[RELIC_SUBSTAT_NAME] in SORT_ORDER
+                else len(SORT_ORDER)
+            )
+        )
         if original != substats:
             self._log(
                 f"Relic UID {uid}: Newly upgraded relic detected. Substats have been sorted.",
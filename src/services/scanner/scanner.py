@@ -1,6 +1,9 @@
 import asyncio
 import time
+from concurrent.futures import Future
+from typing import Callable
 
+import numpy as np
 import pyautogui
 import win32gui
 from PIL import Image as PILImage
@@ -12,15 +15,21 @@ from config.const import (
     ASCENSION_OFFSET_X,
     ASCENSION_START,
     ASPECT_16_9,
+    CHARACTER,
     DETAILS_BUTTON,
     EIDOLONS_BUTTON,
+    GRID,
     INV_TAB,
     SORT_BUTTON,
+    STATS,
     TRACES,
     TRACES_BUTTON,
 )
+from config.screenshot import SCREENSHOT_COORDS
 from enums.increment_type import IncrementType
 from enums.log_level import LogLevel
+from enums.ocr_vocabulary import OcrVocabulary
+from enums.parse_backend import ParseBackend
 from enums.scan_mode import ScanMode
 from models.const import (
     CHAR_FILTERS,
@@ -34,6 +43,9 @@ from models.const import (
     CONFIG_INCLUDE_UID,
     CONFIG_INVENTORY_KEY,
     CONFIG_NAV_DELAY,
+    CONFIG_PARSE_BACKEND,
+    CONFIG_PARSE_WORKERS,
+    CONFIG_READ_GRID,
     CONFIG_RECENT_RELICS_NUM,
     CONFIG_SCAN_CHARACTERS,
     CONFIG_SCAN_DELAY,
@@ -43,10 +55,12 @@ from models.const import (
     FILTERS,
     HSR_SCANNER,
     KEL_Z,
+    LC_FILTERS,
     LEVEL,
     MIN_LEVEL,
     MIN_RARITY,
     RARITY,
+    RELIC_FILTERS,
     SORT_DATE,
     SORT_LV,
     SORT_RARITY,
@@ -56,17 +70,47 @@ from models.const import (
 from models.game_data import GameData
 from services.scanner.parsers.parse_strategy import BaseParseStrategy
 from utils.data import resource_path
+from utils.grid_reader import GridCell, GridReader
 from utils.navigation import Navigation
-from utils.ocr import image_to_string, preprocess_char_count_img, preprocess_uid_img
+from utils.ocr import (
+    get_ocr_cache_stats,
+    OcrAttempt,
+    confident_image_to_string,
+    image_to_string,
+    numeric_image_to_string,
+    preprocess_char_count_img,
+    preprocess_img,
+    preprocess_uid_img,
+    read_numeric,
+    set_ocr_vocabularies,
+    warm_up_ocr,
+)
+from utils.ocr_engine import tesserocr_installed
+from utils.relic_icons import get_relic_icon_index
 from utils.screenshot import Screenshot
+from utils.settle import FINGERPRINT_SIZE, is_duplicate, wait_for_settle
+from utils.watermark import HEAD_SIZE, Watermark, WatermarkStore, is_same_item
 from utils.window import bring_window_to_foreground
 
+from .parse_pipeline import ParsePipeline
 from .parsers.character_parser import CharacterParser
 from .parsers.light_cone_strategy import LightConeStrategy
 from .parsers.relic_strategy import RelicStrategy
 
 SUPPORTED_ASPECT_RATIOS = [ASPECT_16_9]
 
+# region watched for screen transitions
+WINDOW = (0, 0, 1, 1)
+
+# times an input the game did not respond to is repeated
+MAX_INPUT_RETRIES = 3
+
+# seconds to watch for a late response before repeating an input, doubled on each retry
+INPUT_RETRY_DELAY = 0.1
+
+# consecutive grid reads that find no selected item before the grid is no longer read
+MAX_GRID_FAILURES = 3
+
 
 class InterruptedScanException(Exception):
     """Exception raised when the scan is interrupted"""
@@ -130,10 +174,38 @@ class HSRScanner(QObject):
         self._databank_img = PILImage.open(resource_path("assets/images/databank.png"))
 
         self._interrupt_event = asyncio.Event()
+        self._pipeline = None
+
+        # watermarks to save once the items scanned after them are parsed
+        self._watermarks = (
+            WatermarkStore() if scan_mode == ScanMode.INCREMENTAL.value else None
+        )
+        self._pending_watermarks = {}
 
     async def start_scan(self) -> dict:
         """Starts the scan
 
+        :raises InterruptedScanException: Thrown if the scan is interrupted
+        :return: The scan results
+        """
+        set_ocr_vocabularies(self._game_data.write_ocr_vocabularies())
+        self._pipeline = ParsePipeline(
+            self._game_data,
+            self.log_signal,
+            self.update_signal,
+            ParseBackend(self._config[CONFIG_PARSE_BACKEND]),
+            self._config[CONFIG_PARSE_WORKERS],
+            self._config[CONFIG_DEBUG],
+        )
+        try:
+            return await self._scan()
+        finally:
+            self._pipeline.shutdown(wait=not self._interrupt_event.is_set())
+            get_relic_icon_index(self._game_data.version).save()
+
+    async def _scan(self) -> dict:
+        """Scans the selected categories, parsing items as they are captured
+
         :raises InterruptedScanException: Thrown if the scan is interrupted
         :return: The scan results
         """
@@ -145,18 +217,26 @@ class HSRScanner(QObject):
                 LogLevel.WARNING,
             )
         bring_window_to_foreground(self._hwnd)
+        if not tesserocr_installed:
+            self._log(
+                "tesserocr is not installed. Falling back to launching Tesseract for every field, which is much slower.",
+                LogLevel.WARNING,
+            )
+        warm_up_ocr()
 
         uid = None
         if self._config[CONFIG_INCLUDE_UID] and not self._interrupt_event.is_set():
             self._nav_sleep(1)
             uid_img = self._screenshot.screenshot_uid()
-            uid = image_to_string(uid_img, "0123456789", 7, False, preprocess_uid_img)[
-                :9
-            ]
-            if len(uid) != 9:
-                uid = image_to_string(
-                    uid_img, "0123456789", 7, True, preprocess_uid_img
-                )[:9]
+            uid = read_numeric(
+                uid_img,
+                "0123456789",
+                "uid",
+                r"\d{9}",
+                [OcrAttempt(7), OcrAttempt(7, preprocess_uid_img)],
+                preprocess_uid_img,
+                parallel=True,
+            )[:9]
             if len(uid) != 9:
                 self._log(f"Failed to parse UID. Got '{uid}' instead.", LogLevel.ERROR)
                 uid = None
@@ -210,12 +290,30 @@ class HSRScanner(QObject):
             )
 
         if self._interrupt_event.is_set():
-            await asyncio.gather(*light_cones, *relics, *characters)
+            await self._gather(light_cones + relics + characters)
             return {}
 
         self.complete_signal.emit()
         self._log("Starting OCR process. Please wait...")
 
+        light_cones = self._merge(LC_FILTERS, await self._gather(light_cones))
+        relics = self._merge(RELIC_FILTERS, await self._gather(relics))
+        characters = [x for x in await self._gather(characters) if x]
+
+        cache_stats = get_ocr_cache_stats()
+        lookups = cache_stats["hits"] + cache_stats["misses"]
+        self._log(
+            f"OCR cache: {cache_stats['hits']}/{lookups} hits, "
+            f"{cache_stats['entries']} distinct crops.",
+            LogLevel.DEBUG,
+        )
+        for key, stats in self._game_data.get_fuzzy_match_stats().items():
+            self._log(
+                f"Fuzzy {key} matches: {stats['hit_rate']:.0%} cached, "
+                f"{stats['mean_ms']:.3f} ms per lookup.",
+                LogLevel.DEBUG,
+            )
+
         return {
             "source": "HSR-Scanner",
             "build": "v1.4.1",
@@ -228,31 +326,35 @@ class HSRScanner(QObject):
                     else "Caelus"
                 ),
             },
-            "light_cones": [x for x in await asyncio.gather(*light_cones) if x],
-            "relics": [x for x in await asyncio.gather(*relics) if x],
-            "characters": [x for x in await asyncio.gather(*characters) if x],
+            "light_cones": light_cones,
+            "relics": relics,
+            "characters": characters,
         }
 
     def stop_scan(self) -> None:
         """Stops the scan"""
         self._interrupt_event.set()
 
-    def scan_inventory(self, strategy: BaseParseStrategy) -> set[asyncio.Task]:
+    def scan_inventory(self, strategy: BaseParseStrategy) -> list[Future]:
         """Scans the inventory for light cones or relics
 
+        Items are parsed in the background while the scan moves on to the next one.
+
         :param strategy: The strategy to use
         :raises InterruptedScanException: Thrown if the scan is interrupted
         :raises ValueError: Thrown if the quantity could not be parsed
-        :return: The tasks to await
+        :return: The parse results to await, in scan order
         """
         nav_data = strategy.NAV_DATA[self._aspect_ratio]
 
         # Navigate to correct tab from cellphone menu
         self._nav_sleep(1)
+        before = self._screenshot.screenshot_signature()
         self._nav.key_tap(Key.esc)
-        self._nav_sleep(2)
+        self._nav_sleep(2, WINDOW, before)
+        before = self._screenshot.screenshot_signature()
         self._nav.key_tap(self._config[CONFIG_INVENTORY_KEY])
-        self._nav_sleep(1.5)
+        self._nav_sleep(1.5, WINDOW, before)
 
         # Get quantity
         max_retry = 5
@@ -260,8 +362,9 @@ class HSRScanner(QObject):
         while True:
             self._nav.move_cursor_to(*nav_data[INV_TAB])
             time.sleep(0.05)
+            before = self._screenshot.screenshot_signature()
             self._nav.click()
-            self._nav_sleep(1.5)
+            self._nav_sleep(1.5, WINDOW, before)
 
             # TODO: using quantity to know when to scan the bottom row is not ideal
             #       because it will not work for tabs that do not have a quantity
@@ -269,7 +372,14 @@ class HSRScanner(QObject):
             #
             #       for now, it will work for light cones and relics.
             quantity = self._screenshot.screenshot_quantity()
-            quantity = image_to_string(quantity, "0123456789/", 7)
+            quantity = read_numeric(
+                quantity,
+                "0123456789/",
+                "quantity",
+                r"\d+/\d+",
+                [OcrAttempt(7), OcrAttempt(7, preprocess_img)],
+                parallel=True,
+            )
 
             try:
                 self._log(f"Quantity: {quantity}.")
@@ -293,7 +403,7 @@ class HSRScanner(QObject):
             self._screenshot.screenshot_sort(), "RarityLvDate obtained", 7
         )
         optimal_sort_method = SORT_DATE
-        if self._scan_mode != ScanMode.RECENT_RELICS.value:
+        if self._scan_mode == ScanMode.NORMAL.value:
             optimal_sort_method = strategy.get_optimal_sort_method(
                 self._config[FILTERS]
             )
@@ -302,16 +412,46 @@ class HSRScanner(QObject):
             self._log(f"Sorting by {optimal_sort_method} (was {current_sort_method}).")
             self._nav.move_cursor_to(*nav_data[SORT_BUTTON])
             time.sleep(0.05)
+            before = self._screenshot.screenshot_signature()
             self._nav.click()
-            self._nav_sleep(0.5)
+            self._nav_sleep(0.5, WINDOW, before)
             self._nav.move_cursor_to(*nav_data[optimal_sort_method])
+            before = self._screenshot.screenshot_signature()
             self._nav.click()
             current_sort_method = optimal_sort_method
-            self._nav_sleep(0.5)
+            self._nav_sleep(0.5, WINDOW, before)
 
-        tasks = set()
+        stats_region = SCREENSHOT_COORDS[self._aspect_ratio][STATS]
+        tasks = []
         scanned = 0
 
+        # newest items first, stopping once the newest ones from the last scan are reached
+        incremental = self._scan_mode == ScanMode.INCREMENTAL.value
+        base = watermark = None
+        if incremental:
+            base = watermark = self._watermarks.get(strategy.FILTERS_KEY) or Watermark(
+                0, np.empty((0, *FINGERPRINT_SIZE[::-1]), np.int16), []
+            )
+        item_fingerprints = []
+        known_match = None
+
+        # items read off the grid ahead of the selection, keyed by item ID, so
+        # that the items the grid shows to fail the filters are never opened
+        grid_reader = None
+        if (
+            self._config[CONFIG_READ_GRID]
+            and self._scan_mode == ScanMode.NORMAL.value
+            and FILTERS in self._config
+        ):
+            grid_reader = GridReader(
+                SCREENSHOT_COORDS[self._aspect_ratio][GRID], self._game_data.COLOURS
+            )
+        grid_items = {}
+        grid_failures = 0
+        read_levels = FILTERS in self._config and (
+            self._config[FILTERS][strategy.FILTERS_KEY].get(MIN_LEVEL, 0) > 0
+        )
+
         def should_stop():
             if self._scan_mode == ScanMode.RECENT_RELICS.value:
                 return (
@@ -320,20 +460,129 @@ class HSRScanner(QObject):
                 )
             return quantity_remaining <= 0
 
+        prev_fingerprint = None
+        input_retry = 0
         while not should_stop():
-            quantity_remaining -= 1
+            item_id = quantity - quantity_remaining + 1
+
+            # Step past the items the grid shows to fail the filters without opening them
+            if grid_reader is not None and grid_failures < MAX_GRID_FAILURES:
+                if item_id not in grid_items:
+                    grid_items = self._read_grid(
+                        grid_reader, item_id, quantity, read_levels
+                    )
+                    grid_failures = 0 if grid_items else grid_failures + 1
+
+                skip = 0
+                while item_id + skip in grid_items and self._fails_on_grid(
+                    strategy, grid_items[item_id + skip][1], current_sort_method
+                ):
+                    skip += 1
+                if skip:
+                    self._log(
+                        f"Skipping items {item_id} to {item_id + skip - 1}, which the inventory grid shows to fail the filters.",
+                        LogLevel.TRACE,
+                    )
+                    if not self._skip_items(
+                        grid_reader, grid_items, item_id, skip, stats_region
+                    ):
+                        self._log(
+                            "The inventory grid does not show the expected item as selected. No longer reading the grid.",
+                            LogLevel.WARNING,
+                        )
+                        grid_items = {}
+                        grid_failures = MAX_GRID_FAILURES
+                    quantity_remaining -= skip
+                    prev_fingerprint = None
+                    continue
 
             # Get stats
-            stats_dict = self._screenshot.screenshot_stats(strategy.SCAN_TYPE)
-            item_id = quantity - quantity_remaining
+            stats_dict, item_fingerprint = self._screenshot.screenshot_stats(
+                strategy.SCAN_TYPE
+            )
+
+            # Same item as before, so the last input was dropped. Identical items
+            # look the same, so where the grid is read, an item only counts as the
+            # same one if the selection is not on the cell it should have moved to
+            if (
+                prev_fingerprint is not None
+                and is_duplicate(item_fingerprint, prev_fingerprint)
+                and not self._is_selected(grid_reader, grid_items, item_id)
+            ):
+                if input_retry < MAX_INPUT_RETRIES:
+                    input_retry += 1
+                    self._log(
+                        f"Item {item_id} did not change after the last input. Retrying input... ({input_retry}/{MAX_INPUT_RETRIES})",
+                        LogLevel.DEBUG,
+                    )
+                    self._retry_input(
+                        lambda: self._nav.key_tap("d"), stats_region, input_retry
+                    )
+                    continue
+                self._log(
+                    f"Item {item_id} did not change after {MAX_INPUT_RETRIES} retries. Scanning it again.",
+                    LogLevel.WARNING,
+                )
+            prev_fingerprint = item_fingerprint
+            input_retry = 0
+
+            quantity_remaining -= 1
+
+            # the newest items are kept even after falling back to a full scan,
+            # since they are the head the next scan is matched against
+            if watermark is not None or (
+                incremental and len(item_fingerprints) < HEAD_SIZE
+            ):
+                item_fingerprints.append(item_fingerprint)
+
+            if watermark is not None:
+                known_match = watermark.find_known(
+                    item_fingerprints, quantity_remaining <= 0
+                )
+                # With the same quantity, a new item would have taken the place
+                # of the newest known one, so an unchanged category is
+                # recognized from its first item alone
+                if (
+                    item_id == 1
+                    and quantity == watermark.quantity
+                    and len(watermark.fingerprints)
+                    and is_same_item(item_fingerprint, watermark.fingerprints[0])
+                ):
+                    known_match = (0, 0)
+                if known_match and self._is_consistent(
+                    watermark, quantity, *known_match
+                ):
+                    break
+                if known_match:
+                    watermark = None
 
             # Check if item satisfies filters
-            if FILTERS in self._config:
+            if FILTERS in self._config and not incremental:
                 filter_results, stats_dict = strategy.check_filters(
                     stats_dict,
                     self._config[FILTERS],
                     item_id,
                 )
+
+                # The grid is only used to skip items while it agrees with the stats panel
+                if item_id in grid_items:
+                    grid_results = strategy.check_grid_filters(
+                        grid_items[item_id][1], self._config[FILTERS]
+                    )
+                    if grid_results is not None and any(
+                        filter_results.get(key, passed) != passed
+                        for key, passed in grid_results.items()
+                    ):
+                        self._log(
+                            f"Item {item_id} does not match what the inventory grid shows. No longer reading the grid.",
+                            LogLevel.WARNING,
+                        )
+                        grid_items = {}
+                        grid_failures = MAX_GRID_FAILURES
+
+                # The scan ends at the first item below the filter the inventory is
+                # sorted by. Every item before it is opened anyway, so searching
+                # for that item ahead of the walk would not save any inputs
                 if (
                     current_sort_method == SORT_LV
                     and MIN_LEVEL in filter_results
@@ -362,32 +611,209 @@ class HSRScanner(QObject):
                 ):
                     scanned += 1
                 if not all(filter_results.values()):
+                    before = self._screenshot.screenshot_signature(stats_region)
                     self._nav.key_tap("d")
-                    self._scan_sleep(0.05)
+                    self._scan_sleep(0.05, stats_region, before)
                     continue
 
             # Update UI count
             self.update_signal.emit(strategy.SCAN_TYPE.value)
 
-            task = asyncio.to_thread(strategy.parse, stats_dict, item_id)
-            tasks.add(task)
+            tasks.append(self._pipeline.submit(strategy, stats_dict, item_id))
 
             # Next item
+            before = self._screenshot.screenshot_signature(stats_region)
             self._nav.key_tap("d")
-            self._scan_sleep(0.05)
+            self._scan_sleep(0.05, stats_region, before)
 
+        before = self._screenshot.screenshot_signature()
         self._nav.key_tap(Key.esc)
-        self._nav_sleep(2)
+        self._nav_sleep(2, WINDOW, before)
+        before = self._screenshot.screenshot_signature()
         self._nav.key_tap(Key.esc)
-        self._nav_sleep(1)
+        self._nav_sleep(1, WINDOW, before)
+
+        if incremental and not self._interrupt_event.is_set():
+            new_count, known = len(tasks), len(base.items)
+            if watermark is not None and known_match:
+                new_count, known = known_match
+                tasks = tasks[:new_count]
+            if new_count:
+                self._log(f"Found {new_count} new items since the last scan.")
+            else:
+                self._log("No new items since the last scan.")
+            self._pending_watermarks[strategy.FILTERS_KEY] = (
+                base,
+                quantity,
+                item_fingerprints[:new_count],
+                known,
+            )
         return tasks
 
-    def scan_characters(self) -> set[asyncio.Task]:
+    def _is_consistent(
+        self, watermark: Watermark, quantity: int, new_count: int, known: int
+    ) -> bool:
+        """Checks if the new and known items add up to the quantity of the inventory
+
+        If they do not, items further down the inventory were removed since the
+        last scan, so the last scan cannot be reused.
+
+        :param watermark: The watermark of the last scan
+        :param quantity: The number of items in the inventory
+        :param new_count: The number of new items
+        :param known: The index of the first known item reached
+        :return: True if the last scan can be reused, False otherwise
+        """
+        expected = new_count + watermark.quantity - known
+        if expected == quantity:
+            return True
+
+        self._log(
+            f"Expected {expected} items from the last scan but found {quantity}. Scanning the whole inventory instead.",
+            LogLevel.WARNING,
+        )
+        return False
+
+    def _merge(self, category: str, items: list[dict | None]) -> list[dict]:
+        """Merges newly parsed items with the items from the last incremental scan
+
+        Saves the watermark of the category for the next incremental scan.
+
+        :param category: The category, i.e. its filters key
+        :param items: The newly parsed items, newest first
+        :return: The items to output
+        """
+        if category not in self._pending_watermarks:
+            return [x for x in items if x]
+
+        base, quantity, fingerprints, known = self._pending_watermarks.pop(category)
+        watermark = base.advance(quantity, fingerprints, items, known)
+        self._watermarks.set(category, watermark)
+
+        # the same numbering as a full scan sorted by date
+        res = []
+        for item in watermark.items:
+            if item:
+                prefix = item["_uid"].rsplit("_", 1)[0]
+                res.append({**item, "_uid": f"{prefix}_{len(res) + 1}"})
+        return res
+
+    def _read_grid(
+        self, reader: GridReader, item_id: int, quantity: int, levels: bool
+    ) -> dict[int, tuple[int, GridCell]]:
+        """Reads the items from the selected one to the end of the visible page off the grid
+
+        :param reader: The grid reader
+        :param item_id: The ID of the selected item
+        :param quantity: The number of items in the inventory
+        :param levels: Whether to read the levels
+        :return: The cell index and item keyed by item ID, empty if the selected item could not be found
+        """
+        page = reader.read(self._screenshot.screenshot_grid(), levels)
+        if page.selected is None:
+            self._log(
+                "Could not find the selected item in the inventory grid.",
+                LogLevel.DEBUG,
+            )
+            return {}
+
+        cells = page.cells[page.selected : page.selected + quantity - item_id + 1]
+        self._log(
+            f"Read items {item_id} to {item_id + len(cells) - 1} off the inventory grid.",
+            LogLevel.TRACE,
+        )
+        return {item_id + i: (page.selected + i, cell) for i, cell in enumerate(cells)}
+
+    def _fails_on_grid(
+        self, strategy: BaseParseStrategy, cell: GridCell, sort_method: str
+    ) -> bool:
+        """Checks if the grid shows an item to fail the filters, so it can be skipped unopened
+
+        An item below the filter the inventory is sorted by is not skipped, so
+        that its stats panel decides where the scan ends.
+
+        :param strategy: The strategy to use
+        :param cell: The item as shown in the grid
+        :param sort_method: The current sort method
+        :return: True if the item can be skipped, False otherwise
+        """
+        grid_results = strategy.check_grid_filters(cell, self._config[FILTERS])
+        if grid_results is None or all(grid_results.values()):
+            return False
+
+        sort_key = {SORT_LV: MIN_LEVEL, SORT_RARITY: MIN_RARITY}.get(sort_method)
+        return grid_results.get(sort_key, True)
+
+    def _skip_items(
+        self,
+        reader: GridReader,
+        grid_items: dict[int, tuple[int, GridCell]],
+        item_id: int,
+        count: int,
+        region: tuple[float, float, float, float],
+    ) -> bool:
+        """Steps past items without opening them
+
+        If the item stepped to is still on the page read off the grid, its cell
+        is checked to be the selected one, and inputs the game dropped are repeated.
+
+        :param reader: The grid reader
+        :param grid_items: The cell index and item keyed by item ID
+        :param item_id: The ID of the selected item
+        :param count: The number of items to step past
+        :param region: The region the input changes
+        :raises InterruptedScanException: Thrown if the scan is interrupted
+        :return: False if another cell is selected or none is found, True otherwise
+        """
+        presses = count
+        for retry in range(MAX_INPUT_RETRIES + 1):
+            if retry:
+                self._log(
+                    f"Inventory grid selection is {presses} items behind. Retrying input... ({retry}/{MAX_INPUT_RETRIES})",
+                    LogLevel.DEBUG,
+                )
+            for _ in range(presses):
+                before = self._screenshot.screenshot_signature(region)
+                self._nav.key_tap("d")
+                self._scan_sleep(0.05, region, before)
+
+            # the grid scrolled to the next page, which is read before it is used
+            if item_id + count not in grid_items:
+                return True
+
+            selected = reader.find_selected(self._screenshot.screenshot_grid())
+            if selected is None:
+                return False
+            presses = grid_items[item_id + count][0] - selected
+            if presses <= 0:
+                return presses == 0
+        return False
+
+    def _is_selected(
+        self,
+        reader: GridReader | None,
+        grid_items: dict[int, tuple[int, GridCell]],
+        item_id: int,
+    ) -> bool:
+        """Checks if the grid shows an item as selected
+
+        :param reader: The grid reader, None if the grid is not read
+        :param grid_items: The cell index and item keyed by item ID
+        :param item_id: The ID of the item
+        :return: True if the item's cell is selected, False if another cell is
+            selected or it cannot be told
+        """
+        if reader is None or item_id not in grid_items:
+            return False
+        selected = reader.find_selected(self._screenshot.screenshot_grid())
+        return selected == grid_items[item_id][0]
+
+    def scan_characters(self) -> list[Future]:
         """Scans the characters
 
         :raises InterruptedScanException: Thrown if the scan is interrupted
         :raises ValueError: Thrown if the character count could not be parsed
-        :return: The tasks to await
+        :return: The parse results to await, in scan order
         """
         char_parser = CharacterParser(
             self._game_data,
@@ -423,18 +849,21 @@ class HSRScanner(QObject):
                     LogLevel.DEBUG,
                 )
                 time.sleep(0.05)
+                before = self._screenshot.screenshot_signature()
                 self._nav.click()
-                self._nav_sleep(1)
+                self._nav_sleep(1, WINDOW, before)
 
                 # Get character count
                 max_retry = 5
                 retry = 0
                 while True:
                     character_total = self._screenshot.screenshot_character_count()
-                    character_total = image_to_string(
+                    character_total = numeric_image_to_string(
                         character_total,
                         "0123456789/",
                         7,
+                        "character_count",
+                        r"\d+/\d+",
                         True,
                         preprocess_char_count_img,
                     )
@@ -468,7 +897,7 @@ class HSRScanner(QObject):
                         f"Failed to parse character count after {max_databank_retry} character scan restarts. Ending scan.",
                         LogLevel.ERROR,
                     )
-                    return set()
+                    return []
                 self._log(
                     f"Restarting character count scan... ({databank_retry}/{max_databank_retry})",
                     LogLevel.WARNING,
@@ -478,39 +907,46 @@ class HSRScanner(QObject):
             break
 
         # Navigate to characters menu
+        before = self._screenshot.screenshot_signature()
         self._nav.key_tap(Key.esc)
-        self._nav_sleep(1)
+        self._nav_sleep(1, WINDOW, before)
+        before = self._screenshot.screenshot_signature()
         self._nav.key_tap(Key.esc)
-        self._nav_sleep(1.5)
+        self._nav_sleep(1.5, WINDOW, before)
         self._nav.key_tap("1")
         self._nav_sleep(0.2)
+        before = self._screenshot.screenshot_signature()
         self._nav.key_tap(self._config[CONFIG_CHARACTERS_KEY])
-        self._nav_sleep(1)
+        self._nav_sleep(1, WINDOW, before)
 
-        tasks = set()
+        tasks = []
         characters_seen = set()
 
         res = [{} for _ in range(character_total)]
 
         # Details tab
         i = 0
+        name_region = SCREENSHOT_COORDS[self._aspect_ratio][CHARACTER][CHAR_NAME]
         self._nav.move_cursor_to(*nav_data[DETAILS_BUTTON])
         time.sleep(0.05)
+        before = self._screenshot.screenshot_signature()
         self._nav.click()
-        self._nav_sleep(0.5)
+        self._nav_sleep(0.5, WINDOW, before)
         self._nav.enter_gamepad()
 
+        def next_character():
+            # moving the mouse disables gamepad controls, which drops the press
+            self._nav.enter_gamepad()
+            self._nav.press_gamepad_rb()
+
         prev_trailblazer = False  # https://github.com/kel-z/HSR-Scanner/issues/49#issuecomment-1936613741
-        max_retry = 3
         while i < character_total:
             # Get name and path
             character_name = ""
             retry = 0
-            while retry < max_retry and (
-                not character_name or character_name in characters_seen
-            ):
+            while True:
                 try:
-                    (self._scan_sleep(0.7) if prev_trailblazer else None)
+                    (self._scan_sleep(0.7) if prev_trailblazer and not retry else None)
                     character_name = (
                         # this has a small delay, can basically be treated as a sleep
                         self._get_character_name()
@@ -529,20 +965,30 @@ class HSRScanner(QObject):
                         character_name, path, is_trailblazer
                     )
 
-                    if character_name in characters_seen:
-                        self._log(
-                            f"Parsed duplicate character '{character_name}'. Retrying... ({retry + 1}/{max_retry})",
-                            LogLevel.WARNING,
-                        )
-                        self._scan_sleep(1)
+                    error = None
                 except Exception as e:
+                    character_name = ""
+                    error = e
+
+                if character_name and character_name not in characters_seen:
+                    break
+                if retry >= MAX_INPUT_RETRIES:
+                    break
+                retry += 1
+
+                if error is not None:
                     self._log(
-                        f"Failed to parse character name. Got error: {e}. Retrying... ({retry + 1}/{max_retry})",
+                        f"Failed to parse character name. Got error: {error}. Retrying... ({retry}/{MAX_INPUT_RETRIES})",
                         LogLevel.WARNING,
                     )
-                    character_name = ""
-                    self._scan_sleep(1)
-                retry += 1
+                    self._scan_sleep(INPUT_RETRY_DELAY * 2 ** (retry - 1))
+                else:
+                    # Same character as before, so the last input was dropped
+                    self._log(
+                        f"Parsed duplicate character '{character_name}'. Retrying input... ({retry}/{MAX_INPUT_RETRIES})",
+                        LogLevel.WARNING,
+                    )
+                    self._retry_input(next_character, name_region, retry)
 
             if not character_name:
                 self._log(
@@ -553,12 +999,12 @@ class HSRScanner(QObject):
 
             if character_name in characters_seen:
                 self._log(
-                    f"Duplicate character '{path} / {character_name}' scanned (Did you move your mouse during the scan?). Moving onto next character...",
+                    f"Duplicate character '{path} / {character_name}' scanned after {MAX_INPUT_RETRIES} retries (Did you move your mouse during the scan?). Moving onto next character...",
                     LogLevel.ERROR,
                 )
-                self._nav.enter_gamepad()
-                self._nav.press_gamepad_rb()
-                self._scan_sleep(0.3)
+                before = self._screenshot.screenshot_signature(name_region)
+                next_character()
+                self._scan_sleep(0.3, name_region, before)
                 continue
             else:
                 characters_seen.add(character_name)
@@ -608,10 +1054,12 @@ class HSRScanner(QObject):
                     if i == character_total - 1:
                         break
                     i += 1
+                    before = self._screenshot.screenshot_signature(name_region)
                     self._nav.press_gamepad_rb()
-                    self._scan_sleep(0.1)
+                    self._scan_sleep(0.1, name_region, before)
                     continue
                 elif character_level < min_level:
+                    # past the team, characters are sorted by level, so this is the cutoff
                     self._log(
                         f"Reached minimum level filter (got level {character_level} for {character_name}).",
                     )
@@ -628,8 +1076,9 @@ class HSRScanner(QObject):
             if i == character_total - 1:
                 break
             i += 1
+            before = self._screenshot.screenshot_signature(name_region)
             self._nav.press_gamepad_rb()
-            self._scan_sleep(0.3)
+            self._scan_sleep(0.3, name_region, before)
         self._nav.exit_gamepad()
 
         # Traces tab
@@ -692,14 +1141,15 @@ class HSRScanner(QObject):
         for stats_dict in res:
             if not stats_dict:
                 continue
-            task = asyncio.to_thread(char_parser.parse, stats_dict)
-            tasks.add(task)
+            tasks.append(self._pipeline.submit(char_parser, stats_dict))
 
         self._nav_sleep(1)
+        before = self._screenshot.screenshot_signature()
         self._nav.key_tap(Key.esc)
-        self._nav_sleep(2)
+        self._nav_sleep(2, WINDOW, before)
+        before = self._screenshot.screenshot_signature()
         self._nav.key_tap(Key.esc)
-        self._nav_sleep(1)
+        self._nav_sleep(1, WINDOW, before)
         return tasks
 
     def _log(self, msg: str, level: LogLevel = LogLevel.INFO) -> None:
@@ -715,37 +1165,121 @@ class HSRScanner(QObject):
         ]:
             self.log_signal.emit((msg, level))
 
+    async def _gather(self, futures: list[Future]) -> list:
+        """Waits for queued parse results
+
+        :param futures: The parse results
+        :return: The parsed items, in the same order
+        """
+        return await asyncio.gather(*(asyncio.wrap_future(f) for f in futures))
+
     def _get_character_name(self) -> str:
         """Gets the character name
 
         :return: The character name
         """
         character_name_img = self._screenshot.screenshot_character_name()
-        return image_to_string(
+        return confident_image_to_string(
             character_name_img,
             "ABCDEFGHIJKLMNOPQRSTUVWXYZ abcdefghijklmnopqrstuvwxyz/7&",
-            7,
-        )
-
-    def _nav_sleep(self, seconds: float) -> None:
+            [OcrAttempt(7), OcrAttempt(7, preprocess_img)],
+            lambda text: "/" in text,
+            parallel=True,
+            vocabulary=OcrVocabulary.CHARACTER,
+        ).text
+
+    def _nav_sleep(
+        self,
+        seconds: float,
+        region: tuple[float, float, float, float] | None = None,
+        before: np.ndarray | None = None,
+    ) -> bool:
         """Sleeps for the specified amount of time with navigation delay
 
         :param seconds: The amount of time to sleep
+        :param region: The region the input changes, defaults to None
+        :param before: The signature of the region before the input, defaults to None
         :raises InterruptedScanException: Thrown if the scan is interrupted
+        :return: True if the region changed and settled before the time was up, False otherwise
         """
-        time.sleep(seconds + self._config[CONFIG_NAV_DELAY])
-        if self._interrupt_event.is_set():
-            raise InterruptedScanException()
-
-    def _scan_sleep(self, seconds: float) -> None:
+        return self._wait(seconds + self._config[CONFIG_NAV_DELAY], region, before)
+
+    def _scan_sleep(
+        self,
+        seconds: float,
+        region: tuple[float, float, float, float] | None = None,
+        before: np.ndarray | None = None,
+    ) -> bool:
         """Sleeps for the specified amount of time with scan delay
 
         :param seconds: The amount of time to sleep
+        :param region: The region the input changes, defaults to None
+        :param before: The signature of the region before the input, defaults to None
         :raises InterruptedScanException: Thrown if the scan is interrupted
+        :return: True if the region changed and settled before the time was up, False otherwise
         """
-        time.sleep(seconds + self._config[CONFIG_SCAN_DELAY])
+        return self._wait(seconds + self._config[CONFIG_SCAN_DELAY], region, before)
+
+    def _wait(
+        self,
+        seconds: float,
+        region: tuple[float, float, float, float] | None,
+        before: np.ndarray | None,
+    ) -> bool:
+        """Waits for an input to take effect
+
+        Given the region the input changes and its signature from before the
+        input, the wait ends as soon as the region has changed and stopped
+        changing, and the amount of time is only a ceiling. Otherwise, the full
+        amount of time is slept.
+
+        :param seconds: The maximum amount of time to wait
+        :param region: The region the input changes
+        :param before: The signature of the region before the input
+        :raises InterruptedScanException: Thrown if the scan is interrupted
+        :return: True if the region changed and settled before the time was up, False otherwise
+        """
+        settled = False
+        if region is None or before is None:
+            time.sleep(seconds)
+        else:
+            settled = wait_for_settle(
+                lambda: self._screenshot.screenshot_signature(region),
+                before,
+                seconds,
+                self._interrupt_event.is_set,
+            )
+            if not settled:
+                self._log(
+                    f"Screen did not settle within {seconds:.2f}s of input.",
+                    LogLevel.TRACE,
+                )
         if self._interrupt_event.is_set():
             raise InterruptedScanException()
+        return settled
+
+    def _retry_input(
+        self,
+        press: Callable[[], None],
+        region: tuple[float, float, float, float],
+        retry: int,
+    ) -> None:
+        """Repeats an input the game did not respond to
+
+        The region is watched for a late response first, so that an input that
+        was only slow is not repeated. The wait doubles with each retry.
+
+        :param press: The function performing the input
+        :param region: The region the input changes
+        :param retry: The retry number, starting at 1
+        :raises InterruptedScanException: Thrown if the scan is interrupted
+        """
+        seconds = INPUT_RETRY_DELAY * 2 ** (retry - 1)
+        before = self._screenshot.screenshot_signature(region)
+        if self._scan_sleep(seconds, region, before):
+            return
+        press()
+        self._scan_sleep(seconds, region, before)
 
     def _ceildiv(self, a, b) -> int:
         """Divides a by b and rounds up
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the scanner imports its modules relative to the src folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,65 @@
+import cv2
+import numpy as np
+import pytest
+
+from utils.ocr import ColourFilter
+
+
+def _reference(img: np.ndarray, colours: list[tuple], variance: int) -> np.ndarray:
+    """The filter as it was before being compiled, one inRange mask per colour"""
+    mask = np.zeros(img.shape[:2], dtype=np.uint8)
+    for c in colours:
+        lower = np.array([max(0, x - variance) for x in c], dtype="uint8")
+        upper = np.array([min(255, x + variance) for x in c], dtype="uint8")
+        mask |= cv2.inRange(img, lower, upper)
+
+    img = cv2.bitwise_and(img, img, mask=mask)
+    gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+    gray = cv2.GaussianBlur(gray, (3, 3), 1)
+    return 255 - cv2.convertScaleAbs(gray, alpha=2, beta=0)
+
+
+@pytest.fixture
+def img() -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, (40, 60, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("count", [1, 3, 8, 9, 16, 17, 31])
+def test_matches_one_mask_per_colour(img, count):
+    rng = np.random.default_rng(count)
+    colours = [tuple(int(x) for x in rng.integers(0, 256, 3)) for _ in range(count)]
+    # paint each colour in, so every one of them keeps some pixels
+    for i, c in enumerate(colours):
+        img[i % 40, :10] = c
+
+    res = ColourFilter(colours, 40)(img)
+
+    assert np.array_equal(res, _reference(img, colours, 40))
+
+
+def test_bounds_saturate_at_the_ends_of_the_range(img):
+    colours = [(0, 0, 0), (255, 255, 255)]
+    img[:5] = 0
+    img[5:10] = 255
+
+    assert np.array_equal(ColourFilter(colours, 30)(img), _reference(img, colours, 30))
+
+
+def test_drops_alpha_channel(img):
+    rgba = np.dstack([img, np.full(img.shape[:2], 255, dtype=np.uint8)])
+
+    assert np.array_equal(
+        ColourFilter((128, 128, 128), 60)(rgba),
+        ColourFilter((128, 128, 128), 60)(img),
+    )
+
+
+def test_rejects_mismatched_variances():
+    with pytest.raises(ValueError):
+        ColourFilter([(0, 0, 0), (1, 1, 1)], [10])
+
+
+def test_rejects_too_many_colours():
+    with pytest.raises(ValueError):
+        ColourFilter([(i, i, i) for i in range(32)], 10)
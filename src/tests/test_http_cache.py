@@ -0,0 +1,106 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils.data import cache_path
+from utils.http_cache import CachedJson
+
+ETAG = '"v1"'
+DOCUMENT = {"version": 1}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Serves DOCUMENT with an ETag, answering conditional requests with 304"""
+
+    def do_GET(self) -> None:
+        self.server.requests.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = json.dumps(DOCUMENT).encode()
+        self.send_response(200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path))
+    return tmp_path
+
+
+def _url(server) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}/data.json"
+
+
+def test_first_fetch_downloads_and_caches(server):
+    cache = CachedJson(_url(server), "data.json")
+
+    assert cache.load() is None
+    assert cache.fetch() == (DOCUMENT, True)
+    assert cache.load() == DOCUMENT
+    assert "If-None-Match" not in server.requests[0]
+
+
+def test_unchanged_document_is_revalidated_with_etag(server):
+    cache = CachedJson(_url(server), "data.json")
+    cache.fetch()
+
+    assert cache.fetch() == (DOCUMENT, False)
+    assert server.requests[1]["If-None-Match"] == ETAG
+
+
+def test_corrupt_cache_is_downloaded_again(server):
+    cache = CachedJson(_url(server), "data.json")
+    cache.fetch()
+    with open(cache_path("data.json"), "w") as f:
+        f.write("{not json")
+
+    assert cache.load() is None
+    assert cache.fetch() == (DOCUMENT, True)
+    assert "If-None-Match" not in server.requests[1]
+    assert cache.load() == DOCUMENT
+
+
+def test_discarded_cache_is_downloaded_again(server):
+    cache = CachedJson(_url(server), "data.json")
+    cache.fetch()
+    cache.discard()
+
+    assert cache.load() is None
+    assert cache.fetch() == (DOCUMENT, True)
+    assert "If-None-Match" not in server.requests[1]
+
+
+def test_cache_is_tied_to_its_url(server):
+    CachedJson(_url(server), "data.json").fetch()
+
+    assert CachedJson(_url(server) + "?v=2", "data.json").load() is None
+
+
+def test_get_falls_back_to_cache_when_offline(server):
+    cache = CachedJson(_url(server), "data.json")
+    cache.fetch()
+
+    assert cache.get(offline=True) == DOCUMENT
+    assert len(server.requests) == 1
@@ -0,0 +1,86 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from enums.parse_backend import ParseBackend
+from services.scanner.parse_pipeline import ParsePipeline
+
+GAME_DATA = SimpleNamespace(version="test")
+
+
+class _Parser:
+    """Parses an item once it is released"""
+
+    def __init__(self) -> None:
+        self.release = threading.Event()
+        self.started = threading.Semaphore(0)
+
+    def parse(self, item: int) -> int:
+        self.started.release()
+        self.release.wait(5)
+        if item < 0:
+            raise ValueError(item)
+        return item * 2
+
+
+def test_submit_blocks_while_the_pipeline_is_full():
+    parser = _Parser()
+    pipeline = ParsePipeline(
+        GAME_DATA, None, None, ParseBackend.THREAD, workers=1, max_pending=2
+    )
+    futures = [pipeline.submit(parser, 1), pipeline.submit(parser, 2)]
+
+    submitted = threading.Event()
+
+    def submit_third() -> None:
+        futures.append(pipeline.submit(parser, 3))
+        submitted.set()
+
+    thread = threading.Thread(target=submit_third)
+    thread.start()
+    assert not submitted.wait(0.2)
+
+    parser.release.set()
+    assert submitted.wait(5)
+    thread.join()
+    assert [f.result(5) for f in futures] == [2, 4, 6]
+    pipeline.shutdown()
+
+
+def test_failed_items_free_their_slot():
+    parser = _Parser()
+    parser.release.set()
+    pipeline = ParsePipeline(
+        GAME_DATA, None, None, ParseBackend.THREAD, workers=1, max_pending=1
+    )
+
+    with pytest.raises(ValueError):
+        pipeline.submit(parser, -1).result(5)
+    assert pipeline.submit(parser, 4).result(5) == 8
+    pipeline.shutdown()
+
+
+def test_shutdown_without_waiting_cancels_queued_items():
+    parser = _Parser()
+    pipeline = ParsePipeline(
+        GAME_DATA, None, None, ParseBackend.THREAD, workers=1, max_pending=4
+    )
+    running = pipeline.submit(parser, 1)
+    queued = pipeline.submit(parser, 2)
+    assert parser.started.acquire(timeout=5)
+
+    pipeline.shutdown(wait=False)
+    parser.release.set()
+
+    assert running.result(5) == 2
+    assert queued.cancelled()
+
+
+def test_inline_backend_parses_on_submit():
+    parser = _Parser()
+    parser.release.set()
+    pipeline = ParsePipeline(GAME_DATA, None, None, ParseBackend.INLINE)
+
+    assert pipeline.submit(parser, 5).result(0) == 10
+    assert isinstance(pipeline.submit(parser, -1).exception(0), ValueError)
@@ -0,0 +1,86 @@
+import pytest
+
+from utils.substat_rolls import (
+    SUBSTAT_ROLLS,
+    SubstatRollTable,
+    _decompose,
+    resolve_roll_counts,
+)
+
+ROLL_VALS = {
+    "5": {
+        "HP": {"33": 0.8, "38": 0.9, "42": 1.0, "67": 1.6, "71": 1.7, "76": 1.8},
+        "SPD": {"2": [0.8, 0.9, 1.0], "4": [1.6, 1.7, 1.8, 1.9], "5": 2.0},
+    }
+}
+
+
+@pytest.fixture
+def table() -> SubstatRollTable:
+    return SubstatRollTable(ROLL_VALS)
+
+
+def test_index_only_finds_legal_values(table):
+    assert table.index(5, "HP", 33) == 0
+    assert table.index(5, "HP", 76) == 5
+    assert table.index(5, "HP", 34) is None
+    assert table.index(5, "ATK", 33) is None
+    assert table.index(4, "HP", 33) is None
+
+
+def test_has_stat(table):
+    assert table.has_stat(5, "SPD")
+    assert not table.has_stat(5, "ATK")
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [(33, 33), (35, 33), (36, 38), (10, 33), (100, 76), (68, 67), (69, 71)],
+)
+def test_nearest_by_relative_error(table, value, expected):
+    assert table.nearest(5, "HP", value) == expected
+
+
+def test_nearest_without_legal_values(table):
+    assert table.nearest(5, "ATK", 10) is None
+
+
+def test_roll_values_of_ambiguous_value(table):
+    assert table.roll_values(5, "SPD", 2) == [0.8, 0.9, 1.0]
+    assert table.roll_values(5, "SPD", 5) == [2.0]
+    assert table.roll_values(5, "SPD", 3) == []
+
+
+@pytest.mark.parametrize("tenths", range(8, 61))
+def test_decompositions_add_up(tenths):
+    combinations = _decompose(tenths)
+    assert len(set(combinations)) == len(combinations)
+    for low, mid, high in combinations:
+        assert min(low, mid, high) >= 0
+        assert 8 * low + 9 * mid + 10 * high == tenths
+
+
+def test_decompose_finds_every_combination():
+    assert set(_decompose(27)) == {(0, 3, 0), (1, 1, 1)}
+    assert _decompose(20) == ((0, 0, 2),)
+    assert _decompose(11) == ()
+
+
+def test_roll_counts(table):
+    assert table.roll_counts(5, "HP", 38) == {1}
+    assert table.roll_counts(5, "HP", 71) == {2}
+    assert table.roll_counts(5, "SPD", 4) == {2}
+    assert table.roll_counts(5, "SPD", 99) == set()
+
+
+def test_resolve_roll_counts():
+    assert resolve_roll_counts([{1}, {2}, {1, 2}, {1}], {5}) == (1, 2, 1, 1)
+    # two assignments add up to a legal total
+    assert resolve_roll_counts([{1, 2}, {1, 2}, {1}, {1}], {5}) is None
+    assert resolve_roll_counts([{1}, {1}, {1}, {1}], {5, 6}) is None
+
+
+def test_compiled_from_game_data():
+    for rarity in (2, 3, 4, 5):
+        for key in ("HP", "ATK_", "SPD", "CRIT DMG_"):
+            assert SUBSTAT_ROLLS.has_stat(rarity, key)
@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from utils.settle import FINGERPRINT_SIZE
+from utils.watermark import (
+    HEAD_SIZE,
+    Watermark,
+    WatermarkStore,
+    is_same_item,
+)
+
+
+def _fingerprints(count: int, seed: int = 0) -> list[np.ndarray]:
+    rng = np.random.default_rng(seed)
+    return [
+        rng.integers(0, 256, FINGERPRINT_SIZE[::-1]).astype(np.int16)
+        for _ in range(count)
+    ]
+
+
+def _watermark(fingerprints: list[np.ndarray], quantity: int = 20) -> Watermark:
+    items = [{"_uid": f"relic_{i + 1}"} for i in range(quantity)]
+    return Watermark(quantity, np.array(fingerprints, dtype=np.int16), items)
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path))
+    return tmp_path
+
+
+def test_same_item_through_brightness_change():
+    a, b = _fingerprints(2)
+
+    assert is_same_item(a, a + 15)
+    assert not is_same_item(a, b)
+    assert not is_same_item(a, a[:, :-1])
+
+
+def test_finds_known_items_after_new_ones():
+    known = _fingerprints(HEAD_SIZE)
+    new = _fingerprints(2, seed=1)
+    watermark = _watermark(known)
+
+    scanned = new + known[:2]
+    assert watermark.find_known(scanned) is None
+    assert watermark.find_known(new + known[:3]) == (2, 0)
+
+
+def test_known_items_need_confirming_unless_inventory_ends():
+    known = _fingerprints(HEAD_SIZE)
+    watermark = _watermark(known)
+
+    assert watermark.find_known(known[:1]) is None
+    assert watermark.find_known(known[:1], complete=True) is None
+    assert watermark.find_known(known[:2], complete=True) == (0, 0)
+
+
+def test_new_copy_of_newest_item_is_not_taken_for_it():
+    a, b, c = _fingerprints(3)
+    watermark = _watermark([a, a, b, c])
+
+    assert watermark.find_known([a, a, a]) is None
+    assert watermark.find_known([a, a, a, b]) == (1, 0)
+
+
+def test_finds_known_items_past_removed_ones():
+    known = _fingerprints(HEAD_SIZE)
+    watermark = _watermark(known)
+
+    assert watermark.find_known(known[2:5]) == (0, 2)
+
+
+def test_advance_puts_new_items_ahead():
+    known = _fingerprints(HEAD_SIZE)
+    new = _fingerprints(3, seed=1)
+    watermark = _watermark(known, quantity=10)
+    new_items = [{"_uid": f"relic_new_{i}"} for i in range(3)]
+
+    res = watermark.advance(12, new, new_items, 1)
+
+    assert res.quantity == 12
+    assert res.items == new_items + watermark.items[1:]
+    assert len(res.fingerprints) == HEAD_SIZE
+    assert np.array_equal(res.fingerprints, np.array(new + known[1 : HEAD_SIZE - 2]))
+
+
+def test_advance_without_new_items_keeps_head():
+    known = _fingerprints(HEAD_SIZE)
+    watermark = _watermark(known)
+
+    res = watermark.advance(watermark.quantity, [], [], 0)
+
+    assert np.array_equal(res.fingerprints, watermark.fingerprints)
+    assert res.items == watermark.items
+
+
+def test_store_round_trip():
+    watermark = _watermark(_fingerprints(HEAD_SIZE), quantity=3)
+    WatermarkStore().set("relic", watermark)
+
+    res = WatermarkStore().get("relic")
+
+    assert res.quantity == 3
+    assert res.items == watermark.items
+    assert np.array_equal(res.fingerprints, watermark.fingerprints)
+    assert WatermarkStore().get("light_cone") is None
+
+
+def test_store_ignores_other_formats(monkeypatch):
+    WatermarkStore().set("relic", _watermark(_fingerprints(HEAD_SIZE)))
+    monkeypatch.setattr("utils.watermark.WATERMARK_FORMAT", 2)
+
+    assert WatermarkStore().get("relic") is None
@@ -1,31 +1,33 @@
 from typing import TypedDict
-from PIL.Image import Image
+
+import numpy as np
 
 
 class RelicDict(TypedDict):
     """Intermediate dictionary for relic data."""
 
-    name: Image | str
-    level: Image | int
-    discard: Image
-    lock: Image
-    rarity: Image | int
-    equipped: Image
-    equipped_avatar: Image
-    equipped_avatar_trailblazer: Image
-    mainstat: Image | str
-    substat_names: Image | str
-    substat_vals: Image | str
+    name: np.ndarray | str
+    level: np.ndarray | int
+    discard: np.ndarray
+    lock: np.ndarray
+    rarity: np.ndarray | int
+    equipped: np.ndarray
+    equipped_avatar: np.ndarray
+    equipped_avatar_trailblazer: np.ndarray
+    mainstat: np.ndarray | str
+    substat_names: np.ndarray | list[str]
+    substat_vals: np.ndarray | list[str]
+    relic_icon: np.ndarray
 
 
 class LightConeDict(TypedDict):
     """Intermediate dictionary for light cone data."""
 
-    name: Image | str
-    level: Image | str
+    name: np.ndarray | str
+    level: np.ndarray | str
     rarity: int
-    superimposition: Image | int
-    equipped: Image
-    equipped_avatar: Image
-    equipped_avatar_trailblazer: Image
-    lock: Image
+    superimposition: np.ndarray | int
+    equipped: np.ndarray
+    equipped_avatar: np.ndarray
+    equipped_avatar_trailblazer: np.ndarray
+    lock: np.ndarray
@@ -286,6 +286,19 @@ class Ui_MainWindow(object):
         self.pushButtonStartScanRecentRelics.setEnabled(False)
         self.pushButtonStartScanRecentRelics.setObjectName("pushButtonStartScanRecentRelics")
         self.formLayout_6.setWidget(2, QtWidgets.QFormLayout.ItemRole.SpanningRole, self.pushButtonStartScanRecentRelics)
+        self.formGroupBox_3 = QtWidgets.QGroupBox(parent=self.Advanced)
+        self.formGroupBox_3.setGeometry(QtCore.QRect(10, 120, 171, 81))
+        self.formGroupBox_3.setObjectName("formGroupBox_3")
+        self.formLayout_10 = QtWidgets.QFormLayout(self.formGroupBox_3)
+        self.formLayout_10.setObjectName("formLayout_10")
+        self.label_19 = QtWidgets.QLabel(parent=self.formGroupBox_3)
+        self.label_19.setWordWrap(True)
+        self.label_19.setObjectName("label_19")
+        self.formLayout_10.setWidget(0, QtWidgets.QFormLayout.ItemRole.SpanningRole, self.label_19)
+        self.pushButtonStartScanIncremental = QtWidgets.QPushButton(parent=self.formGroupBox_3)
+        self.pushButtonStartScanIncremental.setEnabled(False)
+        self.pushButtonStartScanIncremental.setObjectName("pushButtonStartScanIncremental")
+        self.formLayout_10.setWidget(1, QtWidgets.QFormLayout.ItemRole.SpanningRole, self.pushButtonStartScanIncremental)
         self.groupBox_10 = QtWidgets.QGroupBox(parent=self.Advanced)
         self.groupBox_10.setGeometry(QtCore.QRect(430, 10, 231, 491))
         self.groupBox_10.setObjectName("groupBox_10")
@@ -359,6 +372,31 @@ class Ui_MainWindow(object):
         self.checkBoxSroFormat = QtWidgets.QCheckBox(parent=self.verticalLayoutWidget)
         self.checkBoxSroFormat.setObjectName("checkBoxSroFormat")
         self.verticalLayout_2.addWidget(self.checkBoxSroFormat)
+        self.groupBox_12 = QtWidgets.QGroupBox(parent=self.Configure)
+        self.groupBox_12.setGeometry(QtCore.QRect(220, 280, 201, 81))
+        self.groupBox_12.setObjectName("groupBox_12")
+        self.formLayoutWidget_6 = QtWidgets.QWidget(parent=self.groupBox_12)
+        self.formLayoutWidget_6.setGeometry(QtCore.QRect(10, 20, 181, 51))
+        self.formLayoutWidget_6.setObjectName("formLayoutWidget_6")
+        self.formLayout_11 = QtWidgets.QFormLayout(self.formLayoutWidget_6)
+        self.formLayout_11.setContentsMargins(0, 0, 0, 0)
+        self.formLayout_11.setObjectName("formLayout_11")
+        self.label_26 = QtWidgets.QLabel(parent=self.formLayoutWidget_6)
+        self.label_26.setObjectName("label_26")
+        self.formLayout_11.setWidget(0, QtWidgets.QFormLayout.ItemRole.LabelRole, self.label_26)
+        self.comboBoxParseBackend = QtWidgets.QComboBox(parent=self.formLayoutWidget_6)
+        self.comboBoxParseBackend.setObjectName("comboBoxParseBackend")
+        self.comboBoxParseBackend.addItem("")
+        self.comboBoxParseBackend.addItem("")
+        self.comboBoxParseBackend.addItem("")
+        self.formLayout_11.setWidget(0, QtWidgets.QFormLayout.ItemRole.FieldRole, self.comboBoxParseBackend)
+        self.label_27 = QtWidgets.QLabel(parent=self.formLayoutWidget_6)
+        self.label_27.setObjectName("label_27")
+        self.formLayout_11.setWidget(1, QtWidgets.QFormLayout.ItemRole.LabelRole, self.label_27)
+        self.spinBoxParseWorkers = QtWidgets.QSpinBox(parent=self.formLayoutWidget_6)
+        self.spinBoxParseWorkers.setMaximum(64)
+        self.spinBoxParseWorkers.setObjectName("spinBoxParseWorkers")
+        self.formLayout_11.setWidget(1, QtWidgets.QFormLayout.ItemRole.FieldRole, self.spinBoxParseWorkers)
         self.groupBox_9 = QtWidgets.QGroupBox(parent=self.Configure)
         self.groupBox_9.setGeometry(QtCore.QRect(10, 180, 411, 91))
         self.groupBox_9.setObjectName("groupBox_9")
@@ -507,6 +545,9 @@ class Ui_MainWindow(object):
         self.checkBoxRecentRelicsFiveStar.setText(_translate("MainWindow", "Only count 5-star relics"))
         self.label_15.setText(_translate("MainWindow", "Number of relics:"))
         self.pushButtonStartScanRecentRelics.setText(_translate("MainWindow", "Scan"))
+        self.formGroupBox_3.setTitle(_translate("MainWindow", "Scan new items only"))
+        self.label_19.setText(_translate("MainWindow", "Updates the last scan with new light cones and relics."))
+        self.pushButtonStartScanIncremental.setText(_translate("MainWindow", "Scan"))
         self.groupBox_10.setTitle(_translate("MainWindow", "Info"))
         self.textEdit_2.setHtml(_translate("MainWindow", "<!DOCTYPE HTML PUBLIC \"-//W3C//DTD HTML 4.0//EN\" \"http://www.w3.org/TR/REC-html40/strict.dtd\">\n"
 "<html><head><meta name=\"qrichtext\" content=\"1\" /><style type=\"text/css\">\n"
@@ -532,6 +573,15 @@ class Ui_MainWindow(object):
         self.checkBoxDebugMode.setText(_translate("MainWindow", "Debug mode"))
         self.checkBoxSroFormat.setToolTip(_translate("MainWindow", "Star Rail Optimizer"))
         self.checkBoxSroFormat.setText(_translate("MainWindow", "Also export in SRO format"))
+        self.groupBox_12.setTitle(_translate("MainWindow", "Parsing"))
+        self.label_26.setToolTip(_translate("MainWindow", "Where scanned items are parsed. Processes use every CPU core but take longer to start"))
+        self.label_26.setText(_translate("MainWindow", "Backend:"))
+        self.comboBoxParseBackend.setItemText(0, _translate("MainWindow", "Threads"))
+        self.comboBoxParseBackend.setItemText(1, _translate("MainWindow", "Processes"))
+        self.comboBoxParseBackend.setItemText(2, _translate("MainWindow", "Inline"))
+        self.label_27.setToolTip(_translate("MainWindow", "Number of threads or processes parsing items"))
+        self.label_27.setText(_translate("MainWindow", "Workers:"))
+        self.spinBoxParseWorkers.setSpecialValueText(_translate("MainWindow", "Auto"))
         self.groupBox_9.setTitle(_translate("MainWindow", "Additional Delay"))
         self.label_11.setToolTip(_translate("MainWindow", "Navigating between different pages (inventory, character details, etc.)"))
         self.label_11.setText(_translate("MainWindow", "Navigation speed (ms):"))
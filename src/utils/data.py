@@ -3,8 +3,11 @@ import os
 import sys
 from datetime import datetime
 
+import numpy as np
 from PIL.Image import Image
 
+from models.const import HSR_SCANNER, KEL_Z
+
 
 def resource_path(relative_path: str) -> str:
     """Get resource path for PyInstaller
@@ -33,6 +36,19 @@ def executable_path(path: str) -> str:
     return os.path.join(os.path.dirname(sys.executable), path)
 
 
+def cache_path(file_name: str) -> str:
+    """Get the path of a file in the local cache folder, creating the folder if needed
+
+    :param file_name: The file name
+    :return: The absolute path to the file
+    """
+    cache_dir = os.path.join(
+        os.getenv("LOCALAPPDATA", os.path.expanduser("~")), KEL_Z, HSR_SCANNER, "cache"
+    )
+    os.makedirs(cache_dir, exist_ok=True)
+    return os.path.join(cache_dir, file_name)
+
+
 def create_debug_folder(output_location: str) -> str:
     """Create a debug folder
 
@@ -89,4 +105,4 @@ def filter_images_from_dict(d):
     :param d: The dictionary
     :return: The dictionary with images filtered out
     """
-    return {k: v for k, v in d.items() if not isinstance(v, Image)}
+    return {k: v for k, v in d.items() if not isinstance(v, (Image, np.ndarray))}
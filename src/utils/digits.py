@@ -0,0 +1,345 @@
+import os
+import tempfile
+import threading
+
+import cv2
+import numpy as np
+from PIL.Image import Image
+
+from utils.data import cache_path
+from utils.ocr_engine import to_pixel_buffer
+
+TEMPLATES_FILE = "digit_glyphs.npz"
+TEMPLATES_FORMAT = 1
+
+# side of the square each glyph is normalized to
+GLYPH_SIZE = 16
+
+# minimum correlation for a glyph to match a template
+MIN_SCORE = 0.9
+
+# minimum lead of the best character over the runner-up
+MIN_MARGIN = 0.03
+
+# templates at least this close to an existing one add nothing
+REDUNDANT_SCORE = 0.98
+
+MAX_TEMPLATES_PER_CHAR = 8
+
+# times a glyph has to be read as the same character before it becomes a template
+MIN_SIGHTINGS = 3
+
+# minimum correlation for two glyphs to count as sightings of the same one
+SIGHTING_SCORE = 0.95
+
+
+class DigitReader:
+    """DigitReader class for reading fixed-font numeric fields by glyph template matching
+
+    Templates are learned from confident Tesseract recognitions, so no glyphs
+    need to be shipped with the scanner. A glyph only becomes a template once it
+    has been read as the same character several times and never as another one,
+    so a single misread is not learned. Each glyph set is kept apart, since the
+    same digit is rendered differently from one screen to another. Templates are
+    saved to the cache folder, so later scans start with them already learned.
+    """
+
+    def __init__(self, path: str | None = None, forward: bool = False) -> None:
+        """Constructor
+
+        :param path: The templates file, defaults to the cache folder
+        :param forward: Whether to queue fields to learn from for another process
+            instead of learning and saving them here, defaults to False
+        """
+        self._path = path or cache_path(TEMPLATES_FILE)
+        self._lock = threading.Lock()
+        self._sets = {}
+        # glyphs seen but not confirmed yet, by glyph set: vectors, labels and sightings
+        self._sightings = {}
+        self._forward = forward
+        self._forwarded = []
+        self._load()
+
+    def read(self, img: Image | np.ndarray, glyph_set: str) -> str | None:
+        """Read a preprocessed numeric field
+
+        :param img: The preprocessed image, dark text on a light background
+        :param glyph_set: The glyph set to match against
+        :return: The text, or None if any glyph could not be matched confidently
+        """
+        templates = self._sets.get(glyph_set)
+        if templates is None:
+            return None
+        vectors, labels = templates
+
+        glyphs = segment_glyphs(img)
+        if not glyphs:
+            return None
+
+        scores = _normalize(np.stack(glyphs)) @ vectors.T
+        best = scores.argmax(axis=1)
+        best_labels = labels[best]
+        best_scores = scores[np.arange(len(glyphs)), best]
+        runner_up = np.where(labels[None, :] == best_labels[:, None], -1.0, scores).max(
+            axis=1
+        )
+
+        if (best_scores < MIN_SCORE).any():
+            return None
+        if (best_scores - runner_up < MIN_MARGIN).any():
+            return None
+
+        return "".join(best_labels)
+
+    def learn(self, img: Image | np.ndarray, text: str, glyph_set: str) -> bool:
+        """Learn templates from a field whose text is known
+
+        Nothing is learned unless the field splits into exactly one glyph per
+        character. Each glyph counts as one sighting towards becoming a template.
+
+        :param img: The preprocessed image, dark text on a light background
+        :param text: The text of the field
+        :param glyph_set: The glyph set to add the templates to
+        :return: True if any template was added, False otherwise
+        """
+        if self._forward:
+            with self._lock:
+                self._forwarded.append((to_pixel_buffer(img), text, glyph_set))
+            return False
+
+        glyphs = segment_glyphs(img)
+        if not glyphs or len(glyphs) != len(text):
+            return False
+
+        with self._lock:
+            vectors, labels = self._sets.get(
+                glyph_set,
+                (
+                    np.empty((0, GLYPH_SIZE * GLYPH_SIZE), np.float32),
+                    np.array([], dtype="<U1"),
+                ),
+            )
+            added = False
+            for char, glyph in zip(text, glyphs):
+                vector = _normalize(glyph[None, :])
+                same = vectors[labels == char]
+                if len(same) >= MAX_TEMPLATES_PER_CHAR:
+                    continue
+                if len(same) and (same @ vector[0]).max() >= REDUNDANT_SCORE:
+                    continue
+                if not self._sight(glyph_set, char, vector[0]):
+                    continue
+                vectors = np.concatenate([vectors, vector])
+                labels = np.append(labels, char)
+                added = True
+
+            if added:
+                self._sets[glyph_set] = (vectors, labels)
+                self._save()
+            return added
+
+    def _sight(self, glyph_set: str, char: str, vector: np.ndarray) -> bool:
+        """Count a sighting of a glyph read as a character
+
+        A glyph that was also read as another character is ambiguous, so it is
+        blocked from being learned for the rest of the scan.
+
+        :param glyph_set: The glyph set the glyph belongs to
+        :param char: The character the glyph was read as
+        :param vector: The normalized glyph
+        :return: True if the glyph has now been read as the character often enough, False otherwise
+        """
+        vectors, labels, counts = self._sightings.get(
+            glyph_set,
+            (
+                np.empty((0, GLYPH_SIZE * GLYPH_SIZE), np.float32),
+                np.array([], dtype="<U1"),
+                np.array([], dtype=int),
+            ),
+        )
+
+        similar = (vectors @ vector) >= SIGHTING_SCORE
+        if (labels[similar] != char).any():
+            labels = np.where(similar, "", labels)
+            self._sightings[glyph_set] = (vectors, labels, counts)
+            return False
+
+        if similar.any():
+            match = int(np.flatnonzero(similar)[0])
+            counts = counts.copy()
+            counts[match] += 1
+            confirmed = counts[match] >= MIN_SIGHTINGS
+        else:
+            vectors = np.concatenate([vectors, vector[None, :]])
+            labels = np.append(labels, char)
+            counts = np.append(counts, 1)
+            confirmed = MIN_SIGHTINGS <= 1
+
+        self._sightings[glyph_set] = (vectors, labels, counts)
+        return bool(confirmed)
+
+    def take_forwarded(self) -> list[tuple[np.ndarray, str, str]]:
+        """Take the fields queued to learn from in another process
+
+        :return: The image, text and glyph set of each field, in the order learned
+        """
+        with self._lock:
+            forwarded, self._forwarded = self._forwarded, []
+            return forwarded
+
+    def _load(self) -> None:
+        """Load the saved templates, if any"""
+        if not os.path.exists(self._path):
+            return
+        try:
+            with np.load(self._path) as data:
+                if int(data["format"]) != TEMPLATES_FORMAT:
+                    return
+                glyphs, labels, sets = data["glyphs"], data["labels"], data["sets"]
+        except (OSError, ValueError, KeyError):
+            return
+
+        vectors = _normalize(glyphs.reshape(len(glyphs), -1))
+        for glyph_set in np.unique(sets):
+            in_set = sets == glyph_set
+            self._sets[str(glyph_set)] = (vectors[in_set], labels[in_set])
+
+    def _save(self) -> None:
+        """Save the templates, replacing the file in one step"""
+        glyphs, labels, sets = [], [], []
+        for glyph_set, (vectors, set_labels) in self._sets.items():
+            glyphs.append(_to_glyph_images(vectors))
+            labels.append(set_labels)
+            sets.append(np.full(len(set_labels), glyph_set))
+
+        # the templates stay learned for this scan even if they cannot be saved
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self._path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    format=TEMPLATES_FORMAT,
+                    glyphs=np.concatenate(glyphs),
+                    labels=np.concatenate(labels),
+                    sets=np.concatenate(sets),
+                )
+            os.replace(tmp_path, self._path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def segment_glyphs(img: Image | np.ndarray) -> list[np.ndarray]:
+    """Split a line of text into normalized glyphs
+
+    Each glyph is placed in a square as tall as the line, keeping its size and
+    vertical position, so that e.g. "+" and "/" remain distinguishable from digits.
+
+    :param img: The preprocessed image, dark text on a light background
+    :return: The glyphs from left to right, flattened to GLYPH_SIZE * GLYPH_SIZE
+    """
+    gray = to_pixel_buffer(img)
+    if gray.ndim == 3:
+        gray = cv2.cvtColor(gray, cv2.COLOR_RGB2GRAY)  # type: ignore
+    if gray.size == 0 or gray.min() == gray.max():
+        return []
+
+    _, ink = cv2.threshold(  # type: ignore
+        gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU  # type: ignore
+    )
+    n, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)  # type: ignore
+    if n <= 1:
+        return []
+
+    # drop specks, then merge pieces of the same glyph that overlap horizontally
+    stats = stats[1:]
+    line_height = stats[:, cv2.CC_STAT_HEIGHT].max()  # type: ignore
+    boxes = sorted(
+        [x, y, x + w, y + h]
+        for x, y, w, h, area in stats
+        if h >= line_height * 0.25 and area >= line_height
+    )
+    merged = []
+    for box in boxes:
+        if merged and box[0] < merged[-1][2] - (box[2] - box[0]) / 2:
+            last = merged[-1]
+            merged[-1] = [
+                min(last[0], box[0]),
+                min(last[1], box[1]),
+                max(last[2], box[2]),
+                max(last[3], box[3]),
+            ]
+        else:
+            merged.append(box)
+    if not merged:
+        return []
+
+    top = min(box[1] for box in merged)
+    bottom = max(box[3] for box in merged)
+    height = bottom - top
+
+    glyphs = []
+    for x0, _, x1, _ in merged:
+        width = x1 - x0
+        side = max(height, width)
+        canvas = np.zeros((side, side), dtype=np.uint8)
+        offset = (side - width) // 2
+        canvas[:height, offset : offset + width] = 255 - gray[top:bottom, x0:x1]
+        glyph = cv2.resize(  # type: ignore
+            canvas, (GLYPH_SIZE, GLYPH_SIZE), interpolation=cv2.INTER_AREA  # type: ignore
+        )
+        # soften the edges so a pixel of misalignment does not cost the match
+        glyph = cv2.GaussianBlur(glyph, (3, 3), 0)  # type: ignore
+        glyphs.append(glyph.reshape(-1).astype(np.float32))
+
+    return glyphs
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Centre and scale glyph vectors so that dot products are correlations
+
+    :param vectors: The glyph vectors, one per row
+    :return: The normalized vectors
+    """
+    vectors = vectors.astype(np.float32)
+    vectors -= vectors.mean(axis=1, keepdims=True)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-6)
+
+
+def _to_glyph_images(vectors: np.ndarray) -> np.ndarray:
+    """Rescale normalized glyph vectors to 8-bit images for saving
+
+    :param vectors: The normalized glyph vectors
+    :return: The glyph images
+    """
+    low = vectors.min(axis=1, keepdims=True)
+    high = vectors.max(axis=1, keepdims=True)
+    scaled = (vectors - low) * 255 / np.maximum(high - low, 1e-6)
+    return scaled.round().astype(np.uint8).reshape(-1, GLYPH_SIZE, GLYPH_SIZE)
+
+
+_reader = None
+_reader_lock = threading.Lock()
+_forward = False
+
+
+def forward_digit_templates() -> None:
+    """Queue the fields to learn from for the main process instead of learning them here
+
+    Only takes effect if called before the digit reader is first used.
+    """
+    global _forward
+    _forward = True
+
+
+def get_digit_reader() -> DigitReader:
+    """Get the process-wide digit reader, loading its templates on first use
+
+    :return: The digit reader
+    """
+    global _reader
+    with _reader_lock:
+        if _reader is None:
+            _reader = DigitReader(forward=_forward)
+        return _reader
@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable
+
+from rapidfuzz import process
+from rapidfuzz.distance import Levenshtein
+
+# insertion, deletion and substitution costs
+LEVENSHTEIN_WEIGHTS = (1, 1, 2)
+
+# number of distinct queries to remember matches for
+MATCH_CACHE_SIZE = 2048
+
+# distance reported for an empty query or an empty target set
+NO_MATCH_DISTANCE = 100
+
+
+class FuzzyMatcher:
+    """FuzzyMatcher class for finding the closest of a fixed set of names to OCR output
+
+    The names are prepared once: outfit keys such as "1001#Name" are compared by
+    the part after the "#", but the full key is returned. Queries are scored
+    against every name in a single batched rapidfuzz call, and the results of
+    recent queries are remembered, since the same OCR output recurs throughout
+    a scan.
+    """
+
+    def __init__(self, targets: Iterable[str], cache_size: int = MATCH_CACHE_SIZE):
+        """Constructor
+
+        :param targets: The names to match against
+        :param cache_size: The maximum number of remembered queries
+        """
+        self._targets = list(targets)
+        self._target_set = set(self._targets)
+        self._choices = [t.split("#")[1] if "#" in t else t for t in self._targets]
+        self._cache_size = cache_size
+        self._init_cache()
+
+    def match(self, name: str) -> tuple[str, int]:
+        """Get the closest name
+
+        :param name: The OCR output
+        :return: The closest name and its weighted Levenshtein distance
+        """
+        name = name.strip()
+
+        if not name:
+            return name, NO_MATCH_DISTANCE
+
+        if name in self._target_set:
+            return name, 0
+
+        start = time.perf_counter()
+        with self._lock:
+            res = self._cache.get(name)
+            if res is not None:
+                self._cache.move_to_end(name)
+                self.hits += 1
+                self.lookup_seconds += time.perf_counter() - start
+                return res
+
+        best = process.extractOne(
+            name,
+            self._choices,
+            scorer=Levenshtein.distance,
+            scorer_kwargs={"weights": LEVENSHTEIN_WEIGHTS},
+        )
+        if best is None or best[1] >= NO_MATCH_DISTANCE:
+            res = ("", NO_MATCH_DISTANCE)
+        else:
+            res = (self._targets[best[2]], int(best[1]))
+
+        with self._lock:
+            self._cache[name] = res
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+            self.misses += 1
+            self.lookup_seconds += time.perf_counter() - start
+
+        return res
+
+    def distance(self, name: str, target: str) -> int:
+        """Get the distance between OCR output and one of the names
+
+        :param name: The OCR output
+        :param target: The name, which must be one of the names matched against
+        :return: The weighted Levenshtein distance
+        """
+        choice = self._choices[self._targets.index(target)]
+        return int(
+            Levenshtein.distance(name.strip(), choice, weights=LEVENSHTEIN_WEIGHTS)
+        )
+
+    def stats(self) -> dict:
+        """Get the lookup counters
+
+        Exact matches are answered before the cache and are not counted.
+
+        :return: The hits, misses, hit rate and mean lookup time in milliseconds
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "mean_ms": self.lookup_seconds * 1000 / lookups if lookups else 0.0,
+            }
+
+    def __getstate__(self) -> dict:
+        """Get the state to pickle, without the lock and the remembered queries
+
+        :return: The state
+        """
+        state = self.__dict__.copy()
+        del state["_lock"], state["_cache"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """Restore the matcher with an empty cache
+
+        :param state: The pickled state
+        """
+        self.__dict__.update(state)
+        self._init_cache()
+
+    def _init_cache(self) -> None:
+        """Start with an empty cache and zeroed counters"""
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lookup_seconds = 0.0
@@ -0,0 +1,198 @@
+import re
+from typing import NamedTuple
+
+import numpy as np
+
+from config.const import GRID_LEVEL, GRID_LOCK, GRID_RARITY, GRID_SHAPE
+from utils.ocr import BatchField, batch_image_to_strings, preprocess_img
+
+LEVEL_WHITELIST = "+0123456789Lv."
+COUNT_WHITELIST = "0123456789"
+
+# maximum distance from a rarity colour for a cell to hold an item
+MAX_RARITY_DISTANCE = 60
+
+# minimum share of bright pixels for the lock icon to be shown
+MIN_LOCK_COVERAGE = 0.08
+
+# minimum brightness lead of a cell's border over the median for it to be selected
+MIN_SELECTION_LEAD = 40
+
+# share of a cell's width and height taken up by its border
+BORDER = 0.04
+
+
+class GridCell(NamedTuple):
+    """An item as shown in the inventory grid"""
+
+    rarity: int
+    lock: bool
+    level: int | None = None
+
+
+class GridPage(NamedTuple):
+    """The items on an inventory page, in reading order"""
+
+    cells: list[GridCell]
+    selected: int | None
+
+
+class GridReader:
+    """GridReader class for reading the items of an inventory page off the grid
+
+    Every cell is read at once by sampling the same patch of each cell as one
+    array, so rarity, lock state and the selected cell cost a few array
+    operations per page. Levels need OCR, and are read with a single OCR
+    pass per page.
+    """
+
+    def __init__(self, coords: dict, colours: np.ndarray) -> None:
+        """Constructor
+
+        :param coords: The grid coordinates, with the cell patches in % of a cell
+        :param colours: The colour of each rarity, where i + 1 is the rarity
+        """
+        self._coords = coords
+        self._colours = colours
+        self._rows, self._cols = coords[GRID_SHAPE]
+
+    def read(self, frame: np.ndarray, levels: bool = False) -> GridPage:
+        """Read the items on a page
+
+        :param frame: The RGB capture of the grid area
+        :param levels: Whether to read the levels, defaults to False
+        :return: The items up to the first empty cell, and the selected cell if any
+        """
+        rarities, count = self._read_rarities(frame)
+
+        lock_patches = self._sample(frame, self._coords[GRID_LOCK]).mean(axis=4)
+        lock_coverage = (lock_patches > 200).mean(axis=(2, 3)).reshape(-1)
+        locks = lock_coverage >= MIN_LOCK_COVERAGE
+
+        level_texts = [""] * count
+        if levels:
+            level_texts = self._read_texts(frame, GRID_LEVEL, LEVEL_WHITELIST, count)
+
+        cells = []
+        for i in range(count):
+            match = re.findall(r"\d+", level_texts[i])
+            level = int(match[-1]) if match else None
+            cells.append(GridCell(int(rarities[i]), bool(locks[i]), level))
+
+        return GridPage(cells, self._find_selected(frame, count))
+
+    def find_selected(self, frame: np.ndarray) -> int | None:
+        """Find the selected item on a page
+
+        :param frame: The RGB capture of the grid area
+        :return: The index of the selected cell, or None if no cell stands out
+        """
+        _, count = self._read_rarities(frame)
+        return self._find_selected(frame, count)
+
+    def read_counts(self, frame: np.ndarray) -> list[int | None]:
+        """Read the quantities of a count-only page, such as materials
+
+        :param frame: The RGB capture of the grid area
+        :return: The quantity of each cell up to the first empty one, None if unreadable
+        """
+        _, count = self._read_rarities(frame)
+
+        res = []
+        for text in self._read_texts(frame, GRID_LEVEL, COUNT_WHITELIST, count):
+            text = text.replace(" ", "")
+            res.append(int(text) if text.isdigit() else None)
+        return res
+
+    def _read_rarities(self, frame: np.ndarray) -> tuple[np.ndarray, int]:
+        """Read the rarity of every cell by the colour behind the item
+
+        :param frame: The RGB capture of the grid area
+        :return: The rarity of each cell in reading order, and the number of cells before the first empty one
+        """
+        patches = self._sample(frame, self._coords[GRID_RARITY])
+        means = patches.reshape(*patches.shape[:2], -1, 3).mean(axis=2)
+        distances = np.linalg.norm(
+            means[:, :, None, :] - self._colours[None, None, :, :], axis=3
+        )
+        rarities = (distances.argmin(axis=2) + 1).reshape(-1)
+        occupied = (distances.min(axis=2) <= MAX_RARITY_DISTANCE).reshape(-1)
+        count = len(occupied) if occupied.all() else int(occupied.argmin())
+        return rarities, count
+
+    def _read_texts(
+        self, frame: np.ndarray, patch: str, whitelist: str, count: int
+    ) -> list[str]:
+        """Read the same text patch of the first cells in a single OCR pass
+
+        :param frame: The RGB capture of the grid area
+        :param patch: The key of the patch to read
+        :param whitelist: The characters the text can contain
+        :param count: The number of cells to read
+        :return: The text of each cell
+        """
+        if not count:
+            return []
+
+        x0, y0, x1, y1 = self._coords[patch]
+        cell_h, cell_w = self._cell_size(frame)
+        fields = {}
+        for i in range(count):
+            top = int((i // self._cols) * cell_h)
+            left = int((i % self._cols) * cell_w)
+            crop = frame[
+                top + int(y0 * cell_h) : top + int(y1 * cell_h),
+                left + int(x0 * cell_w) : left + int(x1 * cell_w),
+            ]
+            fields[str(i)] = BatchField(crop, whitelist, preprocess_img)
+
+        texts = batch_image_to_strings(fields, 6)
+        return [texts.get(str(i), "") for i in range(count)]
+
+    def _find_selected(self, frame: np.ndarray, count: int) -> int | None:
+        """Find the selected cell by the highlight around it
+
+        :param frame: The RGB capture of the grid area
+        :param count: The number of occupied cells
+        :return: The index of the selected cell, or None if no cell stands out
+        """
+        if not count:
+            return None
+
+        top = self._sample(frame, (0, 0, 1, BORDER))
+        bottom = self._sample(frame, (0, 1 - BORDER, 1, 1))
+        brightness = (
+            (top.mean(axis=(2, 3, 4)) + bottom.mean(axis=(2, 3, 4))) / 2
+        ).reshape(-1)[:count]
+
+        selected = int(brightness.argmax())
+        if brightness[selected] - np.median(brightness) < MIN_SELECTION_LEAD:
+            return None
+        return selected
+
+    def _cell_size(self, frame: np.ndarray) -> tuple[float, float]:
+        """Get the size of a cell
+
+        :param frame: The RGB capture of the grid area
+        :return: The height and width of a cell in pixels
+        """
+        return frame.shape[0] / self._rows, frame.shape[1] / self._cols
+
+    def _sample(
+        self, frame: np.ndarray, patch: tuple[float, float, float, float]
+    ) -> np.ndarray:
+        """Gather the same patch of every cell into one array
+
+        :param frame: The RGB capture of the grid area
+        :param patch: The (x0, y0, x1, y1) of the patch in % of a cell
+        :return: The patches, indexed by row, column, y, x and channel
+        """
+        x0, y0, x1, y1 = patch
+        cell_h, cell_w = self._cell_size(frame)
+        ys = np.arange(int(y0 * cell_h), max(int(y1 * cell_h), int(y0 * cell_h) + 1))
+        xs = np.arange(int(x0 * cell_w), max(int(x1 * cell_w), int(x0 * cell_w) + 1))
+        rows = (np.arange(self._rows) * cell_h).astype(int)[:, None] + ys[None, :]
+        cols = (np.arange(self._cols) * cell_w).astype(int)[:, None] + xs[None, :]
+        rows = np.minimum(rows, frame.shape[0] - 1)
+        cols = np.minimum(cols, frame.shape[1] - 1)
+        return frame[rows[:, None, :, None], cols[None, :, None, :]].astype(np.float32)
@@ -0,0 +1,134 @@
+import json
+import os
+
+import requests
+
+from utils.data import cache_path
+
+# seconds to wait for the server before falling back to the cached copy
+DEFAULT_TIMEOUT = 10
+
+
+class CachedJson:
+    """CachedJson class for a JSON document downloaded over HTTP and kept in the cache folder
+
+    The document is saved alongside its ETag and Last-Modified headers, so that
+    refreshing it is a conditional request that costs a single round trip when
+    nothing has changed. A cached copy is only used for the URL it was
+    downloaded from, so bumping the URL invalidates it.
+    """
+
+    def __init__(self, url: str, file_name: str, timeout: float = DEFAULT_TIMEOUT):
+        """Constructor
+
+        :param url: The URL of the document
+        :param file_name: The file name of the cached copy
+        :param timeout: The request timeout in seconds, defaults to DEFAULT_TIMEOUT
+        """
+        self.url = url
+        self._file_name = file_name
+        self._timeout = timeout
+
+    def load(self) -> dict | None:
+        """Load the cached copy without touching the network
+
+        :return: The document, or None if there is no usable cached copy
+        """
+        meta = self._load_meta()
+        if meta.get("url") != self.url:
+            return None
+        try:
+            with open(cache_path(self._file_name), "rb") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def fetch(self) -> tuple[dict, bool]:
+        """Revalidate the cached copy with the server, downloading it if it changed
+
+        :raises requests.exceptions.RequestException: Thrown if the request fails
+        :return: The document and whether it differs from the cached copy
+        """
+        cached = self.load()
+        headers = {}
+        if cached is not None:
+            meta = self._load_meta()
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        response = requests.get(self.url, headers=headers, timeout=self._timeout)
+        if response.status_code == 304 and cached is not None:
+            return cached, False
+        response.raise_for_status()
+
+        try:
+            data = response.json()
+        except ValueError as e:
+            raise requests.exceptions.InvalidJSONError(e, response=response)
+
+        self._save(response)
+        return data, data != cached
+
+    def get(self, offline: bool = False) -> dict:
+        """Get the document, refreshed if possible and cached otherwise
+
+        :param offline: The flag to use the cached copy only, defaults to False
+        :raises requests.exceptions.RequestException: Thrown if there is no cached
+            copy and the request fails, or in offline mode, no cached copy
+        :return: The document
+        """
+        if not offline:
+            try:
+                return self.fetch()[0]
+            except requests.exceptions.RequestException:
+                pass
+
+        data = self.load()
+        if data is None:
+            raise requests.exceptions.RequestException(f"No cached copy of {self.url}")
+        return data
+
+    def discard(self) -> None:
+        """Discard the cached copy, so the next fetch downloads the document again"""
+        # the headers go first, so the document is never paired with a stale ETag
+        for file_name in (self._file_name + ".meta", self._file_name):
+            try:
+                os.remove(cache_path(file_name))
+            except FileNotFoundError:
+                pass
+
+    def _load_meta(self) -> dict:
+        """Load the headers saved with the cached copy
+
+        :return: The saved headers, empty if there are none
+        """
+        try:
+            with open(cache_path(self._file_name + ".meta"), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, response: requests.Response) -> None:
+        """Save a downloaded document and its headers, replacing each file in one step
+
+        The headers are cleared first and written last, so an interrupted save
+        leaves no cached copy rather than a document paired with another's ETag.
+
+        :param response: The response holding the document
+        """
+        meta = {
+            "url": self.url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        for file_name, content in (
+            (self._file_name + ".meta", b"{}"),
+            (self._file_name, response.content),
+            (self._file_name + ".meta", json.dumps(meta).encode()),
+        ):
+            path = cache_path(file_name)
+            with open(path + ".tmp", "wb") as f:
+                f.write(content)
+            os.replace(path + ".tmp", path)
@@ -0,0 +1,213 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+import cv2
+import numpy as np
+from PIL import Image as PILImage
+
+from utils.data import cache_path
+
+ATLAS_FILE = "equipped_icons_{version}.npy"
+ATLAS_INDEX_FILE = "equipped_icons_{version}.json"
+ATLAS_FORMAT = 1
+
+# side of the square icons are compared at before the best ones are refined
+COARSE_SIZE = 24
+
+# number of best coarse candidates scored by full template matching
+REFINE_TOP_K = 8
+
+# number of distinct avatar crops to remember matches for
+AVATAR_CACHE_SIZE = 256
+
+
+class IconAtlas:
+    """IconAtlas class for the equipped avatar icons, preprocessed once per game data version
+
+    The icons are decoded and blurred once, then stored as a single contiguous
+    array on disk that later launches memory-map instead of decoding again. The
+    character IDs and the size of each icon are stored alongside.
+    """
+
+    def __init__(self, path: str, ids: list[str], shapes: list[list[int]]) -> None:
+        """Constructor
+
+        :param path: The atlas file
+        :param ids: The character ID of each icon, in atlas order
+        :param shapes: The height and width of each icon, in atlas order
+        """
+        self._path = path
+        self.ids = ids
+        self._shapes = shapes
+        self._index = {char_id: i for i, char_id in enumerate(ids)}
+        self.atlas = np.load(path, mmap_mode="r")
+
+    @classmethod
+    def load(cls, version: str, mini_icons: dict[str, str]) -> "IconAtlas":
+        """Memory-map the atlas of a game data version, building it on first use
+
+        :param version: The game data version
+        :param mini_icons: The base64-encoded PNG icon of each character ID
+        :return: The icon atlas
+        """
+        path = cache_path(ATLAS_FILE.format(version=version))
+        index_path = cache_path(ATLAS_INDEX_FILE.format(version=version))
+
+        try:
+            with open(index_path, "r") as f:
+                index = json.load(f)
+            if index["format"] == ATLAS_FORMAT and index["ids"] == list(mini_icons):
+                return cls(path, index["ids"], index["shapes"])
+        except (OSError, ValueError, KeyError):
+            pass
+
+        ids = list(mini_icons)
+        icons = [_decode_icon(mini_icons[char_id]) for char_id in ids]
+        shapes = [list(icon.shape[:2]) for icon in icons]
+
+        atlas = np.zeros(
+            (
+                len(icons),
+                max(h for h, _ in shapes),
+                max(w for _, w in shapes),
+                *icons[0].shape[2:],
+            ),
+            dtype=np.uint8,
+        )
+        for i, icon in enumerate(icons):
+            atlas[i, : icon.shape[0], : icon.shape[1]] = icon
+
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, atlas)
+        os.replace(path + ".tmp", path)
+        with open(index_path + ".tmp", "w") as f:
+            json.dump({"format": ATLAS_FORMAT, "ids": ids, "shapes": shapes}, f)
+        os.replace(index_path + ".tmp", index_path)
+
+        return cls(path, ids, shapes)
+
+    def __getitem__(self, char_id: str) -> np.ndarray:
+        """Get the icon of a character
+
+        :param char_id: The character ID
+        :return: The blurred icon, a read-only view into the atlas
+        """
+        i = self._index[char_id]
+        h, w = self._shapes[i]
+        return self.atlas[i, :h, :w]
+
+    def __len__(self) -> int:
+        """Get the number of icons
+
+        :return: The number of icons
+        """
+        return len(self.ids)
+
+    def __getstate__(self) -> dict:
+        """Get the state to pickle, without the mapped array
+
+        :return: The state
+        """
+        state = self.__dict__.copy()
+        del state["atlas"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """Restore the atlas by mapping the file again
+
+        :param state: The pickled state
+        """
+        self.__dict__.update(state)
+        self.atlas = np.load(self._path, mmap_mode="r")
+
+
+class AvatarMatcher:
+    """AvatarMatcher class for finding the character whose icon matches an equipped avatar
+
+    Every icon is scored in one pass by correlating downsampled copies, and only
+    the best few candidates are then scored by full template matching. Matches
+    are remembered by crop content, since most equipped items belong to the
+    same handful of characters.
+    """
+
+    def __init__(
+        self,
+        atlas: IconAtlas,
+        top_k: int = REFINE_TOP_K,
+        cache_size: int = AVATAR_CACHE_SIZE,
+    ) -> None:
+        """Constructor
+
+        :param atlas: The icon atlas
+        :param top_k: The number of candidates to refine, defaults to REFINE_TOP_K
+        :param cache_size: The maximum number of remembered crops, defaults to AVATAR_CACHE_SIZE
+        """
+        self._atlas = atlas
+        self._top_k = top_k
+        self._cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._descriptors = np.stack([_describe(atlas[c]) for c in atlas.ids])
+
+    def match(self, img: np.ndarray) -> tuple[str, float]:
+        """Find the icon that best matches an avatar crop
+
+        :param img: The masked RGB avatar crop
+        :return: The character ID and its template matching score, or "" and 0 if no icon correlates
+        """
+        digest = hashlib.blake2b(np.right_shift(img, 3).data, digest_size=16)
+        key = digest.digest()
+        with self._lock:
+            res = self._cache.get(key)
+            if res is not None:
+                self._cache.move_to_end(key)
+                return res
+
+        scores = self._descriptors @ _describe(img)
+        k = min(self._top_k, len(scores))
+        candidates = np.sort(np.argpartition(-scores, k - 1)[:k])
+
+        res = ("", 0.0)
+        for i in candidates:
+            char_id = self._atlas.ids[i]
+            conf = float(
+                cv2.matchTemplate(  # type: ignore
+                    img, self._atlas[char_id], cv2.TM_CCOEFF_NORMED  # type: ignore
+                ).max()
+            )
+            if conf > res[1]:
+                res = (char_id, conf)
+
+        with self._lock:
+            self._cache[key] = res
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return res
+
+
+def _describe(img: np.ndarray) -> np.ndarray:
+    """Compute the coarse descriptor of an icon or avatar crop
+
+    :param img: The RGB image
+    :return: The downsampled pixels, centred and scaled to unit length
+    """
+    small = cv2.resize(  # type: ignore
+        np.ascontiguousarray(img), (COARSE_SIZE, COARSE_SIZE), interpolation=cv2.INTER_AREA  # type: ignore
+    ).astype(np.float32)
+    descriptor = small.reshape(-1) - small.mean()
+    return descriptor / max(float(np.linalg.norm(descriptor)), 1e-6)
+
+
+def _decode_icon(base64_string: str) -> np.ndarray:
+    """Decode an icon and blur it the way it is matched against
+
+    :param base64_string: The base64-encoded PNG
+    :return: The blurred RGB icon
+    """
+    img = PILImage.open(BytesIO(base64.b64decode(base64_string))).convert("RGB")
+    return cv2.GaussianBlur(np.array(img), (5, 5), 0)  # type: ignore
@@ -1,35 +1,222 @@
+import hashlib
 import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Callable, NamedTuple
 
 import cv2
 import numpy as np
 from utils import patched_pytesseract as pytesseract
-from PIL import Image as PILImage
 from PIL.Image import Image
 
+from enums.ocr_vocabulary import OcrVocabulary
 from utils.data import resource_path
+from utils.digits import get_digit_reader
+from utils.ocr_engine import OcrWord, get_engine, to_pixel_buffer
 
 # set environment variables for Tesseract
-os.environ["TESSDATA_PREFIX"] = resource_path("assets/tesseract/tessdata")
+TESSDATA_PATH = resource_path("assets/tesseract/tessdata")
+os.environ["TESSDATA_PREFIX"] = TESSDATA_PATH
 pytesseract.tesseract_cmd = resource_path("assets/tesseract/tesseract.exe")
 DIN_ALTERNATE = "DIN-Alternate"
 
-def preprocess_img(img: Image) -> Image:
+# vertical whitespace between crops stitched into a batch page
+BATCH_PADDING = 16
+
+# pixel rows without ink that separate two rows of text
+ROW_MIN_GAP = 3
+
+# whitespace kept around each row crop
+ROW_PADDING = 4
+
+# number of distinct crops to remember OCR results for
+OCR_CACHE_SIZE = 4096
+
+# lowest word confidence, out of 100, at which a valid result ends an OCR ladder
+MIN_CONFIDENCE = 75
+
+
+class BatchField(NamedTuple):
+    """A crop to recognize as part of a batch"""
+
+    img: Image | np.ndarray
+    whitelist: str
+    preprocess_func: Callable | None = None
+    multiline: bool = False
+
+
+class OcrAttempt(NamedTuple):
+    """A way of recognizing a crop, tried in order by confident_image_to_string"""
+
+    psm: int
+    preprocess_func: Callable | None = None
+
+
+class OcrResult(NamedTuple):
+    """Text recognized by Tesseract along with its confidence"""
+
+    text: str
+    # lowest word confidence out of 100, 0 if nothing was recognized
+    confidence: float
+    # confidence of each word in reading order
+    confidences: tuple[float, ...] = ()
+
+    @classmethod
+    def from_words(cls, words: list[OcrWord]) -> "OcrResult":
+        """Assemble a result from the recognized words
+
+        :param words: The words in reading order
+        :return: The result, with words on the same line joined by spaces
+        """
+        lines = []
+        last_line = None
+        for word in words:
+            line = (word.block, word.paragraph, word.line)
+            if line != last_line:
+                lines.append([])
+                last_line = line
+            lines[-1].append(word.text)
+
+        confidences = tuple(max(word.confidence, 0.0) for word in words)
+        return cls(
+            "\n".join(" ".join(line) for line in lines),
+            min(confidences, default=0.0),
+            confidences,
+        )
+
+
+class OcrCache:
+    """OcrCache class for remembering OCR results by crop content
+
+    Crops are keyed by a hash of their pixel buffer with the lowest bits of each
+    value dropped, so that crops differing only by capture noise share an entry.
+    The least recently used entry is evicted once the cache is full.
+    """
+
+    # low bits of each pixel value ignored when hashing
+    QUANTIZE_SHIFT = 3
+
+    def __init__(self, size: int) -> None:
+        """Constructor
+
+        :param size: The maximum number of entries
+        """
+        self._size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(
+        self,
+        buffer: np.ndarray,
+        whitelist: str,
+        psm: int,
+        output: str = "txt",
+        user_words: str | None = None,
+    ) -> bytes:
+        """Get the cache key of a recognition
+
+        :param buffer: The pixel buffer to recognize
+        :param whitelist: The whitelist of characters to use
+        :param psm: The page segmentation mode to use
+        :param output: The kind of result cached, defaults to "txt"
+        :param user_words: The Tesseract user-words file used, defaults to None
+        :return: The cache key
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.right_shift(buffer, self.QUANTIZE_SHIFT).data)
+        digest.update(
+            f"{buffer.shape}|{psm}|{whitelist}|{output}|{user_words}".encode()
+        )
+        return digest.digest()
+
+    def get(self, key: bytes) -> "str | OcrResult | None":
+        """Get a cached result, counting the lookup as a hit or a miss
+
+        :param key: The cache key
+        :return: The cached result, or None if the key is not cached
+        """
+        with self._lock:
+            res = self._entries.get(key)
+            if res is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return res
+
+    def put(self, key: bytes, res: "str | OcrResult") -> None:
+        """Cache a result
+
+        :param key: The cache key
+        :param res: The recognized text or result
+        """
+        with self._lock:
+            self._entries[key] = res
+            self._entries.move_to_end(key)
+            if len(self._entries) > self._size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Get the cache counters
+
+        :return: The hits, misses and number of entries
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+            }
+
+
+_ocr_cache = OcrCache(OCR_CACHE_SIZE)
+
+# Tesseract user-words files by vocabulary, set from the game data
+_vocabularies = {}
+
+
+def set_ocr_vocabularies(paths: dict[OcrVocabulary, str]) -> None:
+    """Set the user-words files that recognitions of closed-vocabulary fields use
+
+    :param paths: The user-words file of each vocabulary
+    """
+    _vocabularies.update(paths)
+
+
+def get_ocr_cache_stats() -> dict:
+    """Get the OCR cache counters of this process
+
+    :return: The hits, misses and number of entries
+    """
+    return _ocr_cache.stats()
+
+
+def warm_up_ocr() -> None:
+    """Start the OCR engine so that its startup cost is not paid by the first item"""
+    get_engine(DIN_ALTERNATE, TESSDATA_PATH).warm_up()
+
+
+def preprocess_img(img: Image | np.ndarray) -> np.ndarray:
     """Generic image preprocessing function
 
     :param img: The image to preprocess
     :return: The preprocessed image
     """
-
-    return _preprocess_img_by_colour_filter(img, (255, 255, 255), 80)
+    return _WHITE_FILTER(img)
 
 
 def image_to_string(
-    img: Image,
+    img: Image | np.ndarray,
     whitelist: str,
     psm: int,
     force_preprocess=False,
     preprocess_func=preprocess_img,
     remove_newline=True,
+    vocabulary: OcrVocabulary | None = None,
 ) -> str:
     """Convert image to string
 
@@ -39,16 +226,15 @@ def image_to_string(
     :param force_preprocess: The flag to force preprocessing, defaults to False
     :param preprocess_func: The preprocessing function to use, defaults to None
     :param strip_text: The flag to strip text, defaults to True
+    :param vocabulary: The closed vocabulary of the field, defaults to None
     :return: The string representation of the image
     """
-    config = f'-c tessedit_char_whitelist="{whitelist}" --psm {psm}'
-
     res = ""
     if not force_preprocess:
-        res = pytesseract.image_to_string(img, config=config, lang=DIN_ALTERNATE)
+        res = _recognize(img, whitelist, psm, vocabulary)
 
     if not res.strip():
-        res = pytesseract.image_to_string(preprocess_func(img), config=config, lang=DIN_ALTERNATE)
+        res = _recognize(preprocess_func(img), whitelist, psm, vocabulary)
 
     if remove_newline:
         res = res.replace("\n", " ")
@@ -56,135 +242,669 @@ def image_to_string(
     return res.strip()
 
 
-def preprocess_char_count_img(img: Image) -> Image:
+def image_to_data(
+    img: Image | np.ndarray,
+    whitelist: str,
+    psm: int,
+    remove_newline=True,
+    vocabulary: OcrVocabulary | None = None,
+) -> OcrResult:
+    """Convert image to string along with Tesseract's confidence in it
+
+    :param img: The image to convert
+    :param whitelist: The whitelist of characters to use
+    :param psm: The page segmentation mode to use
+    :param remove_newline: The flag to join lines with spaces, defaults to True
+    :param vocabulary: The closed vocabulary of the field, defaults to None
+    :return: The recognized text and its confidence
+    """
+    buffer = to_pixel_buffer(img)
+    user_words = _vocabularies.get(vocabulary)
+    key = _ocr_cache.key(buffer, whitelist, psm, "tsv", user_words)
+
+    res = _ocr_cache.get(key)
+    if res is None:
+        words = get_engine(DIN_ALTERNATE, TESSDATA_PATH).recognize_words(
+            buffer, whitelist, psm, user_words
+        )
+        res = OcrResult.from_words(words)
+        _ocr_cache.put(key, res)
+
+    if remove_newline:
+        res = res._replace(text=res.text.replace("\n", " "))
+
+    return res
+
+
+def confident_image_to_string(
+    img: Image | np.ndarray,
+    whitelist: str,
+    attempts: list[OcrAttempt],
+    validate: Callable[[str], bool] | None = None,
+    min_confidence: float = MIN_CONFIDENCE,
+    parallel: bool = False,
+    vocabulary: OcrVocabulary | None = None,
+) -> OcrResult:
+    """Convert image to string, stopping at the first confident and valid attempt
+
+    Attempts are tried in order, or all at once if `parallel` is set, in which
+    case the first confident and valid result to finish wins and the attempts
+    that have not started yet are cancelled. If no attempt is both valid and at
+    least `min_confidence`, the most confident valid result is returned, or
+    failing that the most confident result overall.
+
+    :param img: The image to convert
+    :param whitelist: The whitelist of characters to use
+    :param attempts: The recognition settings to try
+    :param validate: The check the text has to pass, defaults to accepting any non-empty text
+    :param min_confidence: The confidence that ends the attempts, defaults to MIN_CONFIDENCE
+    :param parallel: The flag to run the attempts concurrently, defaults to False
+    :param vocabulary: The closed vocabulary of the field, defaults to None
+    :return: The recognized text and its confidence
+    """
+    validate = validate or bool
+    best = best_valid = None
+
+    futures = []
+    if parallel and len(attempts) > 1:
+        pool = _get_ocr_pool()
+        futures = [
+            pool.submit(_run_attempt, img, whitelist, attempt, vocabulary)
+            for attempt in attempts
+        ]
+        results = (future.result() for future in as_completed(futures))
+    else:
+        results = (
+            _run_attempt(img, whitelist, attempt, vocabulary) for attempt in attempts
+        )
+
+    try:
+        for res in results:
+            if validate(res.text):
+                if res.confidence >= min_confidence:
+                    return res
+                if best_valid is None or res.confidence > best_valid.confidence:
+                    best_valid = res
+            if best is None or res.confidence > best.confidence:
+                best = res
+    finally:
+        for future in futures:
+            future.cancel()
+
+    return best_valid or best or OcrResult("", 0.0)
+
+
+def read_numeric(
+    img: Image | np.ndarray,
+    whitelist: str,
+    glyph_set: str,
+    pattern: str,
+    attempts: list[OcrAttempt],
+    preprocess_func=preprocess_img,
+    parallel: bool = False,
+) -> str:
+    """Read a numeric field, by glyph templates if possible and otherwise by OCR
+
+    The OCR attempts stop at the first confident reading that matches the
+    pattern, and only such readings are learned as glyph templates.
+
+    :param img: The field image
+    :param whitelist: The whitelist of characters for Tesseract
+    :param glyph_set: The name of the glyph templates to read and learn with
+    :param pattern: The regex the whole text has to match
+    :param attempts: The OCR attempts to try
+    :param preprocess_func: The preprocessing function for the glyph templates, defaults to preprocess_img
+    :param parallel: The flag to run the OCR attempts concurrently, defaults to False
+    :return: The text of the field
+    """
+    res = read_digits(img, glyph_set, pattern, preprocess_func)
+    if res is not None:
+        return res
+
+    ocr = confident_image_to_string(
+        img,
+        whitelist,
+        attempts,
+        lambda text: bool(re.fullmatch(pattern, text.replace(" ", ""))),
+        parallel=parallel,
+    )
+    if ocr.confidence >= MIN_CONFIDENCE:
+        learn_digits(img, ocr.text, glyph_set, pattern, preprocess_func)
+    return ocr.text
+
+
+def _run_attempt(
+    img: Image | np.ndarray,
+    whitelist: str,
+    attempt: OcrAttempt,
+    vocabulary: OcrVocabulary | None = None,
+) -> OcrResult:
+    """Run a single OCR attempt
+
+    :param img: The image to convert
+    :param whitelist: The whitelist of characters to use
+    :param attempt: The recognition settings
+    :param vocabulary: The closed vocabulary of the field, defaults to None
+    :return: The recognized text and its confidence
+    """
+    if attempt.preprocess_func is not None:
+        img = attempt.preprocess_func(img)
+    return image_to_data(img, whitelist, attempt.psm, vocabulary=vocabulary)
+
+
+_ocr_pool = None
+_ocr_pool_lock = threading.Lock()
+
+
+def _get_ocr_pool() -> ThreadPoolExecutor:
+    """Get the process-wide pool that runs recognitions concurrently
+
+    :return: The thread pool
+    """
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            _ocr_pool = ThreadPoolExecutor(
+                max_workers=os.cpu_count(), thread_name_prefix="ocr"
+            )
+        return _ocr_pool
+
+
+def numeric_image_to_string(
+    img: Image | np.ndarray,
+    whitelist: str,
+    psm: int,
+    glyph_set: str,
+    pattern: str,
+    force_preprocess=False,
+    preprocess_func=preprocess_img,
+    prefix: str = "",
+) -> str:
+    """Convert an image of a fixed-font numeric field to string
+
+    The field is read by glyph template matching first. Tesseract is only used
+    if that fails, and a confident Tesseract result that matches the pattern is
+    learned from so the next read of the field does not need it.
+
+    :param img: The image to convert
+    :param whitelist: The whitelist of characters for Tesseract
+    :param psm: The page segmentation mode for Tesseract
+    :param glyph_set: The name of the glyph templates to read and learn with
+    :param pattern: The regex the whole text has to match
+    :param force_preprocess: The flag to force preprocessing for Tesseract, defaults to False
+    :param preprocess_func: The preprocessing function to use, defaults to preprocess_img
+    :param prefix: The characters in front of the text that Tesseract does not report, e.g. "+", defaults to ""
+    :return: The string representation of the image
+    """
+    res = read_digits(img, glyph_set, pattern, preprocess_func, prefix)
+    if res is not None:
+        return res
+
+    ocr = OcrResult("", 0.0)
+    if not force_preprocess:
+        ocr = image_to_data(img, whitelist, psm)
+    if not ocr.text.strip():
+        ocr = image_to_data(preprocess_func(img), whitelist, psm)
+
+    res = ocr.text.strip()
+    if ocr.confidence >= MIN_CONFIDENCE:
+        learn_digits(img, res, glyph_set, pattern, preprocess_func, prefix)
+    return res
+
+
+def read_digits(
+    img: Image | np.ndarray,
+    glyph_set: str,
+    pattern: str,
+    preprocess_func=preprocess_img,
+    prefix: str = "",
+) -> str | None:
+    """Read a fixed-font numeric field by glyph template matching only
+
+    :param img: The image to read
+    :param glyph_set: The name of the glyph templates to read with
+    :param pattern: The regex the whole text has to match
+    :param preprocess_func: The preprocessing function to use, defaults to preprocess_img
+    :param prefix: The characters in front of the text to strip, defaults to ""
+    :return: The text, or None if the field could not be read confidently
+    """
+    res = get_digit_reader().read(preprocess_func(img), glyph_set)
+    if res is None:
+        return None
+
+    res = res.removeprefix(prefix)
+    return res if re.fullmatch(pattern, res) else None
+
+
+def learn_digits(
+    img: Image | np.ndarray,
+    text: str,
+    glyph_set: str,
+    pattern: str,
+    preprocess_func=preprocess_img,
+    prefix: str = "",
+) -> None:
+    """Learn glyph templates from a field read confidently by Tesseract
+
+    Nothing is learned unless the text matches the pattern. Callers are
+    responsible for only passing confident readings.
+
+    :param img: The image that was read
+    :param text: The text that was read
+    :param glyph_set: The name of the glyph templates to add to
+    :param pattern: The regex the whole text has to match
+    :param preprocess_func: The preprocessing function to use, defaults to preprocess_img
+    :param prefix: The characters in front of the text that Tesseract does not report, defaults to ""
+    """
+    text = text.replace(" ", "")
+    if not re.fullmatch(pattern, text):
+        return
+
+    reader = get_digit_reader()
+    processed = preprocess_func(img)
+    if prefix and reader.learn(processed, prefix + text, glyph_set):
+        return
+    reader.learn(processed, text, glyph_set)
+
+
+def _recognize(
+    img: Image | np.ndarray,
+    whitelist: str,
+    psm: int,
+    vocabulary: OcrVocabulary | None = None,
+) -> str:
+    """Run a single recognition pass, answering from the OCR cache where possible
+
+    :param img: The image to recognize
+    :param whitelist: The whitelist of characters to use
+    :param psm: The page segmentation mode to use
+    :param vocabulary: The closed vocabulary of the field, defaults to None
+    :return: The recognized text
+    """
+    buffer = to_pixel_buffer(img)
+    user_words = _vocabularies.get(vocabulary)
+    key = _ocr_cache.key(buffer, whitelist, psm, user_words=user_words)
+
+    res = _ocr_cache.get(key)
+    if res is None:
+        res = get_engine(DIN_ALTERNATE, TESSDATA_PATH).recognize(
+            buffer, whitelist, psm, user_words
+        )
+        _ocr_cache.put(key, res)
+
+    return res
+
+
+def batch_image_to_strings(
+    fields: dict[str, BatchField],
+    psm: int = 6,
+    vocabulary: OcrVocabulary | None = None,
+) -> dict:
+    """Convert several crops to strings with a single OCR pass
+
+    :param fields: The crops to convert, keyed by field name
+    :param psm: The page segmentation mode to use for the page, defaults to 6
+    :param vocabulary: The closed vocabulary of the page, defaults to None
+    :return: The string representation of each field, empty if nothing was found
+    """
+    return {
+        key: res.text
+        for key, res in batch_image_to_data(fields, psm, vocabulary).items()
+    }
+
+
+def batch_image_to_data(
+    fields: dict[str, BatchField],
+    psm: int = 6,
+    vocabulary: OcrVocabulary | None = None,
+) -> dict[str, OcrResult]:
+    """Convert several crops to strings along with Tesseract's confidence, with a single OCR pass
+
+    The crops are stacked into one page with whitespace between them, and the
+    word boxes of the result are used to split the text back into fields. Each
+    field is restricted to its own whitelist afterwards, since the page is
+    recognized with the union of all of them.
+
+    :param fields: The crops to convert, keyed by field name
+    :param psm: The page segmentation mode to use for the page, defaults to 6
+    :param vocabulary: The closed vocabulary of the page, defaults to None
+    :return: The text and confidence of each field, empty if nothing was found
+    """
+    tiles = []
+    bands = {}
+    y = BATCH_PADDING
+    for key, field in fields.items():
+        tile = _to_dark_on_light(field)
+        tiles.append((y, tile))
+        bands[key] = (y, y + tile.shape[0])
+        y += tile.shape[0] + BATCH_PADDING
+
+    width = max(tile.shape[1] for _, tile in tiles) + 2 * BATCH_PADDING
+    page = np.full((y, width), 255, dtype=np.uint8)
+    for top, tile in tiles:
+        page[
+            top : top + tile.shape[0], BATCH_PADDING : BATCH_PADDING + tile.shape[1]
+        ] = tile
+
+    whitelist = "".join(sorted(set("".join(f.whitelist for f in fields.values()))))
+    words = get_engine(DIN_ALTERNATE, TESSDATA_PATH).recognize_words(
+        page, whitelist, psm, _vocabularies.get(vocabulary)
+    )
+
+    lines = {key: {} for key in fields}
+    confidences = {key: [] for key in fields}
+    for word in words:
+        center = word.top + word.height / 2
+        for key, (top, bottom) in bands.items():
+            if top <= center < bottom:
+                text = "".join(c for c in word.text if c in fields[key].whitelist)
+                line = (word.block, word.paragraph, word.line)
+                lines[key].setdefault(line, []).append(text)
+                if text:
+                    confidences[key].append(max(word.confidence, 0.0))
+                break
+
+    res = {}
+    for key, field in fields.items():
+        texts = [" ".join(w for w in words if w) for words in lines[key].values()]
+        separator = "\n" if field.multiline else " "
+        res[key] = OcrResult(
+            separator.join(t for t in texts if t).strip(),
+            min(confidences[key], default=0.0),
+            tuple(confidences[key]),
+        )
+
+    return res
+
+
+def _to_dark_on_light(field: BatchField) -> np.ndarray:
+    """Convert a batch field's crop to dark text on a light grayscale background
+
+    :param field: The batch field
+    :return: The grayscale pixel buffer
+    """
+    if field.preprocess_func:
+        tile = to_pixel_buffer(field.preprocess_func(field.img))
+        if tile.ndim == 3:
+            tile = cv2.cvtColor(tile, cv2.COLOR_RGB2GRAY)  # type: ignore
+        return tile
+
+    tile = to_pixel_buffer(field.img)
+    if tile.ndim == 3:
+        tile = cv2.cvtColor(tile, cv2.COLOR_RGB2GRAY)  # type: ignore
+
+    # binarize so the tile's background blends into the page instead of
+    # leaving a box edge for the layout analysis to pick up
+    _, tile = cv2.threshold(  # type: ignore
+        tile, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU  # type: ignore
+    )
+    return tile
+
+
+def segment_rows(imgs: list[np.ndarray]) -> list[tuple[int, int]]:
+    """Find the rows of text shared by side-by-side columns of the same height
+
+    Rows are found by horizontal projection: each pixel row counts the ink in
+    every column, and runs of rows with ink are the text rows. Taking the rows
+    from all columns at once keeps e.g. a substat name and its value aligned
+    even when one of them is faint or missing.
+
+    :param imgs: The preprocessed columns, dark text on a light background
+    :return: The top and bottom of each row, from top to bottom
+    """
+    ink = None
+    for img in imgs:
+        gray = to_pixel_buffer(img)
+        if gray.ndim == 3:
+            gray = cv2.cvtColor(gray, cv2.COLOR_RGB2GRAY)  # type: ignore
+        profile = (gray < 128).sum(axis=1)
+        ink = profile if ink is None else ink[: len(profile)] + profile[: len(ink)]
+    if ink is None:
+        return []
+
+    rows = []
+    start = None
+    for y, has_ink in enumerate(np.append(ink > 0, False)):
+        if has_ink and start is None:
+            start = y
+        elif not has_ink and start is not None:
+            if rows and start - rows[-1][1] < ROW_MIN_GAP:
+                rows[-1] = (rows[-1][0], y)
+            else:
+                rows.append((start, y))
+            start = None
+
+    if not rows:
+        return []
+    # specks and underlines are much shorter than a line of text
+    line_height = max(bottom - top for top, bottom in rows)
+    return [(top, bottom) for top, bottom in rows if bottom - top >= line_height / 2]
+
+
+def crop_rows(img: np.ndarray, rows: list[tuple[int, int]]) -> list[np.ndarray]:
+    """Crop rows out of a preprocessed column with some whitespace around each
+
+    :param img: The preprocessed column, dark text on a light background
+    :param rows: The top and bottom of each row
+    :return: The row crops
+    """
+    crops = []
+    for top, bottom in rows:
+        crop = img[max(0, top - ROW_PADDING) : bottom + ROW_PADDING]
+        crops.append(
+            cv2.copyMakeBorder(  # type: ignore
+                crop,
+                0,
+                0,
+                ROW_PADDING,
+                ROW_PADDING,
+                cv2.BORDER_CONSTANT,  # type: ignore
+                value=255,
+            )
+        )
+    return crops
+
+
+def submit_rows_to_strings(
+    rows: list[np.ndarray],
+    whitelist: str,
+    vocabulary: OcrVocabulary | None = None,
+) -> Future:
+    """Start converting preprocessed rows to strings with a single OCR pass on the OCR thread pool
+
+    :param rows: The preprocessed rows, dark text on a light background
+    :param whitelist: The whitelist of characters to use
+    :param vocabulary: The closed vocabulary of the rows, defaults to None
+    :return: The future holding the string representation of each row, in order
+    """
+    # the rows are already preprocessed, so they are only converted to grayscale
+    fields = {
+        str(i): BatchField(row, whitelist, to_pixel_buffer)
+        for i, row in enumerate(rows)
+    }
+
+    def run() -> list[str]:
+        if not fields:
+            return []
+        results = batch_image_to_data(fields, 6, vocabulary)
+        return [results[key].text for key in fields]
+
+    return _get_ocr_pool().submit(run)
+
+
+def preprocess_char_count_img(img: Image | np.ndarray) -> np.ndarray:
     """Preprocess character count image in the Data Bank screen
 
     :param img: The image to preprocess
     :return: The preprocessed image
     """
-    return _preprocess_img_by_colour_filter(img, [(218, 194, 145), (142, 135, 115)], 80)
+    return _CHAR_COUNT_FILTER(img)
 
 
-def preprocess_lc_level_img(img: Image) -> Image:
+def preprocess_lc_level_img(img: Image | np.ndarray) -> np.ndarray:
     """Preprocess light cone level image
 
     :param img: The image to preprocess
     :return: The preprocessed image
     """
-    return _preprocess_img_by_colour_filter(img, [(255, 255, 255), (239, 160, 61)], 80)
+    return _LC_LEVEL_FILTER(img)
 
 
-def preprocess_trace_img(img: Image) -> Image:
+def preprocess_trace_img(img: Image | np.ndarray) -> np.ndarray:
     """Preprocess trace image
 
     :param img: The image to preprocess
     :return: The preprocessed image
     """
-    img = _preprocess_img_by_colour_filter(
-        img,
-        [
-            (255, 255, 255),
-            (212, 214, 214),
-            (160, 166, 175),
-            (45, 240, 240),
-            (26, 145, 150),
-            (33, 180, 182),
-            (38, 212, 206),
-            (14, 77, 82),
-            (0, 255, 255),
-            (0, 160, 180),
-        ],
-        [50, 50, 20, 20, 30, 30, 15, 10, 50, 20],
-    )
-    return img
+    return _TRACE_FILTER(img)
 
 
-def preprocess_equipped_img(img: Image) -> Image:
+def preprocess_equipped_img(img: Image | np.ndarray) -> np.ndarray:
     """Preprocess equipped image
 
     :param img: The image to preprocess
     :return: The preprocessed image
     """
-    return _preprocess_img_by_colour_filter(img, (202, 177, 134), 75)
+    return _EQUIPPED_FILTER(img)
 
 
-def preprocess_main_stat_img(img: Image) -> Image:
+def preprocess_main_stat_img(img: Image | np.ndarray) -> np.ndarray:
     """Preprocess main stat image
 
     :param img: The image to preprocess
     :return: The preprocessed image
     """
-    return _preprocess_img_by_colour_filter(img, (226, 155, 61), 50)
+    return _MAIN_STAT_FILTER(img)
 
 
-def preprocess_sub_stat_img(img: Image) -> Image:
+def preprocess_sub_stat_img(img: Image | np.ndarray) -> np.ndarray:
     """Preprocess sub stat image
 
     :param img: The image to preprocess
     :return: The preprocessed image
     """
-    img = _preprocess_img_by_colour_filter(img, (255, 255, 255), 110)
-    return img
+    return _SUB_STAT_FILTER(img)
 
 
-def preprocess_superimposition_img(img: Image) -> Image:
+def preprocess_superimposition_img(img: Image | np.ndarray) -> np.ndarray:
     """Preprocess superimposition image
 
     :param img: The image to preprocess
     :return: The preprocessed image
     """
-    img = _preprocess_img_by_colour_filter(img, (220, 196, 145), 70)
-    return img
+    return _SUPERIMPOSITION_FILTER(img)
 
 
-def preprocess_uid_img(img: Image) -> Image:
+def preprocess_uid_img(img: Image | np.ndarray) -> np.ndarray:
     """Preprocess UID image
 
     :param img: The image to preprocess
     :return: The preprocessed image
     """
-    img = _preprocess_img_by_colour_filter(img, (180, 180, 180), 80)
-    return img
+    return _UID_FILTER(img)
 
 
-def _preprocess_img_by_colour_filter(
-    img: Image, colour: tuple | list[tuple], variance: int | list[int]
-) -> Image:
-    """Preprocess image by filtering out colours that are not within the variance of the colour
+class ColourFilter:
+    """ColourFilter class for keeping only the pixels close to a set of colours
 
-    :param img: The image to preprocess
-    :param colour: The colour or list of colours to filter
-    :param variance: The variance or list of variances to use for each colour
-    :return: The preprocessed image
+    The colour bounds are compiled once. A single colour is matched with one
+    inRange call. Several colours are compiled into a lookup table per channel,
+    where bit i of an entry is set if the value is within the bounds of colour
+    i. A pixel is kept if any bit survives across all three channels, which is
+    the same as OR-ing one inRange mask per colour but takes a single pass.
     """
-    if isinstance(colour, tuple):
-        colour = [colour]
-    if isinstance(variance, int):
-        variance = [variance] * len(colour)
-
-    if len(colour) != len(variance):
-        raise ValueError(
-            f"Length of colour ({len(colour)}) and variance ({len(variance)}) must be the same"
-        )
-
-    img_arr = np.array(img)
-
-    mask = np.zeros(img_arr.shape[:2], dtype="uint8")
-    for c, v in zip(colour, variance):
-        lower = np.array([max(0, c - v) for c in c], dtype="uint8")
-        upper = np.array([min(255, c + v) for c in c], dtype="uint8")
-        mask = cv2.bitwise_or(mask, cv2.inRange(img_arr, lower, upper))  # type: ignore
-
-    img_arr = cv2.bitwise_and(img_arr, img_arr, mask=mask)  # type: ignore
-    img_arr = cv2.cvtColor(img_arr, cv2.COLOR_RGB2GRAY)  # type: ignore
-
-    # blur
-    img_arr = cv2.GaussianBlur(img_arr, (3, 3), 1)  # type: ignore
-
-    # brighten image
-    img_arr = cv2.convertScaleAbs(img_arr, alpha=2, beta=0)  # type: ignore
-
-    # invert
-    img_arr = 255 - img_arr
 
-    return PILImage.fromarray(img_arr)
+    def __init__(self, colour: tuple | list[tuple], variance: int | list[int]) -> None:
+        """Constructor
+
+        :param colour: The colour or list of colours to keep
+        :param variance: The variance or list of variances to use for each colour
+        :raises ValueError: Thrown if the colours and variances do not line up
+        """
+        if isinstance(colour, tuple):
+            colour = [colour]
+        if isinstance(variance, int):
+            variance = [variance] * len(colour)
+
+        if len(colour) != len(variance):
+            raise ValueError(
+                f"Length of colour ({len(colour)}) and variance ({len(variance)}) must be the same"
+            )
+        if len(colour) > 31:
+            raise ValueError(f"At most 31 colours are supported, got {len(colour)}")
+
+        self._bounds = None
+        if len(colour) == 1:
+            (c,), (v,) = colour, variance
+            self._bounds = (
+                np.array([max(0, x - v) for x in c], dtype="uint8"),
+                np.array([min(255, x + v) for x in c], dtype="uint8"),
+            )
+
+        if len(colour) <= 8:
+            dtype = np.uint8
+        elif len(colour) <= 16:
+            dtype = np.uint16
+        else:
+            dtype = np.int32
+
+        values = np.arange(256)
+        self._channel_luts = np.zeros((256, 1, 3), dtype=dtype)
+        for i, (c, v) in enumerate(zip(colour, variance)):
+            for channel in range(3):
+                in_range = np.abs(values - c[channel]) <= v
+                self._channel_luts[in_range, 0, channel] |= dtype(1 << i)
+
+        # brighten then invert, saturating like convertScaleAbs
+        self._tone_lut = (255 - np.minimum(values * 2, 255)).astype(np.uint8)
+
+    def __call__(self, img: Image | np.ndarray) -> np.ndarray:
+        """Filter an image
+
+        :param img: The RGB image to filter
+        :return: The filtered grayscale image, dark text on a light background
+        """
+        img_arr = np.asarray(img)
+        if img_arr.ndim == 3 and img_arr.shape[2] == 4:
+            img_arr = img_arr[:, :, :3]
+
+        if self._bounds is not None:
+            mask = cv2.inRange(img_arr, *self._bounds)  # type: ignore
+        else:
+            bits = cv2.split(cv2.LUT(img_arr, self._channel_luts))  # type: ignore
+            mask = cv2.compare(  # type: ignore
+                bits[0] & bits[1] & bits[2], 0, cv2.CMP_NE  # type: ignore
+            )
+
+        gray = cv2.cvtColor(img_arr, cv2.COLOR_RGB2GRAY)  # type: ignore
+        gray = cv2.bitwise_and(gray, gray, mask=mask)  # type: ignore
+
+        # blur
+        gray = cv2.GaussianBlur(gray, (3, 3), 1)  # type: ignore
+
+        return cv2.LUT(gray, self._tone_lut)  # type: ignore
+
+
+_WHITE_FILTER = ColourFilter((255, 255, 255), 80)
+_CHAR_COUNT_FILTER = ColourFilter([(218, 194, 145), (142, 135, 115)], 80)
+_LC_LEVEL_FILTER = ColourFilter([(255, 255, 255), (239, 160, 61)], 80)
+_TRACE_FILTER = ColourFilter(
+    [
+        (255, 255, 255),
+        (212, 214, 214),
+        (160, 166, 175),
+        (45, 240, 240),
+        (26, 145, 150),
+        (33, 180, 182),
+        (38, 212, 206),
+        (14, 77, 82),
+        (0, 255, 255),
+        (0, 160, 180),
+    ],
+    [50, 50, 20, 20, 30, 30, 15, 10, 50, 20],
+)
+_EQUIPPED_FILTER = ColourFilter((202, 177, 134), 75)
+_MAIN_STAT_FILTER = ColourFilter((226, 155, 61), 50)
+_SUB_STAT_FILTER = ColourFilter((255, 255, 255), 110)
+_SUPERIMPOSITION_FILTER = ColourFilter((220, 196, 145), 70)
+_UID_FILTER = ColourFilter((180, 180, 180), 80)
@@ -0,0 +1,459 @@
+import os
+import subprocess
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from errno import ENOENT
+from typing import NamedTuple
+
+import numpy as np
+from PIL import Image as PILImage
+from PIL.Image import Image
+
+from utils import patched_pytesseract as pytesseract
+
+try:
+    import tesserocr
+
+    tesserocr_installed = True
+except ImportError:
+    tesserocr_installed = False
+
+
+class OcrWord(NamedTuple):
+    """A word recognized by Tesseract along with its position on the page"""
+
+    text: str
+    left: int
+    top: int
+    width: int
+    height: int
+    confidence: float
+    block: int
+    paragraph: int
+    line: int
+
+
+class TesseractEngine(ABC):
+    """TesseractEngine base class for the backends that run OCR for utils.ocr"""
+
+    def __init__(self, lang: str) -> None:
+        """Constructor
+
+        :param lang: The Tesseract language to recognize with
+        """
+        self._lang = lang
+
+    @abstractmethod
+    def recognize(
+        self,
+        img: Image | np.ndarray,
+        whitelist: str,
+        psm: int,
+        user_words: str | None = None,
+    ) -> str:
+        """Run a single recognition pass on an image
+
+        :param img: The image to recognize
+        :param whitelist: The whitelist of characters to use
+        :param psm: The page segmentation mode to use
+        :param user_words: The Tesseract user-words file to use, defaults to None
+        :return: The recognized text
+        """
+        pass
+
+    def recognize_words(
+        self,
+        img: Image | np.ndarray,
+        whitelist: str,
+        psm: int,
+        user_words: str | None = None,
+    ) -> list[OcrWord]:
+        """Run a single recognition pass on an image and return the recognized words
+
+        :param img: The image to recognize
+        :param whitelist: The whitelist of characters to use
+        :param psm: The page segmentation mode to use
+        :param user_words: The Tesseract user-words file to use, defaults to None
+        :return: The recognized words in reading order
+        """
+        return parse_tsv(self._recognize_tsv(img, whitelist, psm, user_words))
+
+    @abstractmethod
+    def _recognize_tsv(
+        self,
+        img: Image | np.ndarray,
+        whitelist: str,
+        psm: int,
+        user_words: str | None = None,
+    ) -> str:
+        """Run a single recognition pass on an image with TSV output
+
+        :param img: The image to recognize
+        :param whitelist: The whitelist of characters to use
+        :param psm: The page segmentation mode to use
+        :param user_words: The Tesseract user-words file to use, defaults to None
+        :return: The TSV output
+        """
+        pass
+
+    def warm_up(self) -> None:
+        """Pay any one-off startup cost ahead of the first recognition"""
+        pass
+
+    def close(self) -> None:
+        """Release the resources held by the engine"""
+        pass
+
+
+class SubprocessEngine(TesseractEngine):
+    """SubprocessEngine class that launches the bundled Tesseract executable per call
+
+    This is the non-accelerated fallback for when tesserocr is not installed.
+    Every recognition still starts a Tesseract process and loads the
+    traineddata, so a scan is as slow as before the in-process pool; only the
+    temporary files are avoided. The image is streamed to Tesseract's stdin as
+    an uncompressed PNM and the text is read back from stdout.
+    """
+
+    def recognize(
+        self,
+        img: Image | np.ndarray,
+        whitelist: str,
+        psm: int,
+        user_words: str | None = None,
+    ) -> str:
+        """Run a single recognition pass on an image
+
+        :param img: The image to recognize
+        :param whitelist: The whitelist of characters to use
+        :param psm: The page segmentation mode to use
+        :param user_words: The Tesseract user-words file to use, defaults to None
+        :return: The recognized text
+        """
+        return self._run(img, whitelist, psm, user_words)
+
+    def _recognize_tsv(
+        self,
+        img: Image | np.ndarray,
+        whitelist: str,
+        psm: int,
+        user_words: str | None = None,
+    ) -> str:
+        """Run a single recognition pass on an image with TSV output
+
+        :param img: The image to recognize
+        :param whitelist: The whitelist of characters to use
+        :param psm: The page segmentation mode to use
+        :param user_words: The Tesseract user-words file to use, defaults to None
+        :return: The TSV output
+        """
+        return self._run(img, whitelist, psm, user_words, ["tsv"])
+
+    def _run(
+        self,
+        img: Image | np.ndarray,
+        whitelist: str,
+        psm: int,
+        user_words: str | None = None,
+        configfiles: list[str] | None = None,
+    ) -> str:
+        """Stream an image through the Tesseract executable
+
+        :param img: The image to recognize
+        :param whitelist: The whitelist of characters to use
+        :param psm: The page segmentation mode to use
+        :param user_words: The Tesseract user-words file to use, defaults to None
+        :param configfiles: The Tesseract config files to apply, defaults to None
+        :raises TesseractNotFoundError: Thrown if the Tesseract executable is missing
+        :raises TesseractError: Thrown if Tesseract exits with an error
+        :return: The Tesseract output
+        """
+        cmd_args = [
+            pytesseract.tesseract_cmd,
+            "stdin",
+            "stdout",
+            "-l",
+            self._lang,
+            "--psm",
+            str(psm),
+            "-c",
+            f"tessedit_char_whitelist={whitelist}",
+        ]
+        if user_words:
+            cmd_args += ["--user-words", user_words]
+        cmd_args += configfiles or []
+
+        try:
+            proc = subprocess.Popen(cmd_args, **pytesseract.subprocess_args())
+        except OSError as e:
+            if e.errno != ENOENT:
+                raise
+            raise pytesseract.TesseractNotFoundError()
+
+        out, err = proc.communicate(encode_pnm(to_pixel_buffer(img)))
+        if proc.returncode:
+            raise pytesseract.TesseractError(
+                proc.returncode, pytesseract.get_errors(err)
+            )
+
+        return out.decode(pytesseract.DEFAULT_ENCODING)
+
+
+class PooledApiEngine(TesseractEngine):
+    """PooledApiEngine class that keeps a pool of warm in-process Tesseract API handles
+
+    Each handle loads the traineddata once when it is created and is then reused
+    for every recognition. Handles are not thread-safe, so a handle is checked out
+    of the pool for the duration of a single recognition.
+
+    A user-words file can only be loaded when a handle is created, so each
+    user-words file has its own pool of up to `size` handles. Handles are never
+    ended to make room for another file, so switching between vocabularies does
+    not reload the traineddata.
+    """
+
+    def __init__(self, lang: str, tessdata_path: str, size: int) -> None:
+        """Constructor
+
+        :param lang: The Tesseract language to recognize with
+        :param tessdata_path: The directory containing the traineddata
+        :param size: The maximum number of handles to keep alive per user-words file
+        """
+        super().__init__(lang)
+        self._tessdata_path = tessdata_path
+        self._size = max(1, size)
+        self._idle = {}
+        self._counts = {}
+        self._available = threading.Condition()
+
+    def recognize(
+        self,
+        img: Image | np.ndarray,
+        whitelist: str,
+        psm: int,
+        user_words: str | None = None,
+    ) -> str:
+        """Run a single recognition pass on an image
+
+        :param img: The image to recognize
+        :param whitelist: The whitelist of characters to use
+        :param psm: The page segmentation mode to use
+        :param user_words: The Tesseract user-words file to use, defaults to None
+        :return: The recognized text
+        """
+        with self._acquire(user_words) as api:
+            self._set_image(api, img, whitelist, psm)
+            res = api.GetUTF8Text()
+            api.Clear()
+            return res
+
+    def _recognize_tsv(
+        self,
+        img: Image | np.ndarray,
+        whitelist: str,
+        psm: int,
+        user_words: str | None = None,
+    ) -> str:
+        """Run a single recognition pass on an image with TSV output
+
+        :param img: The image to recognize
+        :param whitelist: The whitelist of characters to use
+        :param psm: The page segmentation mode to use
+        :param user_words: The Tesseract user-words file to use, defaults to None
+        :return: The TSV output
+        """
+        with self._acquire(user_words) as api:
+            self._set_image(api, img, whitelist, psm)
+            res = api.GetTSVText(0)
+            api.Clear()
+            return res
+
+    def _set_image(
+        self, api, img: Image | np.ndarray, whitelist: str, psm: int
+    ) -> None:
+        """Configure a handle and hand it the image's pixel buffer
+
+        :param api: The Tesseract API handle
+        :param img: The image to recognize
+        :param whitelist: The whitelist of characters to use
+        :param psm: The page segmentation mode to use
+        """
+        buffer = to_pixel_buffer(img)
+        height, width = buffer.shape[:2]
+        bytes_per_pixel = 1 if buffer.ndim == 2 else buffer.shape[2]
+
+        api.SetPageSegMode(psm)
+        api.SetVariable("tessedit_char_whitelist", whitelist)
+        api.SetImageBytes(
+            buffer.tobytes(), width, height, bytes_per_pixel, width * bytes_per_pixel
+        )
+
+    def warm_up(self) -> None:
+        """Create the first handle so the model load happens before the scan starts"""
+        with self._acquire():
+            pass
+
+    def close(self) -> None:
+        """End every idle handle in the pool"""
+        with self._available:
+            for user_words, idle in self._idle.items():
+                for api in idle:
+                    api.End()
+                self._counts[user_words] -= len(idle)
+            self._idle.clear()
+
+    @contextmanager
+    def _acquire(self, user_words: str | None = None):
+        """Check a handle out of the pool of a user-words file, creating one if that pool is not full yet
+
+        :param user_words: The Tesseract user-words file the handle loads, defaults to None
+        :yield: The Tesseract API handle
+        """
+        api = None
+        with self._available:
+            while True:
+                idle = self._idle.setdefault(user_words, [])
+                if idle:
+                    api = idle.pop()
+                    break
+                if self._counts.get(user_words, 0) < self._size:
+                    self._counts[user_words] = self._counts.get(user_words, 0) + 1
+                    break
+                self._available.wait()
+
+        if api is None:
+            variables = {"user_words_file": user_words} if user_words else {}
+            try:
+                api = tesserocr.PyTessBaseAPI(
+                    path=self._tessdata_path, lang=self._lang, variables=variables
+                )
+            except Exception:
+                with self._available:
+                    self._counts[user_words] -= 1
+                    self._available.notify_all()
+                raise
+
+        try:
+            yield api
+        finally:
+            with self._available:
+                self._idle.setdefault(user_words, []).append(api)
+                # waiters may be after a handle of another user-words file
+                self._available.notify_all()
+
+
+def to_pixel_buffer(img: Image | np.ndarray) -> np.ndarray:
+    """Convert an image to a contiguous 8-bit grayscale or RGB pixel buffer
+
+    Transparent pixels are composited onto a white background, the same way
+    pytesseract prepares images before saving them.
+
+    :param img: The PIL image or NumPy array to convert
+    :raises TypeError: Thrown if the image type is not supported
+    :return: The pixel buffer
+    """
+    if isinstance(img, Image):
+        if "A" in img.getbands():
+            background = PILImage.new("RGB", img.size, (255, 255, 255))
+            background.paste(img, (0, 0), img.getchannel("A"))
+            img = background
+        elif img.mode not in ("L", "RGB"):
+            img = img.convert("RGB")
+        img = np.asarray(img)
+
+    if not isinstance(img, np.ndarray):
+        raise TypeError("Unsupported image object")
+
+    if img.dtype != np.uint8:
+        img = img.astype(np.uint8)
+
+    if img.ndim == 3 and img.shape[2] == 4:
+        alpha = img[:, :, 3:4].astype(np.uint16)
+        img = (img[:, :, :3] * alpha + 255 * (255 - alpha)) // 255
+        img = img.astype(np.uint8)
+    elif img.ndim == 3 and img.shape[2] == 1:
+        img = img[:, :, 0]
+
+    return np.ascontiguousarray(img)
+
+
+def encode_pnm(buffer: np.ndarray) -> bytes:
+    """Encode a pixel buffer as a binary PGM/PPM image
+
+    :param buffer: The grayscale or RGB pixel buffer
+    :return: The encoded image
+    """
+    height, width = buffer.shape[:2]
+    magic = b"P5" if buffer.ndim == 2 else b"P6"
+    return b"%s\n%d %d\n255\n" % (magic, width, height) + buffer.tobytes()
+
+
+def parse_tsv(tsv: str) -> list[OcrWord]:
+    """Parse Tesseract TSV output into words
+
+    :param tsv: The TSV output, with or without the header row
+    :return: The recognized words in reading order
+    """
+    words = []
+    for row in tsv.splitlines():
+        cells = row.split("\t")
+        # level 5 rows are words, every other level is layout
+        if len(cells) < 12 or cells[0] != "5":
+            continue
+        text = cells[11].strip()
+        if not text:
+            continue
+        words.append(
+            OcrWord(
+                text=text,
+                left=int(cells[6]),
+                top=int(cells[7]),
+                width=int(cells[8]),
+                height=int(cells[9]),
+                confidence=float(cells[10]),
+                block=int(cells[2]),
+                paragraph=int(cells[3]),
+                line=int(cells[4]),
+            )
+        )
+    return words
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+# maximum number of Tesseract API handles per user-words file the process-wide engine keeps alive
+_engine_size = os.cpu_count() or 1
+
+
+def set_engine_size(size: int) -> None:
+    """Set the maximum number of handles per user-words file of the process-wide engine
+
+    Only takes effect if called before the engine is first used.
+
+    :param size: The maximum number of Tesseract API handles per user-words file
+    """
+    global _engine_size
+    _engine_size = size
+
+
+def get_engine(lang: str, tessdata_path: str) -> TesseractEngine:
+    """Get the process-wide Tesseract engine, creating it on first use
+
+    The in-process API pool is used when tesserocr is installed, otherwise every
+    recognition falls back to launching the Tesseract executable, which is
+    much slower.
+
+    :param lang: The Tesseract language to recognize with
+    :param tessdata_path: The directory containing the traineddata
+    :return: The Tesseract engine
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            if tesserocr_installed:
+                _engine = PooledApiEngine(lang, tessdata_path, _engine_size)
+            else:
+                _engine = SubprocessEngine(lang)
+        return _engine
@@ -0,0 +1,191 @@
+import os
+import tempfile
+import threading
+
+import cv2
+import numpy as np
+
+from utils.data import cache_path
+
+INDEX_FILE = "relic_icons_{version}.npz"
+
+# side of the square each icon is downsampled to for its descriptor
+DESCRIPTOR_SIZE = 24
+
+# maximum distance (1 - correlation) for an icon to match a known piece
+MAX_DISTANCE = 0.12
+
+# the best piece must be this much closer than the best different piece
+MAX_RATIO = 0.6
+
+# tighter distance and ratio for a match to be trusted without reading the name
+CONFIDENT_DISTANCE = 0.06
+CONFIDENT_RATIO = 0.35
+
+# descriptors at most this far from an existing one of the same piece add nothing
+REDUNDANT_DISTANCE = 0.02
+
+MAX_DESCRIPTORS_PER_PIECE = 6
+
+
+class RelicIconIndex:
+    """RelicIconIndex class for identifying relic pieces by their artwork
+
+    The index maps compact descriptors of the artwork in the stats panel to relic
+    names. It is learned from names that OCR read exactly, since the game data
+    does not ship the artwork, and is saved per game data version once the
+    scan ends, not on every icon learned.
+    """
+
+    def __init__(
+        self, version: str, path: str | None = None, forward: bool = False
+    ) -> None:
+        """Constructor
+
+        :param version: The game data version the relic names belong to
+        :param path: The index file, defaults to the cache folder
+        :param forward: Whether to queue icons to learn from for another process
+            instead of learning and saving them here, defaults to False
+        """
+        self._path = path or cache_path(INDEX_FILE.format(version=version))
+        self._lock = threading.Lock()
+        self._forward = forward
+        self._forwarded = []
+        self._dirty = False
+        self._descriptors = np.empty((0, DESCRIPTOR_SIZE**2 * 3), np.float32)
+        self._names = np.array([], dtype=str)
+        self._load()
+
+    def lookup(self, icon: np.ndarray, confident: bool = False) -> str | None:
+        """Identify the relic piece shown in an icon
+
+        :param icon: The RGB crop of the artwork
+        :param confident: Whether to only accept a match close enough to skip
+            reading the name, defaults to False
+        :return: The relic name, or None if no piece is a clear nearest neighbour
+        """
+        max_distance = CONFIDENT_DISTANCE if confident else MAX_DISTANCE
+        max_ratio = CONFIDENT_RATIO if confident else MAX_RATIO
+        descriptors, names = self._descriptors, self._names
+        if len(np.unique(names)) < 2:
+            return None
+
+        distances = 1 - descriptors @ describe(icon)
+        best = distances.argmin()
+        runner_up = distances[names != names[best]].min()
+
+        if distances[best] > max_distance:
+            return None
+        if distances[best] > max_ratio * runner_up:
+            return None
+
+        return str(names[best])
+
+    def learn(self, icon: np.ndarray, name: str) -> bool:
+        """Add an icon whose relic name is known
+
+        :param icon: The RGB crop of the artwork
+        :param name: The relic name
+        :return: True if the descriptor was added, False otherwise
+        """
+        if self._forward:
+            with self._lock:
+                self._forwarded.append((np.array(icon), name))
+            return False
+
+        descriptor = describe(icon)
+
+        with self._lock:
+            same = self._descriptors[self._names == name]
+            if len(same) >= MAX_DESCRIPTORS_PER_PIECE:
+                return False
+            if len(same) and (1 - same @ descriptor).min() <= REDUNDANT_DISTANCE:
+                return False
+
+            self._descriptors = np.concatenate([self._descriptors, descriptor[None]])
+            self._names = np.append(self._names, name)
+            self._dirty = True
+            return True
+
+    def save(self) -> None:
+        """Save the index if any icon was learned since it was last saved"""
+        with self._lock:
+            if self._dirty:
+                self._save()
+                self._dirty = False
+
+    def take_forwarded(self) -> list[tuple[np.ndarray, str]]:
+        """Take the icons queued to learn from in another process
+
+        :return: The icon and relic name of each, in the order learned
+        """
+        with self._lock:
+            forwarded, self._forwarded = self._forwarded, []
+            return forwarded
+
+    def _load(self) -> None:
+        """Load the saved index, if any"""
+        if not os.path.exists(self._path):
+            return
+        try:
+            with np.load(self._path) as data:
+                descriptors, names = data["descriptors"], data["names"]
+        except (OSError, ValueError, KeyError):
+            return
+
+        if descriptors.shape[1:] == self._descriptors.shape[1:]:
+            self._descriptors, self._names = descriptors, names
+
+    def _save(self) -> None:
+        """Save the index, replacing the file in one step"""
+        # the descriptors stay learned for this scan even if they cannot be saved
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self._path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, descriptors=self._descriptors, names=self._names)
+            os.replace(tmp_path, self._path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def describe(icon: np.ndarray) -> np.ndarray:
+    """Compute the descriptor of an icon
+
+    :param icon: The RGB crop of the artwork
+    :return: The downsampled pixels, centred per channel and scaled to unit length
+    """
+    small = cv2.resize(  # type: ignore
+        np.asarray(icon)[:, :, :3],
+        (DESCRIPTOR_SIZE, DESCRIPTOR_SIZE),
+        interpolation=cv2.INTER_AREA,  # type: ignore
+    ).astype(np.float32)
+    small -= small.mean(axis=(0, 1))
+    descriptor = small.reshape(-1)
+    return descriptor / max(float(np.linalg.norm(descriptor)), 1e-6)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+_forward = False
+
+
+def forward_relic_icons() -> None:
+    """Queue the icons to learn from for the main process instead of learning them here
+
+    Only takes effect if called before a relic icon index is first used.
+    """
+    global _forward
+    _forward = True
+
+
+def get_relic_icon_index(version: str) -> RelicIconIndex:
+    """Get the process-wide relic icon index for a game data version
+
+    :param version: The game data version
+    :return: The relic icon index
+    """
+    with _indexes_lock:
+        if version not in _indexes:
+            _indexes[version] = RelicIconIndex(version, forward=_forward)
+        return _indexes[version]
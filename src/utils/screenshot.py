@@ -15,6 +15,8 @@ from config.const import (
     CHAR_EIDOLONS,
     CHEST,
     COUNT,
+    GRID,
+    GRID_AREA,
     QUANTITY,
     SORT,
     STATS,
@@ -23,7 +25,9 @@ from config.const import (
 )
 from config.screenshot import SCREENSHOT_COORDS
 from enums.increment_type import IncrementType
+from enums.log_level import LogLevel
 from models.const import CHAR_LEVEL, CHAR_NAME
+from utils.settle import fingerprint, signature
 
 
 class Screenshot:
@@ -52,10 +56,22 @@ class Screenshot:
 
         self._x_scaling_factor = self._window_width / 1920
         self._y_scaling_factor = self._window_height / 1080
+        self._is_native = self._window_width == 1920 and self._window_height == 1080
 
         self._debug = debug
         self._debug_output_location = debug_output_location
 
+        if self._is_native:
+            self._log(
+                "Capturing at native 1920x1080, skipping resampling.", LogLevel.DEBUG
+            )
+        else:
+            self._log(
+                f"Capturing at {self._window_width}x{self._window_height}, "
+                "resampling cropped fields to 1920x1080.",
+                LogLevel.DEBUG,
+            )
+
     def screenshot_screen(self) -> Image:
         """Takes a screenshot of the entire screen
 
@@ -64,12 +80,13 @@ class Screenshot:
         do_not_save = True  # so users don't unintentionally reveal their UID when naively sharing debug folder
         return self._take_screenshot(0, 0, 1, 1, do_not_save)
 
-    def screenshot_stats(self, scan_type: IncrementType) -> dict:
+    def screenshot_stats(self, scan_type: IncrementType) -> tuple[dict, np.ndarray]:
         """Takes a screenshot of the stats. Requires an item to be selected in the inventory.
 
         :param scan_type: The scan type
         :raises ValueError: Thrown if the scan type is invalid
-        :return: A dict of the stats with the key being the stat name and the value being the screenshot
+        :return: A dict of the stats with the key being the stat name and the value being a view into the captured frame,
+            and the fingerprint of the stats panel
         """
         match IncrementType(scan_type):
             case IncrementType.LIGHT_CONE_ADD:
@@ -87,6 +104,18 @@ class Screenshot:
         coords = SCREENSHOT_COORDS[self._aspect_ratio][SORT]
         return self._take_screenshot(*coords)
 
+    def screenshot_grid(self) -> np.ndarray:
+        """Takes a screenshot of the inventory grid. Requires inventory to be open.
+
+        :return: The RGB pixels of the grid
+        """
+        frame = self._grab_frame(
+            *SCREENSHOT_COORDS[self._aspect_ratio][GRID][GRID_AREA]
+        )
+        if self._debug:
+            self._save_image(PILImage.fromarray(frame))
+        return frame
+
     def screenshot_quantity(self) -> Image:
         """Takes a screenshot of the quantity. Requires inventory to be open.
 
@@ -181,6 +210,16 @@ class Screenshot:
         """
         return self._take_screenshot(*SCREENSHOT_COORDS[self._aspect_ratio][UID])
 
+    def screenshot_signature(
+        self, region: tuple[float, float, float, float] = (0, 0, 1, 1)
+    ) -> np.ndarray:
+        """Takes a tiny grayscale capture of a region, for telling when it changes
+
+        :param region: The x, y, width and height of the region in % of the window, defaults to the whole window
+        :return: The signature of the region
+        """
+        return signature(self._grab_frame(*region, normalize=False))
+
     def _take_screenshot(
         self, x: float, y: float, width: float, height: float, do_not_save: bool = False
     ) -> Image:
@@ -192,48 +231,101 @@ class Screenshot:
         :param height: The height of the screenshot
         :return: The screenshot normalized to 1920x1080
         """
+        screenshot = PILImage.fromarray(self._grab_frame(x, y, width, height))
+
+        if self._debug and not do_not_save:
+            self._save_image(screenshot)
+
+        return screenshot
+
+    def _grab_frame(
+        self,
+        x: float,
+        y: float,
+        width: float,
+        height: float,
+        normalize: bool = True,
+    ) -> np.ndarray:
+        """Captures a region of the game window into a pixel array
+
+        :param x: The x percent coordinate of the top left corner of the region
+        :param y: The y percent coordinate of the top left corner of the region
+        :param width: The width of the region
+        :param height: The height of the region
+        :param normalize: Whether to normalize the region to 1920x1080, defaults to True
+        :return: The RGB pixel array
+        """
         # adjust coordinates to window
         x = self._window_x + int(self._window_width * x)
         y = self._window_y + int(self._window_height * y)
         width = int(self._window_width * width)
         height = int(self._window_height * height)
 
-        screenshot = ImageGrab.grab(
-            bbox=(int(x), int(y), int(x + width), int(y + height)), all_screens=True
+        frame = np.asarray(
+            ImageGrab.grab(
+                bbox=(int(x), int(y), int(x + width), int(y + height)),
+                all_screens=True,
+            )
         )
 
-        screenshot = screenshot.resize(
-            (int(width / self._x_scaling_factor), int(height / self._y_scaling_factor))
-        )
+        return self._normalize(frame) if normalize else frame
 
-        if self._debug and not do_not_save:
-            self._save_image(screenshot)
+    def _normalize(
+        self, img: np.ndarray, size: tuple[int, int] | None = None
+    ) -> np.ndarray:
+        """Scales pixels captured from the game window to 1920x1080
 
-        return screenshot
+        :param img: The captured pixels
+        :param size: The target width and height, defaults to the image's size scaled to 1920x1080
+        :return: The scaled pixels, or the same pixels if the window is already 1920x1080
+        """
+        if self._is_native:
+            return img
+
+        height, width = img.shape[:2]
+        if size is None:
+            size = (
+                int(width / self._x_scaling_factor),
+                int(height / self._y_scaling_factor),
+            )
+        interpolation = (
+            cv2.INTER_AREA if size[0] < width else cv2.INTER_CUBIC  # type: ignore
+        )
+        return cv2.resize(img, size, interpolation=interpolation)  # type: ignore
 
-    def _screenshot_stats(self, key: str) -> dict:
+    def _screenshot_stats(self, key: str) -> tuple[dict, np.ndarray]:
         """Takes a screenshot of the stats
 
         :param key: The key of the stats to screenshot
-        :return: A dict of the stats with the key being the stat name and the value being the screenshot
+        :return: A dict of the stats with the key being the stat name and the value being a view into the captured frame,
+            and the fingerprint of the stats panel
         """
         coords = SCREENSHOT_COORDS[self._aspect_ratio]
 
-        img = self._take_screenshot(*coords[STATS])
+        # a fresh frame per item, since the views are parsed after the scan moves on.
+        # the frame is left at window resolution and only the fields are resampled
+        frame = self._grab_frame(*coords[STATS], normalize=False)
+        if self._debug:
+            self._save_image(PILImage.fromarray(frame))
 
-        adjusted_stat_coords = {
-            k: (
-                int(v[0] * img.width),
-                int(v[1] * img.height),
-                int(v[2] * img.width),
-                int(v[3] * img.height),
-            )
-            for k, v in coords[key].items()
-        }
+        height, width = frame.shape[:2]
+        norm_width = int(width / self._x_scaling_factor)
+        norm_height = int(height / self._y_scaling_factor)
 
-        res = {k: img.crop(v) for k, v in adjusted_stat_coords.items()}
+        res = {}
+        for k, (x0, y0, x1, y1) in coords[key].items():
+            crop = frame[
+                int(y0 * height) : int(y1 * height), int(x0 * width) : int(x1 * width)
+            ]
+            res[k] = self._normalize(
+                crop,
+                (
+                    int(x1 * norm_width) - int(x0 * norm_width),
+                    int(y1 * norm_height) - int(y0 * norm_height),
+                ),
+            )
 
-        return res
+        return res, fingerprint(frame)
 
     def _screenshot_traces(self, key: str) -> dict:
         """Takes a screenshot of the trace levels
@@ -263,6 +355,15 @@ class Screenshot:
 
         return res
 
+    def _log(self, msg: str, level: LogLevel = LogLevel.INFO) -> None:
+        """Logs a message
+
+        :param msg: The message to log
+        :param level: The log level
+        """
+        if self._debug or level in [LogLevel.INFO, LogLevel.WARNING, LogLevel.ERROR]:
+            self._log_signal.emit((msg, level))
+
     def _save_image(self, img: Image) -> None:
         """Save the image on disk.
 
@@ -0,0 +1,113 @@
+import time
+from typing import Callable
+
+import cv2
+import numpy as np
+
+# width and height a region is downscaled to before frames are compared
+SIGNATURE_SIZE = (32, 18)
+
+# seconds between captures while waiting
+POLL_INTERVAL = 0.015
+
+# mean difference in gray levels for a region to count as changed
+CHANGE_THRESHOLD = 6.0
+
+# mean difference in gray levels for two captures to count as the same frame
+STABLE_THRESHOLD = 1.5
+
+# consecutive matching captures for a region to count as settled
+SETTLE_FRAMES = 3
+
+# width and height the window is downscaled to for telling items apart
+FINGERPRINT_SIZE = (96, 54)
+
+# largest difference in gray levels between fingerprints of the same screen
+DUPLICATE_THRESHOLD = 12
+
+
+def signature(frame: np.ndarray) -> np.ndarray:
+    """Reduce a capture to a tiny grayscale thumbnail for comparing frames
+
+    :param frame: The RGB capture
+    :return: The thumbnail
+    """
+    gray = cv2.cvtColor(np.ascontiguousarray(frame), cv2.COLOR_RGB2GRAY)  # type: ignore
+    return cv2.resize(  # type: ignore
+        gray, SIGNATURE_SIZE, interpolation=cv2.INTER_AREA  # type: ignore
+    ).astype(np.int16)
+
+
+def fingerprint(frame: np.ndarray) -> np.ndarray:
+    """Reduce a capture to a thumbnail detailed enough to tell items apart
+
+    Unlike a signature, a fingerprint keeps small details such as single
+    digits, so that items with similar stats can be told apart.
+
+    :param frame: The RGB capture
+    :return: The fingerprint
+    """
+    gray = cv2.cvtColor(np.ascontiguousarray(frame), cv2.COLOR_RGB2GRAY)  # type: ignore
+    return cv2.resize(  # type: ignore
+        gray, FINGERPRINT_SIZE, interpolation=cv2.INTER_AREA  # type: ignore
+    ).astype(np.int16)
+
+
+def is_duplicate(a: np.ndarray, b: np.ndarray) -> bool:
+    """Check if two fingerprints show the same screen
+
+    :param a: The first fingerprint
+    :param b: The second fingerprint
+    :return: True if no part of the screen changed, False otherwise
+    """
+    return int(np.abs(a - b).max()) <= DUPLICATE_THRESHOLD
+
+
+def difference(a: np.ndarray, b: np.ndarray) -> float:
+    """Compare two signatures
+
+    :param a: The first signature
+    :param b: The second signature
+    :return: The mean difference in gray levels
+    """
+    return float(np.abs(a - b).mean())
+
+
+def wait_for_settle(
+    grab: Callable[[], np.ndarray],
+    before: np.ndarray | None,
+    timeout: float,
+    interrupted: Callable[[], bool] = lambda: False,
+) -> bool:
+    """Wait until a region has changed from a previous frame and then stopped changing
+
+    :param grab: The function capturing the signature of the region
+    :param before: The signature before the input, or None to only wait for the region to be still
+    :param timeout: The maximum number of seconds to wait
+    :param interrupted: The function telling whether to stop waiting early
+    :return: True if the region settled, False if the wait timed out or was interrupted
+    """
+    deadline = time.perf_counter() + timeout
+    changed = before is None
+    prev = None
+    stable = 0
+
+    while not interrupted():
+        current = grab()
+        if not changed and difference(current, before) > CHANGE_THRESHOLD:  # type: ignore
+            changed = True
+            stable = 0
+        elif prev is not None and difference(current, prev) <= STABLE_THRESHOLD:
+            stable += 1
+        else:
+            stable = 0
+        if changed and stable >= SETTLE_FRAMES:
+            return True
+        prev = current
+
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return False
+        time.sleep(min(POLL_INTERVAL, remaining))
+
+    return False
@@ -0,0 +1,170 @@
+from functools import lru_cache
+from itertools import product
+
+import numpy as np
+
+from models.substat_vals import SUBSTAT_ROLL_VALS
+
+# roll value of a single low, mid and high roll, in tenths
+ROLL_TIERS = (8, 9, 10)
+
+
+class SubstatRollTable:
+    """SubstatRollTable class for looking up legal substat values and the rolls behind them
+
+    The legal values of each stat are compiled into a sorted array per rarity,
+    so that checking a value or finding the nearest legal one is a binary
+    search. Alongside each value are the roll values it can result from, in
+    tenths of a high roll, since SPD hides its decimal place and one value can
+    result from several.
+    """
+
+    def __init__(self, roll_vals: dict) -> None:
+        """Constructor
+
+        :param roll_vals: The roll values of each legal value, by rarity and stat
+        """
+        self._values = {}
+        self._roll_values = {}
+        for rarity, stats in roll_vals.items():
+            for key, vals in stats.items():
+                pairs = sorted(
+                    (float(val), _to_tenths(roll_value))
+                    for val, roll_value in vals.items()
+                )
+                self._values[(int(rarity), key)] = np.array([v for v, _ in pairs])
+                self._roll_values[(int(rarity), key)] = [r for _, r in pairs]
+
+    def has_stat(self, rarity: int, key: str) -> bool:
+        """Check if a stat can roll as a substat
+
+        :param rarity: The rarity of the relic
+        :param key: The substat key
+        :return: True if the stat has legal values for the rarity, False otherwise
+        """
+        return (rarity, key) in self._values
+
+    def index(self, rarity: int, key: str, value: float) -> int | None:
+        """Get the position of a value among the legal values of a stat
+
+        :param rarity: The rarity of the relic
+        :param key: The substat key
+        :param value: The substat value
+        :return: The position, or None if the value is not legal
+        """
+        values = self._values.get((rarity, key))
+        if values is None:
+            return None
+        i = int(np.searchsorted(values, value))
+        if i < len(values) and values[i] == value:
+            return i
+        return None
+
+    def nearest(self, rarity: int, key: str, value: float) -> float | None:
+        """Get the legal value of a stat closest to a value, by relative error
+
+        :param rarity: The rarity of the relic
+        :param key: The substat key
+        :param value: The value as read
+        :return: The nearest legal value, or None if the stat has no legal values
+        """
+        values = self._values.get((rarity, key))
+        if values is None:
+            return None
+        i = int(np.searchsorted(values, value))
+        candidates = values[max(i - 1, 0) : i + 1]
+        errors = np.abs(candidates - value) / candidates
+        return float(candidates[errors.argmin()])
+
+    def roll_values(self, rarity: int, key: str, value: float) -> list[float]:
+        """Get the roll values a legal value can result from
+
+        :param rarity: The rarity of the relic
+        :param key: The substat key
+        :param value: The substat value
+        :return: The roll values in ascending order, empty if the value is not legal
+        """
+        i = self.index(rarity, key, value)
+        if i is None:
+            return []
+        return [r / 10 for r in self._roll_values[(rarity, key)][i]]
+
+    def decompositions(
+        self, rarity: int, key: str, value: float
+    ) -> list[tuple[int, int, int]]:
+        """Get the combinations of rolls a legal value can result from
+
+        :param rarity: The rarity of the relic
+        :param key: The substat key
+        :param value: The substat value
+        :return: The number of low, mid and high rolls of each combination
+        """
+        i = self.index(rarity, key, value)
+        if i is None:
+            return []
+        return [
+            tiers
+            for tenths in self._roll_values[(rarity, key)][i]
+            for tiers in _decompose(tenths)
+        ]
+
+    def roll_counts(self, rarity: int, key: str, value: float) -> set[int]:
+        """Get the numbers of rolls a legal value can result from
+
+        :param rarity: The rarity of the relic
+        :param key: The substat key
+        :param value: The substat value
+        :return: The possible numbers of rolls, empty if the value is not legal
+        """
+        return {sum(tiers) for tiers in self.decompositions(rarity, key, value)}
+
+
+def resolve_roll_counts(
+    candidates: list[set[int]], totals: set[int]
+) -> tuple[int, ...] | None:
+    """Find the only assignment of roll counts to substats that adds up to a legal total
+
+    :param candidates: The possible numbers of rolls of each substat
+    :param totals: The possible total numbers of rolls of the relic
+    :return: The number of rolls of each substat, or None if there is not exactly one assignment
+    """
+    res = None
+    for counts in product(*(sorted(c) for c in candidates)):
+        if sum(counts) not in totals:
+            continue
+        if res is not None:
+            return None
+        res = counts
+    return res
+
+
+@lru_cache(maxsize=None)
+def _decompose(tenths: int) -> tuple[tuple[int, int, int], ...]:
+    """Get every combination of low, mid and high rolls that adds up to a roll value
+
+    :param tenths: The roll value, in tenths
+    :return: The number of low, mid and high rolls of each combination
+    """
+    low, mid, high = ROLL_TIERS
+    res = []
+    for n in range(-(-tenths // high), tenths // low + 1):
+        extra = tenths - low * n
+        for c in range(extra // (high - low) + 1):
+            b = extra - (high - low) * c
+            if b + c <= n:
+                res.append((n - b - c, b, c))
+    return tuple(res)
+
+
+def _to_tenths(roll_value: float | list[float]) -> tuple[int, ...]:
+    """Convert the roll value or values of a legal value to tenths
+
+    :param roll_value: The roll value, or a list of them if ambiguous
+    :return: The roll values in tenths, ascending
+    """
+    if not isinstance(roll_value, list):
+        roll_value = [roll_value]
+    return tuple(sorted(round(r * 10) for r in roll_value))
+
+
+SUBSTAT_ROLLS = SubstatRollTable(SUBSTAT_ROLL_VALS)
@@ -0,0 +1,189 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+from utils.data import cache_path
+
+# number of the newest items fingerprinted per category
+HEAD_SIZE = 8
+
+# consecutive items that must match the newest known ones for the scan to stop
+CONFIRM_MATCHES = 3
+
+# largest difference in gray levels between fingerprints of the same item, once
+# the brightness bleeding through the translucent panel is evened out
+MATCH_THRESHOLD = 24
+
+# bumped whenever the fingerprints are taken differently, so old files are ignored
+WATERMARK_FORMAT = 1
+
+
+def is_same_item(a: np.ndarray, b: np.ndarray) -> bool:
+    """Check if two stats panel fingerprints show the same item
+
+    :param a: The first fingerprint
+    :param b: The second fingerprint
+    :return: True if the fingerprints match, False otherwise
+    """
+    if a.shape != b.shape:
+        return False
+    diff = (a - a.mean()) - (b - b.mean())
+    return float(np.abs(diff).max()) <= MATCH_THRESHOLD
+
+
+class Watermark:
+    """Watermark class for the state of a category at the end of the last scan
+
+    Items are kept newest first, the same order as sorting the inventory by
+    date obtained, with None for items that failed to parse.
+    """
+
+    def __init__(
+        self, quantity: int, fingerprints: np.ndarray, items: list[dict | None]
+    ) -> None:
+        """Constructor
+
+        :param quantity: The number of items in the inventory
+        :param fingerprints: The stats panel fingerprints of the newest items
+        :param items: The items, newest first
+        """
+        self.quantity = quantity
+        self.fingerprints = fingerprints
+        self.items = items
+
+    def find_known(
+        self, fingerprints: list[np.ndarray], complete: bool = False
+    ) -> tuple[int, int] | None:
+        """Find where the items scanned so far reach the newest known items
+
+        A known item only counts once it is followed by the ones after it in
+        the last scan, so a new copy of a known item is not taken for it. The
+        matched items must also include one that differs from the first, since
+        new copies of identical items would otherwise look like known ones.
+        Only the last few scanned items are checked, as an earlier match would
+        have already been found.
+
+        :param fingerprints: The fingerprints of the items scanned so far, newest first
+        :param complete: Whether the inventory has no more items to scan
+        :return: The index of the first known item among the scanned ones and
+            among the known ones, or None if they have not been reached yet
+        """
+        for start in range(max(0, len(fingerprints) - HEAD_SIZE), len(fingerprints)):
+            run = fingerprints[start:]
+            for known in range(len(self.fingerprints)):
+                distinct = self._find_distinct(known)
+                if distinct is None or len(run) <= distinct - known:
+                    continue
+                expected = self.fingerprints[known : known + len(run)]
+                needed = min(CONFIRM_MATCHES, len(self.fingerprints) - known)
+                if len(run) < needed and not complete:
+                    continue
+                if len(expected) < len(run):
+                    continue
+                if all(is_same_item(a, b) for a, b in zip(run, expected)):
+                    return start, known
+        return None
+
+    def _find_distinct(self, known: int) -> int | None:
+        """Find the first known item after one that does not look the same as it
+
+        :param known: The index of the known item
+        :return: The index of the first different item, or None if the rest look the same
+        """
+        for i in range(known + 1, len(self.fingerprints)):
+            if not is_same_item(self.fingerprints[known], self.fingerprints[i]):
+                return i
+        return None
+
+    def advance(
+        self,
+        quantity: int,
+        fingerprints: list[np.ndarray],
+        new_items: list[dict | None],
+        known: int,
+    ) -> "Watermark":
+        """Put the newly scanned items ahead of the known ones
+
+        Known items ahead of the first one reached are taken to be gone.
+
+        :param quantity: The number of items in the inventory
+        :param fingerprints: The fingerprints of the new items, newest first
+        :param new_items: The new items, newest first
+        :param known: The index of the first known item reached
+        :return: The watermark after the scan
+        """
+        head = list(fingerprints[:HEAD_SIZE]) + list(self.fingerprints[known:])
+        return Watermark(
+            quantity,
+            np.array(head[:HEAD_SIZE], dtype=np.int16),
+            new_items + self.items[known:],
+        )
+
+
+class WatermarkStore:
+    """WatermarkStore class for keeping the watermark of each category between scans"""
+
+    def __init__(self, file_name: str = "watermarks.npz") -> None:
+        """Constructor
+
+        :param file_name: The file name in the cache folder
+        """
+        self._path = cache_path(file_name)
+        self._lock = threading.Lock()
+        self._watermarks = {}
+        self._load()
+
+    def get(self, category: str) -> Watermark | None:
+        """Get the watermark of a category
+
+        :param category: The category, i.e. the filters key of its strategy
+        :return: The watermark, or None if the category was never scanned incrementally
+        """
+        with self._lock:
+            return self._watermarks.get(category)
+
+    def set(self, category: str, watermark: Watermark) -> None:
+        """Replace the watermark of a category and save it
+
+        :param category: The category, i.e. the filters key of its strategy
+        :param watermark: The watermark
+        """
+        with self._lock:
+            self._watermarks[category] = watermark
+            self._save()
+
+    def _load(self) -> None:
+        """Load the saved watermarks, if any"""
+        if not os.path.exists(self._path):
+            return
+        try:
+            with np.load(self._path) as data:
+                if int(data["format"]) != WATERMARK_FORMAT:
+                    return
+                for category in data["categories"]:
+                    category = str(category)
+                    self._watermarks[category] = Watermark(
+                        int(data[f"{category}_quantity"]),
+                        data[f"{category}_fingerprints"],
+                        json.loads(str(data[f"{category}_items"])),
+                    )
+        except (OSError, ValueError, KeyError):
+            self._watermarks = {}
+
+    def _save(self) -> None:
+        """Save the watermarks, replacing the file in one step"""
+        arrays = {
+            "format": WATERMARK_FORMAT,
+            "categories": np.array(list(self._watermarks)),
+        }
+        for category, watermark in self._watermarks.items():
+            arrays[f"{category}_quantity"] = watermark.quantity
+            arrays[f"{category}_fingerprints"] = watermark.fingerprints
+            arrays[f"{category}_items"] = json.dumps(watermark.items)
+
+        tmp_path = self._path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, self._path)